@@ -1,6 +1,9 @@
 import discord
-import json
+import os
 from discord.ext import commands
+from datastore import store
+from pokeapi import pokeapi
+from notifications import notifications
 
 class Admin(commands.Cog):
     def __init__(self, bot):
@@ -25,61 +28,49 @@ class Admin(commands.Cog):
     async def wipe(self, ctx, user_id: int):
         """Deletes a user from the database."""
         # Delete user data
-        with open('user_data.json', 'r') as f:
-            user_data = json.load(f)
+        user_data = store.load('user_data.json')
         if str(user_id) in user_data:
             del user_data[str(user_id)]
-            with open('user_data.json', 'w') as f:
-                json.dump(user_data, f, indent=4)
+            store.mark_dirty('user_data.json', user_id)
             await ctx.send(f"Successfully removed user entry with ID: {user_id} from user_data.json.")
         else:
             await ctx.send(f"No user entry found with ID: {user_id}.")
 
         # Delete data from collections.json
-        with open('collections.json', 'r') as f:
-            collections_data = json.load(f)
+        collections_data = store.load('collections.json')
         if str(user_id) in collections_data:
             del collections_data[str(user_id)]
-            with open('collections.json', 'w') as f:
-                json.dump(collections_data, f, indent=4)
+            store.mark_dirty('collections.json', user_id)
             await ctx.send(f"Successfully removed user entry with ID: {user_id} from collections.json.")
 
         # Delete data from user_scores.json
-        with open('user_scores.json', 'r') as f:
-            user_scores_data = json.load(f)
+        user_scores_data = store.load('user_scores.json')
         if str(user_id) in user_scores_data:
             del user_scores_data[str(user_id)]
-            with open('user_scores.json', 'w') as f:
-                json.dump(user_scores_data, f, indent=4)
+            store.mark_dirty('user_scores.json', user_id)
             await ctx.send(f"Successfully removed user entry with ID: {user_id} from user_scores.json.")
 
         # Delete data from expedition_levels.json
-        with open('expedition_levels.json', 'r') as f:
-            expedition_levels_data = json.load(f)
+        expedition_levels_data = store.load('expedition_levels.json')
         if str(user_id) in expedition_levels_data:
             del expedition_levels_data[str(user_id)]
-            with open('expedition_levels.json', 'w') as f:
-                json.dump(expedition_levels_data, f, indent=4)
+            store.mark_dirty('expedition_levels.json', user_id)
             await ctx.send(f"Successfully removed user entry with ID: {user_id} from expedition_levels.json.")
         
         # Delete data from inventory.json
-        with open('inventory.json', 'r') as f:
-            inventory_data = json.load(f)
+        inventory_data = store.load('inventory.json')
         if str(user_id) in inventory_data:
             del inventory_data[str(user_id)]
-            with open('inventory.json', 'w') as f:
-                json.dump(inventory_data, f, indent=4)
+            store.mark_dirty('inventory.json', user_id)
             await ctx.send(f"Successfully removed user entry with ID: {user_id} from inventory.json.")
         else:
             await ctx.send(f"No user entry found with ID: {user_id} in inventory.json.")
 
         # Delete data from teams.json
-        with open('teams.json', 'r') as f:
-            teams_data = json.load(f)
+        teams_data = store.load('teams.json')
         if str(user_id) in teams_data:
             del teams_data[str(user_id)]
-            with open('teams.json', 'w') as f:
-                json.dump(teams_data, f, indent=4)
+            store.mark_dirty('teams.json', user_id)
             await ctx.send(f"Successfully removed user entry with ID: {user_id} from teams.json.")
         else:
             await ctx.send(f"No user entry found with ID: {user_id} in teams.json.")
@@ -87,11 +78,7 @@ class Admin(commands.Cog):
     @commands.command(aliases=["addr"])
     async def addredeems(self, ctx, amount: int, user_id: int):
         """Add redeems to a user's balance."""
-        try:
-            with open('user_data.json', 'r') as file:
-                user_data = json.load(file)
-        except FileNotFoundError:
-            user_data = {}
+        user_data = store.load('user_data.json')
 
         # Check if the user_id exists in user_data.json
         if str(user_id) not in user_data:
@@ -101,9 +88,8 @@ class Admin(commands.Cog):
         # Add redeems to the user's balance
         user_data[str(user_id)]['redeems'] = user_data.get(str(user_id), {}).get('tokens', 0) + amount
 
-        # Save the updated user data
-        with open('user_data.json', 'w') as file:
-            json.dump(user_data, file, indent=4)
+        # Mark the user's profile for writing back to disk
+        store.mark_dirty('user_data.json', user_id)
 
         await ctx.send(f"Successfully added {amount} redeems to user {user_id}'s balance.")
 
@@ -111,11 +97,7 @@ class Admin(commands.Cog):
     @commands.command(aliases=["givecoins"])
     async def addtokens(self, ctx, amount: int, user_id: int):
         """Add tokens to a user's balance."""
-        try:
-            with open('user_data.json', 'r') as file:
-                user_data = json.load(file)
-        except FileNotFoundError:
-            user_data = {}
+        user_data = store.load('user_data.json')
 
         # Check if the user_id exists in user_data.json
         if str(user_id) not in user_data:
@@ -125,11 +107,65 @@ class Admin(commands.Cog):
         # Add tokens to the user's balance
         user_data[str(user_id)]['tokens'] = user_data.get(str(user_id), {}).get('tokens', 0) + amount
 
-        # Save the updated user data
-        with open('user_data.json', 'w') as file:
-            json.dump(user_data, file, indent=4)
+        # Mark the user's profile for writing back to disk
+        store.mark_dirty('user_data.json', user_id)
 
         await ctx.send(f"Successfully added {amount} tokens to user {user_id}'s balance.")
 
+    @commands.is_owner()
+    @commands.command()
+    async def export(self, ctx, filename: str):
+        """Writes a readable, indented copy of a data file to the exports folder."""
+        # Only the registered data files, so the command cannot pull any other file into the store
+        # (and its flushes) or write an export outside the folder
+        if filename not in store.registered:
+            await ctx.send(f"No data file named {filename}. Data files: {', '.join(sorted(store.registered))}")
+            return
+
+        path = os.path.join('exports', filename)
+        try:
+            await store.export(filename, path)
+        except Exception as e:
+            await ctx.send(f"Failed to export {filename}. Error: {e}")
+            return
+        await ctx.send(f"Exported {filename} to {path}.")
+
+    @commands.is_owner()
+    @commands.command(aliases=["apistats"])
+    async def cachestats(self, ctx, action: str = None):
+        """Shows the PokeAPI response cache counters. Use ';cachestats clear' to empty the cache."""
+        if action == 'clear':
+            pokeapi.cache.clear()
+            await ctx.send("PokeAPI response cache cleared.")
+            return
+
+        stats = pokeapi.cache.stats()
+        embed = discord.Embed(title="PokeAPI Cache", color=discord.Color.blue())
+        embed.add_field(name="Entries", value=stats['entries'], inline=True)
+        embed.add_field(name="Size", value=f"{stats['bytes'] / 2 ** 20:.1f}/{stats['max_bytes'] / 2 ** 20:.1f} MB", inline=True)
+        embed.add_field(name="Hit Rate", value=f"{stats['hit_rate']:.1%}", inline=True)
+        embed.add_field(name="Hits", value=stats['hits'], inline=True)
+        embed.add_field(name="Cached Not Found", value=stats['negative_hits'], inline=True)
+        embed.add_field(name="Misses", value=stats['misses'], inline=True)
+        embed.add_field(name="Evictions", value=stats['evictions'], inline=True)
+        embed.add_field(name="Requests In Flight", value=pokeapi.requests.in_flight(), inline=True)
+        await ctx.send(embed=embed)
+
+    @commands.is_owner()
+    @commands.command(aliases=["dmstats"])
+    async def notifystats(self, ctx):
+        """Shows the DM queue backlog and counters."""
+        stats = notifications.stats()
+        embed = discord.Embed(title="DM Queue", color=discord.Color.blue())
+        embed.add_field(name="Users Waiting", value=stats['users_waiting'], inline=True)
+        embed.add_field(name="Notices Waiting", value=stats['notices_waiting'], inline=True)
+        embed.add_field(name="Queued", value=stats['queued'], inline=True)
+        embed.add_field(name="Merged", value=stats['merged'], inline=True)
+        embed.add_field(name="Dropped", value=stats['dropped'], inline=True)
+        embed.add_field(name="Sent", value=stats['sent'], inline=True)
+        embed.add_field(name="Failed", value=stats['failed'], inline=True)
+        embed.add_field(name="Fetched Over REST", value=stats['fetched'], inline=True)
+        await ctx.send(embed=embed)
+
 async def setup(bot):
     await bot.add_cog(Admin(bot))
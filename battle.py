@@ -1,17 +1,12 @@
 import discord
-import json
 from discord.ui import Button, View
 from discord.ext import commands
+from datastore import store
 
 def has_started():
     async def predicate(ctx):
         user_id = str(ctx.author.id)
-        try:
-            with open('user_data.json', 'r') as file:
-                user_data = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("Error: User data not found.")
-            return False
+        user_data = store.load('user_data.json')
         
         # Check if the user has started by looking for their ID in the user_data
         if user_id in user_data and user_data[user_id]['started']:
@@ -96,14 +91,7 @@ class Battle(commands.Cog):
         self.opponent = None
 
     def get_user_selected_pokemon(self, user_id):
-        try:
-            with open('collections.json', 'r') as file:
-                collections_data = json.load(file)
-        except FileNotFoundError:
-            return []  # Return empty list if file not found
-        except json.JSONDecodeError:
-            print("Error: collections.json is not valid JSON.")
-            return []  # Return empty list if JSON decoding error occurs
+        collections_data = store.load('collections.json')
 
         user_pokemon = collections_data.get(str(user_id), [])
         selected_pokemon = [pokemon for pokemon in user_pokemon if pokemon.get('selected', False)]
@@ -191,10 +179,8 @@ class Battle(commands.Cog):
             move = attacker_data[0].get(f"move {move_num}", "")
             if move:
                 if not self.move_power_levels:
-                    try:
-                        with open('move_powers.json', 'r') as file:
-                            self.move_power_levels = json.load(file)
-                    except FileNotFoundError:
+                    self.move_power_levels = await store.load_async('move_powers.json')
+                    if not self.move_power_levels:
                         await ctx.send("Move power levels data not found!")
                         return
 
@@ -215,16 +201,10 @@ class Battle(commands.Cog):
                     self.end_battle()  # Call end_battle method when opponent's Pokémon faints
                     return
 
-                try:
-                    with open('collections.json', 'r') as file:
-                        collections_data = json.load(file)
-                except (FileNotFoundError, json.JSONDecodeError):
-                    await ctx.send("Error loading or parsing collections data.")
-                    return
+                collections_data = store.load('collections.json')
                 
                 collections_data[opponent_id][0]['HP'] = opponent_pokemon[0]['HP']
-                with open('collections.json', 'w') as file:
-                    json.dump(collections_data, file)
+                store.mark_dirty('collections.json', opponent_id)
 
                 await self.update_battle_info(ctx)
                 await ctx.send(f"Opponent's Pokémon now has {opponent_pokemon[0]['HP']} HP remaining.")
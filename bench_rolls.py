@@ -0,0 +1,66 @@
+import argparse
+import random
+import time
+import rolls
+from factory import PokemonFactory
+
+# Species data shaped like a species cache entry, so no lookups are needed
+ENTRY = {
+    "types": ["electric"],
+    "stats": {"hp": 35, "attack": 55, "defense": 40, "special_attack": 50, "special_defense": 50, "speed": 90},
+    "abilities": [{"name": "static", "is_hidden": False}, {"name": "lightning-rod", "is_hidden": True}],
+    "gender_rate": 4,
+    "base_experience": 112,
+    "image_url": "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/other/official-artwork/25.png",
+}
+
+def per_pokemon_rolls(count, seed):
+    """
+    Rolls a batch the way the cogs used to, with separate random calls per Pokémon.
+    """
+    generator = random.Random(seed)
+    for _ in range(count):
+        generator.randint(1, 30)
+        [generator.randint(1, 31) for _ in rolls.IV_KEYS]
+        generator.randrange(25)
+        generator.random()
+
+def timed(func, *args):
+    """
+    Returns the result of a call and the seconds it took.
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def run(sizes, seed):
+    backends = [('random', False)]
+    if rolls.numpy is not None:
+        backends.append(('numpy', True))
+    else:
+        print("NumPy is not installed; only the random module backend is measured.")
+
+    for size in sizes:
+        print(f"\n{size:,} Pokémon")
+        print(f"{'backend':<22} {'rolls (s)':>10} {'factory (s)':>12}")
+        _, seconds = timed(per_pokemon_rolls, size, seed)
+        print(f"{'per-Pokémon random':<22} {seconds:>10.3f} {'':>12}")
+        for name, use_numpy in backends:
+            roller = rolls.StatRoller(seed, use_numpy)
+            _, roll_seconds = timed(roller.roll, size, (1, 30), 4)
+            factory = PokemonFactory()
+            factory.roller = rolls.StatRoller(seed, use_numpy)
+            _, build_seconds = timed(factory.build, '1', 'Pikachu', ENTRY, size)
+            print(f"{name + ' batch':<22} {roll_seconds:>10.3f} {build_seconds:>12.3f}")
+
+        # The same seed must reproduce the same grant
+        first = PokemonFactory(seed).build('1', 'Pikachu', ENTRY, 100)
+        again = PokemonFactory(seed).build('1', 'Pikachu', ENTRY, 100)
+        assert first == again, "seeded runs did not reproduce"
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare per-Pokémon and batched stat rolling for large simulated grants.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], help="Numbers of Pokémon to roll")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed, so runs can be reproduced")
+    args = parser.parse_args()
+    run(args.sizes, args.seed)
@@ -0,0 +1,101 @@
+import argparse
+import random
+import time
+import serializers
+
+NATURES = ["Hardy", "Lonely", "Brave", "Adamant", "Naughty", "Bold", "Docile", "Relaxed", "Impish", "Lax", "Timid", "Hasty", "Serious", "Jolly", "Naive", "Modest", "Mild", "Quiet", "Bashful", "Rash", "Calm", "Gentle", "Sassy", "Careful", "Quirky"]
+SPECIES = ["Bulbasaur", "Charmander", "Squirtle", "Pikachu", "Eevee", "Gastly", "Machop", "Geodude", "Magikarp", "Dratini", "Snorlax", "Lapras"]
+
+def synthetic_pokemon(pokemon_id, user_id):
+    """
+    Returns a Pokémon shaped like the ones PokemonFactory creates.
+    """
+    name = random.choice(SPECIES)
+    level = random.randint(1, 100)
+    return {
+        "id": pokemon_id,
+        "ownerid": user_id,
+        "OT": user_id,
+        "name": name,
+        "gender": random.choice(["Male", "Female", None]),
+        "ability": "overgrow",
+        "nickname": "",
+        "friendship": random.randint(0, 255),
+        "favorite": False,
+        "level": level,
+        "exp": random.randint(0, level ** 3),
+        "expcap": level ** 3,
+        "nature": random.choice(NATURES),
+        "hpiv": random.randint(1, 31),
+        "atkiv": random.randint(1, 31),
+        "defiv": random.randint(1, 31),
+        "spatkiv": random.randint(1, 31),
+        "spdiv": random.randint(1, 31),
+        "speiv": random.randint(1, 31),
+        "hpev": 0,
+        "atkev": 0,
+        "defev": 0,
+        "spatkev": 0,
+        "spdefev": 0,
+        "speedev": 0,
+        "move 1": "tackle",
+        "move 2": "growl",
+        "move 3": "tackle",
+        "move 4": "tackle",
+        "image_url": f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/other/official-artwork/{pokemon_id % 1000}.png",
+        "selected": False,
+        "helditem": "",
+        "is_shiny": random.random() < 1 / 4096
+    }
+
+def synthetic_collections(count, per_user):
+    """
+    Returns a collections document holding count Pokémon spread across trainers.
+
+    Parameters:
+        count (int): The total number of Pokémon.
+        per_user (int): The number of Pokémon each trainer owns.
+    """
+    collections = {}
+    for index in range(count):
+        user_id = 100000000000000000 + index // per_user
+        collection = collections.setdefault(str(user_id), [])
+        collection.append(synthetic_pokemon(len(collection) + 1, user_id))
+    return collections
+
+def timed(func, *args):
+    """
+    Returns the result of a call and the seconds it took.
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def run(sizes, per_user, seed):
+    random.seed(seed)
+    names = ['json-indent', 'json', 'orjson', 'msgpack']
+    missing = [name for name in names if name not in serializers.SERIALIZERS]
+    if missing:
+        print(f"Not installed, skipped: {', '.join(missing)}")
+
+    for size in sizes:
+        document = synthetic_collections(size, per_user)
+        print(f"\n{size:,} Pokémon across {len(document):,} trainers")
+        print(f"{'format':<12} {'size (MB)':>10} {'dump (s)':>10} {'load (s)':>10}")
+        for name in names:
+            serializer = serializers.SERIALIZERS.get(name)
+            if serializer is None:
+                continue
+            data, dump_seconds = timed(serializer.dumps, document)
+            loaded, load_seconds = timed(serializers.loads, data)
+            assert loaded == document, f"{name} did not round-trip the document"
+            print(f"{name:<12} {len(data) / 1024 / 1024:>10.1f} {dump_seconds:>10.2f} {load_seconds:>10.2f}")
+            del data, loaded
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare the size and speed of the on-disk formats for collections.json.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000], help="Numbers of Pokémon to benchmark")
+    parser.add_argument('--per-user', type=int, default=200, help="Pokémon owned by each synthetic trainer")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the synthetic data")
+    args = parser.parse_args()
+    run(args.sizes, args.per_user, args.seed)
@@ -0,0 +1,145 @@
+import argparse
+import json
+import os
+from dex import write_snapshot
+
+# The PokeAPI resources the bot reads; the trim functions keep only the fields it uses
+RESOURCES = ('pokemon', 'pokemon-species', 'pokemon-form', 'move', 'ability')
+
+def english(entries, field):
+    """
+    Keeps only the English entries of a localized list, trimmed to one field.
+    """
+    return [{field: entry[field], "language": {"name": "en"}} for entry in entries if entry['language']['name'] == 'en']
+
+def named(resource):
+    """
+    Keeps only the name of a {"name", "url"} reference.
+    """
+    return {"name": resource['name']}
+
+def learn_details(details):
+    """
+    Keeps each distinct learn method and level of a move, dropping which games they apply to.
+    """
+    seen = {(detail['move_learn_method']['name'], detail['level_learned_at']) for detail in details}
+    return [{"level_learned_at": level, "move_learn_method": {"name": method}} for method, level in sorted(seen)]
+
+def trim_pokemon(data):
+    return {
+        "id": data['id'],
+        "name": data['name'],
+        "types": [{"slot": entry['slot'], "type": named(entry['type'])} for entry in data['types']],
+        "stats": [{"base_stat": entry['base_stat'], "stat": named(entry['stat'])} for entry in data['stats']],
+        "abilities": [{"ability": named(entry['ability']), "is_hidden": entry['is_hidden'], "slot": entry['slot']} for entry in data['abilities']],
+        "base_experience": data['base_experience'],
+        "moves": [{"move": named(entry['move']), "version_group_details": learn_details(entry['version_group_details'])} for entry in data['moves']],
+        "forms": [named(form) for form in data['forms']],
+        "species": {"name": data['species']['name'], "url": data['species']['url']},
+        "sprites": {
+            "front_default": data['sprites']['front_default'],
+            "other": {"official-artwork": {"front_default": data['sprites']['other']['official-artwork']['front_default']}},
+        },
+    }
+
+def trim_species(data):
+    return {
+        "id": data['id'],
+        "name": data['name'],
+        "gender_rate": data['gender_rate'],
+        "varieties": [{"is_default": entry['is_default'], "pokemon": named(entry['pokemon'])} for entry in data['varieties']],
+    }
+
+def trim_form(data):
+    return {
+        "id": data['id'],
+        "name": data['name'],
+        "form_name": data['form_name'],
+        "pokemon": named(data['pokemon']),
+        "sprites": {"front_default": data['sprites']['front_default'], "front_shiny": data['sprites']['front_shiny']},
+    }
+
+def trim_move(data):
+    return {
+        "id": data['id'],
+        "name": data['name'],
+        "type": named(data['type']),
+        "accuracy": data['accuracy'],
+        "power": data['power'],
+        "pp": data['pp'],
+        "damage_class": named(data['damage_class']),
+        "effect_entries": english(data['effect_entries'], 'effect'),
+    }
+
+def trim_ability(data):
+    return {
+        "id": data['id'],
+        "name": data['name'],
+        "effect_entries": english(data['effect_entries'], 'effect'),
+    }
+
+TRIMMERS = {
+    'pokemon': trim_pokemon,
+    'pokemon-species': trim_species,
+    'pokemon-form': trim_form,
+    'move': trim_move,
+    'ability': trim_ability,
+}
+
+def resource_files(root, resource):
+    """
+    Yields the JSON files for one resource in a dump directory.
+
+    Accepts the PokeAPI api-data layout (pokemon/25/index.json) and flat
+    files (pokemon/pikachu.json), optionally under api/v2/.
+    """
+    directory = os.path.join(root, resource)
+    if not os.path.isdir(directory):
+        directory = os.path.join(root, 'api', 'v2', resource)
+    if not os.path.isdir(directory):
+        return
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.endswith('.json') and name != 'index.json':
+            yield path
+        elif os.path.isfile(os.path.join(path, 'index.json')):
+            yield os.path.join(path, 'index.json')
+
+def build(dump_directory, output, serializer=None):
+    """
+    Builds a Pokédex snapshot from a directory of PokeAPI JSON dumps.
+
+    Every document is stored under both its name and its id, so the
+    snapshot answers the same paths PokeAPI does, including the species
+    links inside /pokemon responses.
+
+    Parameters:
+        dump_directory (str): The directory of PokeAPI responses.
+        output (str): The snapshot file to write.
+        serializer (str, optional): The record format; compact JSON by default.
+    """
+    documents = {}
+    for resource in RESOURCES:
+        count = 0
+        for path in resource_files(dump_directory, resource):
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            try:
+                document = TRIMMERS[resource](data)
+            except (KeyError, TypeError) as e:
+                print(f"Skipping {path}: missing field {e}")
+                continue
+            documents[f"{resource}/{document['name']}"] = document
+            documents[f"{resource}/{document['id']}"] = document
+            count += 1
+        print(f"Read {count} {resource} documents.")
+    write_snapshot(output, documents, serializer)
+    print(f"Wrote {output} ({os.path.getsize(output)} bytes).")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the offline Pokédex snapshot from a directory of PokeAPI JSON dumps (e.g. a checkout of PokeAPI/api-data/data/api/v2).")
+    parser.add_argument('directory', help="Directory of PokeAPI responses, e.g. pokemon/25/index.json")
+    parser.add_argument('--output', default='pokedex.dex', help="Snapshot file to write")
+    parser.add_argument('--format', default=None, choices=['json', 'orjson', 'msgpack'], help="Record format (default: compact JSON)")
+    args = parser.parse_args()
+    build(args.directory, args.output, args.format)
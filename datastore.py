@@ -0,0 +1,392 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from storage import JsonFile, copy_json, export_json
+from writer import writer
+
+MISSING = object()  # marks a key that did not exist when a transaction saved it
+
+class Transaction:
+    """
+    A group of changes to several documents that is kept or undone as a whole.
+
+    Before changing a top-level key, a command calls load() with it so the
+    transaction can save a copy (records are copied as records, see copy_json()). If the with block raises, every saved key
+    is restored; otherwise the keys are marked dirty together and flushed in
+    one group commit.
+    """
+    def __init__(self, store):
+        self.store = store
+        self.saved = {}  # (filename, key) -> copy of the value before the transaction, or MISSING
+
+    def load(self, filename, *keys, default=dict):
+        """
+        Returns a document and saves the current value of the keys that are about to change.
+
+        Parameters:
+            filename (str): The JSON file to load.
+            *keys: The top-level keys the transaction will add, change or remove.
+            default (callable): Factory for the document when the file does not exist.
+
+        Returns:
+            The shared parsed document.
+        """
+        document = self.store.load(filename, default)
+        for key in keys:
+            key = str(key)
+            if (filename, key) not in self.saved:
+                self.saved[(filename, key)] = copy_json(document[key]) if key in document else MISSING
+        return document
+
+    def rollback(self):
+        """
+        Restores every saved key to its value from before the transaction.
+        """
+        for (filename, key), value in self.saved.items():
+            document = self.store.documents[filename]
+            if value is MISSING:
+                document.pop(key, None)
+            else:
+                document[key] = value
+
+    def commit(self):
+        """
+        Marks every saved key dirty and asks for one flush covering all of them.
+        """
+        for filename, key in self.saved:
+            self.store.mark_dirty(filename, key)
+        self.store.request_flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+class DataStore:
+    """
+    A process-wide, in-memory store for the bot's JSON data files.
+
+    Each file is parsed once and then served from memory to every cog. Cogs
+    mutate the returned documents in place and call mark_dirty() with the
+    top-level keys they changed; dirty files are written back to disk on a
+    fixed interval, or sooner once enough keys are pending. Early flushes are
+    delayed by a short commit window so a burst of changes is written once.
+
+    While the bot is running, serializing and writing happen on a dedicated
+    worker thread so the event loop keeps serving commands and heartbeats.
+    The loop only encodes or copies the changed entries before handing them
+    off (see each backend's snapshot()).
+    """
+    def __init__(self, flush_interval=30, max_dirty_keys=500, commit_window=0.05, max_queued=4):
+        """
+        Initializes the data store.
+
+        Parameters:
+            flush_interval (float): Seconds between background flushes.
+            max_dirty_keys (int): Number of pending dirty keys that triggers an early flush.
+            commit_window (float): Seconds to gather further changes before an early flush.
+            max_queued (int): Blocking jobs allowed to queue for the worker thread before callers wait.
+        """
+        self.flush_interval = flush_interval
+        self.max_dirty_keys = max_dirty_keys
+        self.commit_window = commit_window
+        self.max_queued = max_queued
+        self.documents = {}  # filename -> parsed JSON document
+        self.backends = {}  # filename -> storage backend, JsonFile unless registered otherwise
+        self.registered = set()  # filenames given a backend with register(), i.e. the player data files
+        self.decoders = {}  # filename -> function converting a freshly read document in place
+        self.dirty = {}  # filename -> set of top-level keys changed since the last flush
+        self.flush_task = None
+        self.scheduled_flush = None  # asyncio.TimerHandle for a pending early flush
+        # A single worker keeps writes in order and the backends single-threaded
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='datastore')
+        self.slots = None  # asyncio.Semaphore bounding queued jobs, created on first use
+
+    def register(self, filename, backend):
+        """
+        Uses a custom storage backend for a file instead of a single JSON file.
+
+        Parameters:
+            filename (str): The name cogs use to load the document.
+            backend: An object with read() and write(document, keys) methods. Backends
+                may also provide snapshot(document, keys), run on the event loop to take
+                what write() needs; transaction(), a context manager held around every
+                write of a flush; and forget(keys), called when a flush fails.
+        """
+        self.backends[filename] = backend
+        self.registered.add(filename)
+
+    def register_decoder(self, filename, decoder):
+        """
+        Converts a document after it is read, e.g. to compact record objects.
+
+        Decoded documents are converted back to plain data when they are
+        flushed, so the on-disk format does not change.
+
+        Parameters:
+            filename (str): The name cogs use to load the document.
+            decoder (callable): Takes the parsed document and returns the document to serve.
+        """
+        self.decoders[filename] = decoder
+
+    def read(self, filename):
+        """
+        Reads a document from its backend and decodes it. Safe to call off the event loop.
+        """
+        document = self.backend(filename).read()
+        if filename in self.decoders:
+            document = self.decoders[filename](document)
+        return document
+
+    def backend(self, filename):
+        """
+        Returns the storage backend for a file.
+        """
+        if filename not in self.backends:
+            self.backends[filename] = JsonFile(filename)
+        return self.backends[filename]
+
+    async def run(self, func, *args):
+        """
+        Runs blocking work on the store's worker thread.
+
+        At most max_queued jobs wait for the worker at once; further callers
+        wait here, which applies back-pressure instead of queueing without bound.
+
+        Parameters:
+            func (callable): The blocking function to run.
+            *args: Arguments for the function.
+
+        Returns:
+            The function's return value.
+        """
+        if self.slots is None:
+            self.slots = asyncio.Semaphore(self.max_queued)
+        async with self.slots:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def load(self, filename, default=dict):
+        """
+        Returns the in-memory document for a file, reading it from disk on first use.
+
+        Parameters:
+            filename (str): The JSON file to load.
+            default (callable): Factory for the document when the file does not exist.
+
+        Returns:
+            The parsed document. Callers share this object, so changes must be
+            followed by mark_dirty().
+        """
+        if filename not in self.documents:
+            try:
+                self.documents[filename] = self.read(filename)
+            except FileNotFoundError:
+                self.documents[filename] = default()
+        return self.documents[filename]
+
+    async def load_async(self, filename, default=dict):
+        """
+        Like load(), but parses a file that is not in memory yet on the worker thread.
+
+        Parameters:
+            filename (str): The JSON file to load.
+            default (callable): Factory for the document when the file does not exist.
+
+        Returns:
+            The shared parsed document.
+        """
+        if filename not in self.documents:
+            try:
+                document = await self.run(self.read, filename)
+            except FileNotFoundError:
+                document = default()
+            # Another command may have loaded the file while this one waited
+            self.documents.setdefault(filename, document)
+        return self.documents[filename]
+
+    def transaction(self):
+        """
+        Starts a transaction for use in a with block.
+
+        Other commands see the changes as soon as they are made, so a block
+        that awaits should hold the locks for what it changes (see locks.py).
+
+        Returns:
+            Transaction: The new transaction.
+        """
+        return Transaction(self)
+
+    def preload(self, filenames):
+        """
+        Loads a list of files into memory up front.
+
+        Parameters:
+            filenames (list): The JSON files to load.
+        """
+        for filename in filenames:
+            self.load(filename)
+
+    def mark_dirty(self, filename, *keys):
+        """
+        Records that top-level keys of a document changed and must be written back.
+
+        Parameters:
+            filename (str): The JSON file that changed.
+            *keys: The top-level keys (usually user IDs) that were added, changed or removed.
+        """
+        self.dirty.setdefault(filename, set()).update(str(key) for key in keys)
+        if self.pending() >= self.max_dirty_keys:
+            self.request_flush()
+
+    def request_flush(self):
+        """
+        Flushes after the commit window, so changes made in the meantime share one write.
+
+        Flushes immediately when no event loop is running.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self.scheduled_flush is None:
+            self.scheduled_flush = loop.call_later(self.commit_window, lambda: loop.create_task(self.flush_async()))
+
+    def pending(self):
+        """
+        Returns the number of dirty keys waiting to be flushed.
+        """
+        return sum(len(keys) for keys in self.dirty.values())
+
+    def prepare_flush(self):
+        """
+        Takes a copy of every dirty entry and clears the dirty set.
+
+        Returns:
+            dict: filename -> (backend, snapshot, keys) for write_snapshots().
+        """
+        if self.scheduled_flush is not None:
+            self.scheduled_flush.cancel()
+            self.scheduled_flush = None
+        dirty, self.dirty = self.dirty, {}
+        prepared = {}
+        for filename, keys in dirty.items():
+            backend = self.backend(filename)
+            document = self.documents[filename]
+            if hasattr(backend, 'snapshot'):
+                snapshot = backend.snapshot(document, keys)
+            else:
+                snapshot = copy_json(document)
+            prepared[filename] = (backend, snapshot, keys)
+        return prepared
+
+    def write_snapshots(self, prepared):
+        """
+        Serializes and writes prepared snapshots in one group commit. Safe to call off the event loop.
+
+        Parameters:
+            prepared (dict): The result of prepare_flush().
+        """
+        with ExitStack() as stack:
+            # Backends sharing a database, such as SQLite, commit the whole flush as one transaction
+            for backend, snapshot, keys in prepared.values():
+                if hasattr(backend, 'transaction'):
+                    stack.enter_context(backend.transaction())
+            for backend, snapshot, keys in prepared.values():
+                backend.write(snapshot, keys)
+            writer.commit()
+
+    def restore_dirty(self, prepared):
+        """
+        Marks the keys of a failed flush dirty again so the next flush retries them.
+        """
+        for filename, (backend, snapshot, keys) in prepared.items():
+            self.dirty.setdefault(filename, set()).update(keys)
+            # Backends that write only what changed since their last write must start over for these keys
+            if hasattr(backend, 'forget'):
+                backend.forget(keys)
+
+    def flush(self):
+        """
+        Writes every dirty document back to disk on the calling thread.
+
+        Used at shutdown and when no event loop is running; the bot itself uses flush_async().
+        """
+        prepared = self.prepare_flush()
+        try:
+            self.write_snapshots(prepared)
+        except Exception:
+            self.restore_dirty(prepared)
+            raise
+
+    async def flush_async(self):
+        """
+        Writes every dirty document back to disk on the worker thread.
+        """
+        prepared = self.prepare_flush()
+        if not prepared:
+            return
+        try:
+            await self.run(self.write_snapshots, prepared)
+        except Exception:
+            self.restore_dirty(prepared)
+            raise
+
+    async def compact_async(self):
+        """
+        Compacts the storage of documents whose backend asks for it.
+
+        Backends compact from their own files on the worker thread, so
+        nothing is copied on the event loop.
+        """
+        for filename, backend in list(self.backends.items()):
+            if hasattr(backend, 'compact') and await self.run(backend.needs_compaction):
+                await self.run(backend.compact)
+
+    async def export(self, filename, path):
+        """
+        Writes a copy of a document to a file as indented JSON.
+
+        Parameters:
+            filename (str): The document to export.
+            path (str): The file to write.
+        """
+        document = copy_json(await self.load_async(filename))
+        await self.run(export_json, document, path)
+
+    def start(self):
+        """
+        Starts the background flush loop on the running event loop.
+        """
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.get_running_loop().create_task(self.flush_loop())
+
+    async def flush_loop(self):
+        """
+        Periodically flushes dirty documents until cancelled.
+        """
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush_async()
+                await self.compact_async()
+            except Exception as e:
+                print(f"Error flushing data store: {e}")
+
+    def close(self):
+        """
+        Stops the background flush loop, waits for queued writes and writes any pending changes.
+        """
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            self.flush_task = None
+        self.executor.shutdown(wait=True)
+        self.flush()
+
+# The shared store used by every cog
+store = DataStore()
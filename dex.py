@@ -0,0 +1,132 @@
+import mmap
+import os
+import struct
+import serializers
+
+# File header: magic, format version, then the offset and length of the index
+HEADER = struct.Struct('<4sIQQ')
+MAGIC = b'BDEX'
+VERSION = 1
+
+def resource_key(path):
+    """
+    Returns the snapshot key for a PokeAPI path or URL, e.g. 'pokemon/pikachu'.
+    """
+    if '/api/v2/' in path:
+        path = path.split('/api/v2/', 1)[1]
+    return path.strip('/').lower()
+
+class Pokedex:
+    """
+    A read-only snapshot of PokeAPI data, memory-mapped from one file.
+
+    The file is built offline by build_dex.py and holds trimmed PokeAPI
+    documents for every species, form, move and ability, keyed by API path
+    ('pokemon/pikachu', 'pokemon-species/25', 'move/tackle', ...). Only the
+    small index is parsed on open; documents are decoded from the mapping
+    when asked for, and because the file is mapped read-only every bot
+    process shares the same pages through the OS page cache.
+
+    Lookups return None when the file does not exist or does not hold the
+    path, so callers fall back to PokeAPI.
+    """
+    def __init__(self, path='pokedex.dex'):
+        """
+        Initializes the snapshot. The file is opened on first use.
+
+        Parameters:
+            path (str): The snapshot file written by build_dex.py.
+        """
+        self.path = path
+        self.data = None
+        self.index = None
+
+    def open(self):
+        """
+        Maps the snapshot file. Returns False if there is no usable snapshot.
+        """
+        if self.index is not None:
+            return bool(self.index)
+        self.index = {}
+        try:
+            with open(self.path, 'rb') as file:
+                # The mapping stays valid after the file object is closed
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return False
+        try:
+            magic, version, index_offset, index_length = HEADER.unpack_from(data, 0)
+        except struct.error:
+            magic = version = None
+        if magic != MAGIC or version != VERSION:
+            print(f"Ignoring {self.path}: not a version {VERSION} Pokédex snapshot.")
+            data.close()
+            return False
+        self.data = data
+        self.index = serializers.loads(data[index_offset:index_offset + index_length])
+        return True
+
+    def get(self, path):
+        """
+        Returns the snapshot document for a PokeAPI path or URL.
+
+        Parameters:
+            path (str): An API path such as 'move/tackle', or an absolute PokeAPI URL.
+
+        Returns:
+            dict: The trimmed PokeAPI document, or None if the snapshot does not hold it.
+        """
+        if not self.open():
+            return None
+        location = self.index.get(resource_key(path))
+        if location is None:
+            return None
+        offset, length = location
+        return serializers.loads(self.data[offset:offset + length])
+
+    def __contains__(self, path):
+        return self.open() and resource_key(path) in self.index
+
+    def __len__(self):
+        return len(self.index) if self.open() else 0
+
+    def close(self):
+        if self.data is not None:
+            self.data.close()
+        self.data = None
+        self.index = None
+
+def write_snapshot(path, documents, serializer=None):
+    """
+    Writes a snapshot file.
+
+    Parameters:
+        path (str): The file to write.
+        documents (dict): API path -> document. Several paths may share one document object, which is stored once.
+        serializer (str, optional): The record format; compact JSON by default.
+    """
+    serializer = serializers.get_serializer(serializer)
+    index = {}
+    stored = {}  # id(document) -> location, so aliases point at one record
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+        for key, document in documents.items():
+            location = stored.get(id(document))
+            if location is None:
+                data = serializer.dumps(document)
+                location = stored[id(document)] = [file.tell(), len(data)]
+                file.write(data)
+            index[resource_key(key)] = location
+        index_offset = file.tell()
+        # The index is always JSON so serializers.loads can sniff it regardless of the record format
+        index_data = serializers.SERIALIZERS['json'].dumps(index)
+        file.write(index_data)
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, index_offset, len(index_data)))
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+# The shared Pokédex snapshot used by every cog
+dex = Pokedex()
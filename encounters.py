@@ -0,0 +1,162 @@
+import json
+import os
+import random
+import time
+
+class AliasSampler:
+    """
+    Draws items with fixed weights in constant time (Vose's alias method).
+
+    The table is built once in O(n). Each draw then takes one random number
+    and at most one table lookup, however many species the table holds.
+    """
+    def __init__(self, items, weights):
+        """
+        Builds the alias table.
+
+        Parameters:
+            items (list): The items to draw.
+            weights (list): A non-negative weight per item. They do not need to sum to 1.
+        """
+        total = sum(weights)
+        if not items or total <= 0:
+            raise ValueError("An alias sampler needs at least one item with a positive weight.")
+        count = len(items)
+        self.items = list(items)
+        self.probabilities = [0.0] * count
+        self.aliases = list(range(count))
+
+        scaled = [weight * count / total for weight in weights]
+        small = [index for index, value in enumerate(scaled) if value < 1.0]
+        large = [index for index, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            self.probabilities[less] = scaled[less]
+            self.aliases[less] = more
+            # The large item gives up the share it lends to fill the small item's column
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # Whatever is left is 1 up to rounding error
+        for index in small + large:
+            self.probabilities[index] = 1.0
+
+    def sample(self, rng=random):
+        """
+        Draws one item.
+
+        Parameters:
+            rng: A random.Random-like object. Defaults to the random module.
+        """
+        # One uniform number picks both the column and the coin flip within it
+        position = rng.random() * len(self.items)
+        column = int(position)
+        if position - column < self.probabilities[column]:
+            return self.items[column]
+        return self.items[self.aliases[column]]
+
+    def sample_many(self, count, rng=random):
+        """
+        Draws count items independently.
+        """
+        return [self.sample(rng) for _ in range(count)]
+
+class EncounterTables:
+    """
+    The safari encounter tables, compiled into one alias sampler per location and level.
+
+    encounter_rates.json is read once and compiled up front, so a roll no
+    longer sums and normalizes the rates or builds lists. The file's
+    modification time is checked at most every check_interval seconds, and
+    the tables are recompiled when it changes, so rates can be edited while
+    the bot runs.
+    """
+    def __init__(self, path='encounter_rates.json', check_interval=5.0):
+        """
+        Initializes and compiles the tables.
+
+        Parameters:
+            path (str): The encounter rates file.
+            check_interval (float): Seconds between checks for changes to the file.
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.rates = {}  # location -> level (str) -> {species: rate}, as in the file
+        self.samplers = {}  # (location, level) -> AliasSampler
+        self.mtime = None
+        self.checked = 0.0
+        self.reload()
+
+    def reload(self):
+        """
+        Reads encounter_rates.json and recompiles every table. Keeps the old tables if the file is broken.
+        """
+        try:
+            self.mtime = os.path.getmtime(self.path)
+            with open(self.path, 'r') as file:
+                rates = json.load(file)
+        except FileNotFoundError:
+            self.mtime = None
+            rates = {}
+        except ValueError as e:
+            print(f"Error reading {self.path}, keeping the previous encounter tables: {e}")
+            return
+
+        samplers = {}
+        for location, levels in rates.items():
+            for level, table in levels.items():
+                try:
+                    samplers[(location, str(level))] = AliasSampler(list(table), list(table.values()))
+                except ValueError:
+                    print(f"Skipping the empty encounter table for {location} level {level}.")
+        self.rates = rates
+        self.samplers = samplers
+
+    def refresh(self):
+        """
+        Recompiles the tables if encounter_rates.json changed since it was last read.
+        """
+        now = time.monotonic()
+        if now - self.checked < self.check_interval:
+            return
+        self.checked = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self.mtime:
+            self.reload()
+
+    def locations(self):
+        return list(self.rates)
+
+    def levels(self, location):
+        return list(self.rates.get(location, {}))
+
+    def draw(self, location, level, rng=random):
+        """
+        Rolls one encounter.
+
+        Returns:
+            str: The species encountered, or None if there is no table for the location and level.
+        """
+        self.refresh()
+        sampler = self.samplers.get((location, str(level)))
+        return sampler.sample(rng) if sampler is not None else None
+
+    def draw_many(self, rolls, rng=random):
+        """
+        Rolls many encounters at once, e.g. one per user on an expedition.
+
+        Parameters:
+            rolls (list): (location, level) pairs.
+
+        Returns:
+            list: The species encountered for each pair, in order; None where there is no table.
+        """
+        self.refresh()
+        samplers = self.samplers
+        results = []
+        for location, level in rolls:
+            sampler = samplers.get((location, str(level)))
+            results.append(sampler.sample(rng) if sampler is not None else None)
+        return results
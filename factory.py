@@ -0,0 +1,165 @@
+from datastore import store
+from records import PokemonRecord
+from species import species, choose_ability
+from rolls import StatRoller, IV_KEYS
+
+natlist = ['Lonely', 'Brave', 'Adamant', 'Naughty', 'Bold', 'Relaxed', 'Impish', 'Lax', 'Timid', 'Hasty', 'Jolly', 'Naive', 'Modest', 'Mild', 'Quiet', 'Rash', 'Calm', 'Gentle', 'Sassy', 'Careful', 'Bashful', 'Quirky', 'Serious', 'Docile', 'Hardy']
+
+class PokemonFactory:
+    """
+    Creates Pokémon and adds them to trainers' collections.
+
+    Every way of getting a Pokémon (redeems, safari encounters, raid rewards
+    and market purchases) goes through here. A batch of one species costs a
+    single species lookup, and all of its Pokémon are added to the
+    collection together and marked dirty once, so redeeming ten Pokémon
+    writes the collection once instead of ten times. Levels, IVs, natures,
+    genders and shiny flags for a batch are rolled together by a
+    StatRoller, vectorized when NumPy is installed.
+    """
+    def __init__(self, seed=None):
+        """
+        Initializes the factory.
+
+        Parameters:
+            seed (int, optional): Seed for the stat rolls, for reproducible runs.
+        """
+        self.roller = StatRoller(seed)
+
+    async def create(self, user_id, pokemon_name, count=1, **options):
+        """
+        Generates Pokémon of one species without adding them to a collection.
+
+        The species is looked up before anything is added, so callers can
+        await this first and then add the result without awaiting in between.
+
+        Parameters:
+            user_id (str): The trainer who will own the Pokémon.
+            pokemon_name (str): The species.
+            count (int): How many Pokémon to generate.
+            **options: Passed to build().
+
+        Returns:
+            list: The new Pokémon as dicts, without IDs.
+        """
+        # Species data is served from the local cache; PokeAPI is only asked the first time a species is seen
+        entry = await species.get(pokemon_name)
+        return self.build(user_id, pokemon_name, entry, count, **options)
+
+    def build(self, user_id, pokemon_name, entry, count=1, level_range=(1, 30), hidden_ability_probability=0.33, shiny_rate=0.0, name=None):
+        """
+        Generates Pokémon from species data that has already been looked up.
+
+        Parameters:
+            user_id (str): The trainer who will own the Pokémon.
+            pokemon_name (str): The species.
+            entry (dict): The species cache entry, or None if the species is unknown.
+            count (int): How many Pokémon to generate.
+            level_range (tuple): The lowest and highest level, inclusive.
+            hidden_ability_probability (float): The chance of a hidden ability when the species has one.
+            shiny_rate (float): The chance of each Pokémon being shiny.
+            name (str, optional): The display name stored on the Pokémon. Defaults to pokemon_name.
+
+        Returns:
+            list: The new Pokémon as dicts, without IDs.
+        """
+        if entry is not None:
+            abilities = entry['abilities']
+            base_experience = entry['base_experience']
+            gender_rate = entry['gender_rate']
+            image_url = entry['image_url']
+        else:
+            abilities = []
+            base_experience = 0
+            gender_rate = -1
+            image_url = None
+
+        rolls = self.roller.roll(count, level_range, gender_rate, len(natlist), shiny_rate)
+        pokemons = []
+        for index in range(count):
+            level = rolls.levels[index]
+            pokemon = {
+                "id": None,
+                "ownerid": user_id,
+                "OT": user_id,
+                "name": name or pokemon_name,
+                "gender": rolls.genders[index],
+                "ability": choose_ability(abilities, hidden_ability_probability, self.roller),
+                "nickname": "",
+                "friendship": 0,
+                "favorite": False,
+                "level": level,
+                "exp": base_experience,
+                "expcap": level ** 3,
+                "nature": natlist[rolls.natures[index]],
+                # IVs are filled in from the batch rolls below
+                "hpiv": 0,
+                "atkiv": 0,
+                "defiv": 0,
+                "spatkiv": 0,
+                "spdiv": 0,
+                "speiv": 0,
+                "hpev": 0,
+                "atkev": 0,
+                "defev": 0,
+                "spatkev": 0,
+                "spdefev": 0,
+                "speedev": 0,
+                "move 1": "tackle",
+                "move 2": "tackle",
+                "move 3": "tackle",
+                "move 4": "tackle",
+                "image_url": image_url,
+                "selected": False,
+                "helditem": "",
+                "is_shiny": rolls.shiny[index]
+            }
+            pokemon.update(zip(IV_KEYS, rolls.ivs[index]))
+            pokemons.append(pokemon)
+        return pokemons
+
+    def add(self, user_id, pokemons):
+        """
+        Adds Pokémon to a trainer's collection in one batch.
+
+        Each Pokémon gets the next free ID in the collection, and the
+        collection is marked dirty once for the whole batch.
+
+        Parameters:
+            user_id (str): The trainer.
+            pokemons (list): Pokémon dicts. Their IDs are overwritten.
+
+        Returns:
+            list: The stored Pokémon records.
+        """
+        collections = store.load('collections.json')
+
+        # Get the user's collection or create an empty list if it doesn't exist
+        user_collection = collections.setdefault(str(user_id), [])
+
+        records = []
+        for pokemon in pokemons:
+            # IDs start from 1 and increment by 1
+            pokemon['id'] = len(user_collection) + 1
+            record = PokemonRecord.from_dict(pokemon)
+            user_collection.append(record)
+            records.append(record)
+
+        # Mark the user's collection for writing back to disk
+        store.mark_dirty('collections.json', user_id)
+        return records
+
+    async def generate(self, user_id, pokemon_name, count=1, **options):
+        """
+        Generates Pokémon of one species and adds them to a trainer's collection.
+
+        Takes the same options as create().
+
+        Returns:
+            list: The stored Pokémon records.
+        """
+        pokemons = await self.create(user_id, pokemon_name, count, **options)
+        return self.add(user_id, pokemons)
+
+# The shared Pokémon factory used by every cog
+factory = PokemonFactory()
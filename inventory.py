@@ -1,16 +1,12 @@
-import json
 import discord
 from discord.ext import commands
+from datastore import store
+from locks import locks, user_lock
 
 def has_started():
     async def predicate(ctx):
         user_id = str(ctx.author.id)
-        try:
-            with open('user_data.json', 'r') as file:
-                user_data = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("Error: User data not found.")
-            return False
+        user_data = store.load('user_data.json')
         
         # Check if the user has started by looking for their ID in the user_data
         if user_id in user_data and user_data[user_id]['started']:
@@ -47,12 +43,7 @@ class Inventory(commands.Cog):
         """
         user_id = str(ctx.author.id)
 
-        try:
-            with open('user_data.json', 'r') as file:
-                user_data = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("User data not found.")
-            return
+        user_data = store.load('user_data.json')
 
         user_inventory = user_data.get(user_id, {}).get('inventory', {})
         if not user_inventory:
@@ -82,11 +73,9 @@ class Inventory(commands.Cog):
             item (str): The name of the item to buy.
             quantity (int): The quantity of the item to buy.
         """
-        # Load shop items from shop_items.json
-        try:
-            with open('shop_items.json', 'r') as file:
-                shop_items = json.load(file)
-        except FileNotFoundError:
+        # Load shop items from shop_items.json; parsed once, off the event loop
+        shop_items = await store.load_async('shop_items.json')
+        if not shop_items:
             await ctx.send("Error: Shop items not found.")
             return
 
@@ -95,61 +84,54 @@ class Inventory(commands.Cog):
             await ctx.send(f"Error: {item} is not available in the shop.")
             return
 
-        # Check if the user has enough tokens to buy the item
-        user_id = str(ctx.author.id)
-        user_data = self.load_user_data()
-        if 'tokens' not in user_data[user_id]:
-            await ctx.send("Error: You don't have enough tokens to buy this item.")
-            return
+        async with locks.acquire(user_lock(ctx.author.id)):
+            # Check if the user has enough tokens to buy the item
+            user_id = str(ctx.author.id)
+            user_data = self.load_user_data()
+            if 'tokens' not in user_data[user_id]:
+                await ctx.send("Error: You don't have enough tokens to buy this item.")
+                return
 
-        item_price = shop_items[item]['price']
-        total_cost = item_price * quantity
-        if user_data[user_id]['tokens'] < total_cost:
-            await ctx.send("Error: You don't have enough tokens to buy this quantity of the item.")
-            return
+            item_price = shop_items[item]['price']
+            total_cost = item_price * quantity
+            if user_data[user_id]['tokens'] < total_cost:
+                await ctx.send("Error: You don't have enough tokens to buy this quantity of the item.")
+                return
 
-        # Subtract the total cost from the user's tokens
-        user_data[user_id]['tokens'] -= total_cost
+            # Subtract the total cost from the user's tokens
+            user_data[user_id]['tokens'] -= total_cost
 
-        # Add the item to the user's inventory with the specified quantity
-        if 'inventory' not in user_data[user_id]:
-            user_data[user_id]['inventory'] = {}
+            # Add the item to the user's inventory with the specified quantity
+            if 'inventory' not in user_data[user_id]:
+                user_data[user_id]['inventory'] = {}
 
-        if item in user_data[user_id]['inventory']:
-            user_data[user_id]['inventory'][item] += quantity
-        else:
-            user_data[user_id]['inventory'][item] = quantity
+            if item in user_data[user_id]['inventory']:
+                user_data[user_id]['inventory'][item] += quantity
+            else:
+                user_data[user_id]['inventory'][item] = quantity
 
-        # Save the updated user data
-        self.save_user_data(user_data)
+            # Save the updated user data
+            self.save_user_data(user_id)
 
         await ctx.send(f"Successfully bought {quantity} {item}(s) for {total_cost} tokens.")
 
     def load_user_data(self):
         """
-        Loads user data from the user_data.json file.
-
-        If the file is not found, it returns an empty dictionary.
+        Loads user data from the data store.
 
         Returns:
-            dict: The user data loaded from the file or an empty dictionary if the
-                file is not found.
+            dict: The shared user data loaded from user_data.json.
         """
-        try:
-            with open('user_data.json', 'r') as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return {}
+        return store.load('user_data.json')
 
-    def save_user_data(self, user_data):
+    def save_user_data(self, user_id):
         """
-        Saves user data to the user_data.json file.
+        Marks a user's profile for saving to the user_data.json file.
 
         Parameters:
-            user_data (dict): The user data to be saved.
+            user_id (str): The Discord ID of the user whose profile changed.
         """
-        with open('user_data.json', 'w') as file:
-            json.dump(user_data, file, indent=4)
+        store.mark_dirty('user_data.json', user_id)
 
 async def setup(bot):
     await bot.add_cog(Inventory(bot))
@@ -0,0 +1,168 @@
+import asyncio
+from pokeapi import pokeapi
+from singleflight import SingleFlight
+
+# Order learn methods are listed in; anything else sorts after these
+METHOD_ORDER = ['level-up', 'machine', 'tutor', 'egg']
+
+# Types a filter can name; anything else is never looked up
+TYPE_NAMES = {
+    'normal', 'fire', 'water', 'electric', 'grass', 'ice', 'fighting', 'poison', 'ground',
+    'flying', 'psychic', 'bug', 'rock', 'ghost', 'dragon', 'dark', 'steel', 'fairy',
+}
+
+TYPE_LOOKUP_LIMIT = 8  # /move lookups a type filter runs at once
+
+def method_rank(method):
+    """
+    Returns the display position of a learn method.
+    """
+    return METHOD_ORDER.index(method) if method in METHOD_ORDER else len(METHOD_ORDER)
+
+class Learnset:
+    """
+    The moves one species can learn, indexed for the learn and moveset commands.
+
+    moves maps each move name to {learn method: level}, so checking a move
+    is a dict lookup. entries is the same data as a list sorted by learn
+    method and level, ready to paginate. Move types are only looked up when
+    a filter names a type, and are shared by every species that learns the
+    move.
+    """
+    def __init__(self, name, moves, move_types=None):
+        """
+        Initializes the learnset.
+
+        Parameters:
+            name (str): The species name.
+            moves (dict): Move name -> {learn method: level learned at}.
+            move_types (dict, optional): Move name -> type name, shared between learnsets and filled by load_types().
+        """
+        self.name = name
+        self.moves = moves
+        self.move_types = move_types if move_types is not None else {}
+        self.entries = sorted(
+            ({"name": move, "methods": methods} for move, methods in moves.items()),
+            key=lambda entry: (min(map(method_rank, entry['methods']), default=len(METHOD_ORDER)), entry['methods'].get('level-up', 0), entry['name'])
+        )
+        self.filtered = {}  # filter -> entries matching it
+
+    @classmethod
+    def from_pokemon(cls, data, move_types=None):
+        """
+        Builds a learnset from a /pokemon document.
+
+        A move learned by level-up in several games keeps the lowest level.
+        """
+        moves = {}
+        for entry in data['moves']:
+            methods = moves.setdefault(entry['move']['name'], {})
+            for detail in entry.get('version_group_details', []):
+                method = detail['move_learn_method']['name']
+                level = detail['level_learned_at']
+                if method not in methods or level < methods[method]:
+                    methods[method] = level
+        return cls(data['name'], moves, move_types)
+
+    def can_learn(self, move_name):
+        """
+        Returns True if the species can learn a move, e.g. 'thunder-shock'.
+        """
+        return move_name.lower() in self.moves
+
+    def describe(self, entry):
+        """
+        Returns how a move is learned, e.g. "Level 1, Machine, Type: Electric", for the moveset command.
+        The type is only shown once it has been looked up.
+
+        Parameters:
+            entry (dict): One of the learnset's entries.
+        """
+        methods = []
+        for method in sorted(entry['methods'], key=method_rank):
+            if method == 'level-up':
+                methods.append(f"Level {entry['methods'][method]}")
+            else:
+                methods.append(method.replace('-', ' ').capitalize())
+        type_name = self.move_types.get(entry['name'])
+        if type_name:
+            methods.append(f"Type: {type_name.capitalize()}")
+        return ", ".join(methods) or "Unknown"
+
+    async def load_types(self):
+        """
+        Looks up the type of every move whose type is not known yet, TYPE_LOOKUP_LIMIT
+        moves at a time. Served from the Pokédex snapshot and response cache when possible.
+        """
+        missing = [name for name in self.moves if name not in self.move_types]
+        for start in range(0, len(missing), TYPE_LOOKUP_LIMIT):
+            batch = missing[start:start + TYPE_LOOKUP_LIMIT]
+            documents = await asyncio.gather(*(pokeapi.get(f"move/{name}") for name in batch))
+            for name, document in zip(batch, documents):
+                if document is not None:
+                    self.move_types[name] = document['type']['name']
+
+    async def filter(self, value=None):
+        """
+        Returns the entries matching a learn method ('level-up', 'machine', 'tutor', 'egg'),
+        a move type ('fire') or a move name ('thunder-shock').
+
+        Move types are only looked up for a type filter; methods and move names
+        are answered from the learnset itself, and anything else matches nothing.
+
+        Parameters:
+            value (str, optional): The learn method, type or move. All entries when None.
+
+        Returns:
+            list: The matching entries, in display order.
+        """
+        if not value:
+            return self.entries
+        value = value.lower()
+        if value in self.filtered:
+            return self.filtered[value]
+        if value in METHOD_ORDER or any(value in entry['methods'] for entry in self.entries):
+            self.filtered[value] = [entry for entry in self.entries if value in entry['methods']]
+        elif value in TYPE_NAMES:
+            await self.load_types()
+            self.filtered[value] = [entry for entry in self.entries if self.move_types.get(entry['name']) == value]
+        else:
+            # Not kept in filtered, so arbitrary input does not grow it
+            move = value.replace(' ', '-')
+            return [entry for entry in self.entries if entry['name'] == move]
+        return self.filtered[value]
+
+class LearnsetIndex:
+    """
+    Learnsets built once per species and reused by every learn and moveset call.
+    """
+    def __init__(self):
+        self.learnsets = {}  # species name -> Learnset
+        self.builds = SingleFlight()  # species name -> the build already in flight
+        self.move_types = {}  # move name -> type name, shared by every learnset
+
+    async def get(self, name):
+        """
+        Returns the learnset for a species.
+
+        Returns:
+            Learnset: The learnset, or None if PokeAPI does not know the species.
+
+        Raises:
+            PokeApiError: If PokeAPI cannot be reached.
+        """
+        key = name.lower()
+        learnset = self.learnsets.get(key)
+        if learnset is None:
+            learnset = await self.builds.run(key, self.build, key)
+        return learnset
+
+    async def build(self, key):
+        data = await pokeapi.get(f"pokemon/{key}")
+        if data is None:
+            return None
+        learnset = self.learnsets[key] = Learnset.from_pokemon(data, self.move_types)
+        return learnset
+
+# The shared learnset index used by every cog
+learnsets = LearnsetIndex()
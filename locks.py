@@ -0,0 +1,67 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+def user_lock(user_id):
+    """
+    Returns the lock key guarding a user's balances, inventory and collection.
+    """
+    return ('user', str(user_id))
+
+def listing_lock(listing_id):
+    """
+    Returns the lock key guarding a market listing.
+    """
+    return ('listing', str(listing_id))
+
+class LockManager:
+    """
+    Hands out asyncio locks keyed by what a command modifies.
+
+    Commands that read data, await something and then write it back hold the
+    locks for the users (and listings) they touch, so only commands on the
+    same user or listing wait for each other. Locks are always taken in
+    sorted key order, so two commands locking the same pair of users from
+    opposite ends cannot deadlock. A lock is dropped once nobody holds or
+    waits for it, so the table only holds keys that are in use.
+    """
+    def __init__(self):
+        self.locks = {}  # key -> asyncio.Lock
+        self.users = {}  # key -> number of tasks holding or waiting for the lock
+
+    @asynccontextmanager
+    async def acquire(self, *keys):
+        """
+        Holds the locks for every key for the duration of an async with block.
+
+        Parameters:
+            *keys: Lock keys such as user_lock(user_id) or listing_lock(listing_id). Duplicates are ignored.
+        """
+        keys = sorted(set(keys))
+        for key in keys:
+            if key not in self.locks:
+                self.locks[key] = asyncio.Lock()
+            self.users[key] = self.users.get(key, 0) + 1
+
+        acquired = []
+        try:
+            for key in keys:
+                await self.locks[key].acquire()
+                acquired.append(key)
+            yield
+        finally:
+            for key in reversed(acquired):
+                self.locks[key].release()
+            for key in keys:
+                self.users[key] -= 1
+                if not self.users[key]:
+                    del self.users[key]
+                    del self.locks[key]
+
+    def locked(self, key):
+        """
+        Returns True if a command currently holds the lock for a key.
+        """
+        return key in self.locks and self.locks[key].locked()
+
+# The shared lock manager used by every cog
+locks = LockManager()
@@ -1,18 +1,91 @@
 import discord
 from discord.ext import commands
+from datastore import store
+from storage import JsonFile, ShardedJson, JournaledJson
+from sqlite_storage import SqliteDatabase, register_sqlite
+from records import decode_collections
+from writer import writer
+from pokeapi import pokeapi
+from dex import dex
+from notifications import notifications
+
+class BlossomBot(commands.Bot):
+    async def close(self):
+        # Close the pooled PokeAPI connections and stop the DM queue while the event loop is still running
+        await pokeapi.close()
+        await notifications.close()
+        await super().close()
 
 intents = discord.Intents.default()
 intents.members = True
 intents.message_content = True
-bot = commands.Bot(command_prefix=';', intents=intents)
+bot = BlossomBot(command_prefix=';', intents=intents)
 
 cogs = ['trivia', 'users', 'safari', 'battle', 'raids', 'pokemon', 'inventory', 'admin']
+
+# Finish any multi-file commit a crash interrupted before reading the data
+writer.recover()
+
+# Storage backend for player data: 'json', 'sharded', 'journal' or 'sqlite'.
+# Run `python migrate.py` once before switching to 'sqlite'.
+STORAGE_BACKEND = 'sharded'
+
+# On-disk format per player data file: 'json', 'json-indent', 'orjson' or 'msgpack'.
+# Files not listed use compact JSON (orjson when installed). Existing files are
+# read in whatever format they are in and converted on the next flush; use the
+# ;export command for an indented copy. For example: {'collections.json': 'msgpack'}
+FILE_FORMATS = {}
+
+# PokeAPI root used for every species, move and ability lookup. Point it at
+# `python pokeapi_server.py <dir>` (http://127.0.0.1:8089/api/v2) to run offline.
+pokeapi.base_url = "https://pokeapi.co/api/v2"
+
+# Offline Pokédex snapshot built with `python build_dex.py <PokeAPI dump dir>`.
+# Species, forms, moves and abilities it holds are read from it instead of
+# the network; anything missing (or no file at all) falls back to PokeAPI.
+dex.path = 'pokedex.dex'
+pokeapi.snapshot = dex
+
+PLAYER_FILES = ['user_data.json', 'collections.json', 'teams.json', 'inventory.json', 'market.json', 'expedition_levels.json', 'expeditions.json', 'user_scores.json']
+
+if STORAGE_BACKEND == 'sqlite':
+    register_sqlite(store, SqliteDatabase('blossom.db'))
+elif STORAGE_BACKEND == 'sharded':
+    # Keep each trainer's collection in a hash-bucket shard so a catch only rewrites that shard
+    store.register('collections.json', ShardedJson('collection_shards', legacy_file='collections.json', serializer=FILE_FORMATS.get('collections.json')))
+elif STORAGE_BACKEND == 'journal':
+    # Append changes to a journal and fold them into the snapshot in the background
+    for filename in ['collections.json', 'user_data.json', 'market.json']:
+        store.register(filename, JournaledJson(filename, serializer=FILE_FORMATS.get(filename)))
+
+# Every other player file is kept as a single file in its configured format
+for filename in PLAYER_FILES:
+    if filename not in store.backends:
+        store.register(filename, JsonFile(filename, serializer=FILE_FORMATS.get(filename)))
+
+# Hold caught Pokémon as compact records instead of 35-key dicts
+store.register_decoder('collections.json', decode_collections)
+
+# Load the player data once so every cog is served from memory
+store.preload(PLAYER_FILES)
+# Species data fetched from PokeAPI so far, used instead of the network on every catch
+store.preload(['species_cache.json'])
+
+@bot.before_invoke
+async def catch_up_expedition(ctx):
+    # Award any passive expedition encounters the user earned since their last command
+    safari = bot.get_cog('Safari')
+    if safari is not None:
+        await safari.catch_up(ctx.author.id)
+
 @bot.event
 async def on_ready():
     print(f'Logged in as {bot.user}')
     print(f'I am currently in {len(bot.guilds)} servers.')
     game = discord.Game("In Development")
     await bot.change_presence(activity=game)
+    store.start()
+    notifications.start(bot)
     for cog in cogs:
         try:
             await bot.load_extension(cog)
@@ -21,3 +94,7 @@ async def on_ready():
             print(f'Failed to load cog "{cog}": {e}')
 
 bot.run("token")
+
+# Write any changes still pending in the data store before exiting
+store.close()
+
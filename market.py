@@ -1,20 +1,17 @@
-import json
 import discord
 import math
 import asyncio
 from datetime import datetime
-import requests
 from discord.ext import commands
+from datastore import store
+from factory import factory
+from species import species
+from locks import locks, listing_lock, user_lock
 
 def has_started():
     async def predicate(ctx):
         user_id = str(ctx.author.id)
-        try:
-            with open('user_data.json', 'r') as file:
-                user_data = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("Error: User data not found.")
-            return False
+        user_data = store.load('user_data.json')
         
         # Check if the user has started by looking for their ID in the user_data
         if user_id in user_data:
@@ -39,8 +36,7 @@ class Market(commands.Cog):
     @commands.command(aliases=['mshow'])
     async def market(self, ctx, page: int = 1):
         # Load market data
-        with open('market.json', 'r') as file:
-            market_data = json.load(file)
+        market_data = store.load('market.json')
 
         # Calculate total pages
         total_pages = math.ceil(len(market_data['pokemon']) / 10)
@@ -108,8 +104,7 @@ class Market(commands.Cog):
     @commands.command(aliases=['mremove'])
     async def marketremove(self, ctx, pokemon_id: int):
         # Load market data
-        with open('market.json', 'r') as file:
-            market_data = json.load(file)
+        market_data = store.load('market.json')
 
         # Find the pokemon in the market by ID
         found_pokemon = None
@@ -128,20 +123,24 @@ class Market(commands.Cog):
             await ctx.send("You don't own this Pokémon.")
             return
 
-        # Remove the pokemon from the market
-        market_data['pokemon'].remove(found_pokemon)
+        async with locks.acquire(listing_lock(pokemon_id)):
+            # The listing may have been bought while waiting for the lock
+            if not any(pokemon is found_pokemon for pokemon in market_data['pokemon']):
+                await ctx.send("Pokemon not found in the market.")
+                return
 
-        # Save the updated data back to market.json
-        with open('market.json', 'w') as file:
-            json.dump(market_data, file, indent=4)
+            # Remove the pokemon from the market
+            market_data['pokemon'].remove(found_pokemon)
+
+            # Mark the market listings for writing back to market.json
+            store.mark_dirty('market.json', 'pokemon')
 
         await ctx.send(f"{found_pokemon['name']} has been removed from the market.")
     @has_started()
     @commands.command(aliases=['mbuy'])
     async def marketbuy(self, ctx, pokemon_id: int):
         # Load market data
-        with open('market.json', 'r') as file:
-            market_data = json.load(file)
+        market_data = store.load('market.json')
 
         # Find the pokemon in the market by ID
         found_pokemon = None
@@ -157,53 +156,55 @@ class Market(commands.Cog):
         # Get the buyer's user ID
         buyer_id = str(ctx.author.id)
 
-        # Load user data
-        with open('user_data.json', 'r') as file:
-            user_data = json.load(file)
+        # Lock the listing, the buyer and the seller so concurrent buyers cannot both get the Pokémon
+        async with locks.acquire(listing_lock(pokemon_id), user_lock(buyer_id), user_lock(found_pokemon['OT'])):
+            # The listing may have been bought or removed while waiting for the locks
+            if not any(pokemon is found_pokemon for pokemon in market_data['pokemon']):
+                await ctx.send("Pokemon not found in the market.")
+                return
 
-        # Check if the buyer has enough tokens to buy the pokemon
-        if user_data[buyer_id]['tokens'] < found_pokemon['price']:
-            await ctx.send("You don't have enough tokens to buy this pokemon.")
-            return
+            # Load user data
+            user_data = store.load('user_data.json')
 
-        # Check if the owner of the pokemon is not the buyer
-        if found_pokemon['ownerid'] == buyer_id:
-            await ctx.send("You cannot buy your own Pokémon.")
-            return
+            # Check if the buyer has enough tokens to buy the pokemon
+            if user_data[buyer_id]['tokens'] < found_pokemon['price']:
+                await ctx.send("You don't have enough tokens to buy this pokemon.")
+                return
 
-        # Remove the bought pokemon from market
-        market_data['pokemon'].remove(found_pokemon)
+            # Check if the owner of the pokemon is not the buyer
+            if found_pokemon['ownerid'] == buyer_id:
+                await ctx.send("You cannot buy your own Pokémon.")
+                return
 
-        # Update buyer's tokens and save the updated user data
-        user_data[buyer_id]['tokens'] -= found_pokemon['price']
-        with open('user_data.json', 'w') as file:
-            json.dump(user_data, file, indent=4)
+            # Apply the whole purchase as one transaction: if any step fails nothing changes,
+            # and the listing, both balances and both collections are written in one commit
+            ot_id = found_pokemon['OT']
+            with store.transaction() as transaction:
+                transaction.load('market.json', 'pokemon')
+                transaction.load('user_data.json', buyer_id, ot_id)
+                transaction.load('collections.json', buyer_id, ot_id)
 
-        # Update the original trainer's tokens and save the updated user data
-        ot_id = found_pokemon['OT']
-        user_data[ot_id]['tokens'] += found_pokemon['price']
-        with open('user_data.json', 'w') as file:
-            json.dump(user_data, file, indent=4)
+                # Remove the bought pokemon from market
+                market_data['pokemon'].remove(found_pokemon)
 
-        # Remove the bought pokemon from the original trainer's collection
-        self.remove_pokemon_from_collection(ot_id, found_pokemon['id'])
+                # Move the tokens from the buyer to the original trainer
+                user_data[buyer_id]['tokens'] -= found_pokemon['price']
+                user_data[ot_id]['tokens'] += found_pokemon['price']
 
-        # Update the ownerid to the buyer's id
-        found_pokemon['ownerid'] = buyer_id
+                # Remove the bought pokemon from the original trainer's collection
+                self.remove_pokemon_from_collection(ot_id, found_pokemon['id'])
 
-        # Add the bought pokemon to the buyer's collection with a unique ID
-        self.save_pokemon_to_collection(buyer_id, found_pokemon)
+                # Update the ownerid to the buyer's id
+                found_pokemon['ownerid'] = buyer_id
 
-        # Save the updated data back to market.json
-        with open('market.json', 'w') as file:
-            json.dump(market_data, file, indent=4)
+                # Add the bought pokemon to the buyer's collection with a unique ID
+                factory.add(buyer_id, [found_pokemon])
 
         await ctx.send(f"Congratulations! You've successfully bought {found_pokemon['name']}.")
 
     def remove_pokemon_from_collection(self, user_id, pokemon_id):
         # Load collections data
-        with open('collections.json', 'r') as file:
-            collections_data = json.load(file)
+        collections_data = store.load('collections.json')
 
         # Find the user's collection
         user_collection = collections_data.get(str(user_id), [])
@@ -226,43 +227,14 @@ class Market(commands.Cog):
         # Update the collections data
         collections_data[str(user_id)] = user_collection
 
-        # Save the updated collections data back to collections.json
-        with open('collections.json', 'w') as file:
-            json.dump(collections_data, file, indent=4)
-
-    def save_pokemon_to_collection(self, user_id, pokemon_object):
-        # Load the existing collections from the file
-        try:
-            with open('collections.json', 'r') as file:
-                collections = json.load(file)
-        except FileNotFoundError:
-            collections = {}
-
-        # Get the user's collection or create an empty list if it doesn't exist
-        user_collection = collections.get(str(user_id), [])
-
-        # Generate a unique ID for the new Pokémon
-        pokemon_id = len(user_collection) + 1
-
-        # Update the ID of the pokemon_object
-        pokemon_object['id'] = pokemon_id
-
-        # Append the Pokémon object to the user's collection
-        user_collection.append(pokemon_object)
-
-        # Update the collections dictionary with the modified user collection
-        collections[str(user_id)] = user_collection
-
-        # Save the updated collections back to the file
-        with open('collections.json', 'w') as file:
-            json.dump(collections, file, indent=4)
+        # Mark the user's collection for writing back to collections.json
+        store.mark_dirty('collections.json', user_id)
 
     @has_started()
     @commands.command(aliases=['madd'])
     async def market_add(self, ctx, pokemon_id: int, price: int):
         # Load user's collection
-        with open('collections.json', 'r') as file:
-            collections_data = json.load(file)
+        collections_data = store.load('collections.json')
 
         # Check if the invoker's ID is in the collections data
         user_id = str(ctx.author.id)
@@ -283,8 +255,7 @@ class Market(commands.Cog):
             return
 
         # Add the Pokemon details to the market
-        with open('market.json', 'r') as file:
-            market_data = json.load(file)
+        market_data = store.load('market.json')
 
         # Confirm with the user before adding the Pokemon to the market
         confirmation_message = f"Do you want to add {found_pokemon['name']} to the market for {price}?"
@@ -298,7 +269,8 @@ class Market(commands.Cog):
         try:
             reaction, _ = await self.bot.wait_for('reaction_add', timeout=60.0, check=check)
             if str(reaction.emoji) == '✅':
-                # Update Pokemon details
+                # Update a copy of the Pokemon so the collection entry is left untouched
+                found_pokemon = dict(found_pokemon)
                 found_pokemon.update({
                     "id": len(market_data['pokemon']) + 1,  # Adjust ID
                     "ownerid": user_id,
@@ -328,8 +300,7 @@ class Market(commands.Cog):
                     "price": price
                 })
                 market_data['pokemon'].append(found_pokemon)
-                with open('market.json', 'w') as file:
-                    json.dump(market_data, file, indent=4)
+                store.mark_dirty('market.json', 'pokemon')
                 await ctx.send(f"{found_pokemon['name']} has been added to the market for {price}.")
             else:
                 await ctx.send("Operation cancelled.")
@@ -337,8 +308,7 @@ class Market(commands.Cog):
             await ctx.send("Timed out. Please try again later.")
     @commands.command(aliases=['minfo'])
     async def marketinfo(self, ctx, market_id: int):
-        with open('market.json', 'r') as file:
-            market_data = json.load(file)
+        market_data = store.load('market.json')
 
         # Search for the provided market ID in the market data
         found_pokemon = None
@@ -356,18 +326,22 @@ class Market(commands.Cog):
 
     async def display_pokemon_info(self, ctx, pokemon, user_pokemon):
         pokemon_name = pokemon.get('name', 'Unknown')
-        pokemon_data = requests.get(f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}/").json()
-        types = ', '.join(entry['type']['name'].capitalize() for entry in pokemon_data['types'])
+        # Types and base stats come from the local species cache (seeded from pokedata.json)
+        pokemon_data = await species.get(pokemon_name, 'types', 'stats')
+        if pokemon_data is None:
+            await ctx.send(f"Failed to fetch data for {pokemon_name}.")
+            return
+        types = ', '.join(name.capitalize() for name in pokemon_data['types'])
         ability_name = pokemon.get('ability', 'Unknown')
 
         # Calculate stats based on IVs and EVs
         stats = pokemon_data['stats']
-        hp_base = stats[0]['base_stat']
-        atk_base = stats[1]['base_stat']
-        def_base = stats[2]['base_stat']
-        spa_base = stats[3]['base_stat']
-        spd_base = stats[4]['base_stat']
-        spe_base = stats[5]['base_stat']
+        hp_base = stats['hp']
+        atk_base = stats['attack']
+        def_base = stats['defense']
+        spa_base = stats['special_attack']
+        spd_base = stats['special_defense']
+        spe_base = stats['speed']
 
         hp_iv = pokemon.get('hpiv', 0)
         atk_iv = pokemon.get('atkiv', 0)
@@ -0,0 +1,48 @@
+import argparse
+import os
+from storage import JsonFile, ShardedJson, JournaledJson
+from sqlite_storage import SqliteDatabase, sqlite_backends
+from writer import writer
+
+def source_backend(filename, shard_directory):
+    """
+    Returns the JSON backend to import a data file from.
+
+    Collections are read from the shard layout when it exists. Files kept by
+    the journal backend are read as their snapshot with the journal replayed
+    on top, so changes made since the last compaction are not lost. Anything
+    else is read from the monolithic file.
+    """
+    if filename == 'collections.json' and os.path.exists(os.path.join(shard_directory, 'manifest.json')):
+        return ShardedJson(shard_directory)
+    if os.path.exists(filename + '.journal'):
+        return JournaledJson(filename)
+    return JsonFile(filename)
+
+def migrate(db_path, shard_directory):
+    """
+    Imports every JSON data file into a SQLite database, replacing its contents.
+
+    Parameters:
+        db_path (str): The SQLite database file to create or overwrite.
+        shard_directory (str): The collection shard directory, if collections are sharded.
+    """
+    db = SqliteDatabase(db_path)
+    for filename, backend in sqlite_backends(db).items():
+        try:
+            document = source_backend(filename, shard_directory).read()
+        except FileNotFoundError:
+            print(f"Skipping {filename}: file not found.")
+            continue
+        backend.clear()
+        backend.write(document, {str(key) for key in document})
+        print(f"Imported {len(document)} entries from {filename}.")
+    db.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Import the bot's JSON data files into a SQLite database.")
+    parser.add_argument('--db', default='blossom.db', help="SQLite database file to write")
+    parser.add_argument('--shards', default='collection_shards', help="Collection shard directory to read from")
+    args = parser.parse_args()
+    writer.recover()
+    migrate(args.db, args.shards)
@@ -0,0 +1,155 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+MESSAGE_LIMIT = 2000  # Discord's maximum message length
+
+def split_message(lines, limit=MESSAGE_LIMIT):
+    """
+    Joins lines into as few messages as possible, each at most limit characters.
+    """
+    messages = []
+    current = ""
+    for line in lines:
+        line = line[:limit]
+        if current and len(current) + 1 + len(line) > limit:
+            messages.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    if current:
+        messages.append(current)
+    return messages
+
+class NotificationQueue:
+    """
+    Delivers direct messages to users in the background.
+
+    Cogs call notify() and move on. Notices for a user who already has one
+    waiting are merged into the same message, so a burst of events turns
+    into one DM per user. A fixed number of workers drain the queue, and
+    sends are spaced to stay under a per-second budget; discord.py still
+    waits out any per-route 429 it receives. Users are resolved from the
+    gateway cache, and only fetched over REST when the cache does not have
+    them. When more than max_users are waiting, the oldest notices are
+    dropped.
+    """
+    def __init__(self, workers=4, rate=25, max_users=10000):
+        """
+        Initializes the queue. Call start() once the bot is connected.
+
+        Parameters:
+            workers (int): The number of DMs sent concurrently.
+            rate (float): The maximum number of DMs sent per second.
+            max_users (int): The maximum number of users with notices waiting.
+        """
+        self.workers = workers
+        self.rate = rate
+        self.max_users = max_users
+        self.pending = OrderedDict()  # user ID -> list of notice lines, oldest user first
+        self.bot = None
+        self.tasks = []
+        self.ready = None
+        self.next_send = 0.0
+        self.queued = 0
+        self.merged = 0
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+        self.fetched = 0
+
+    def notify(self, user_id, text):
+        """
+        Queues a DM for a user, merging it with any notice already waiting for them.
+
+        Parameters:
+            user_id (int): The user to message.
+            text (str): The notice.
+        """
+        user_id = int(user_id)
+        self.queued += 1
+        if user_id in self.pending:
+            self.pending[user_id].append(text)
+            self.merged += 1
+            return
+        if len(self.pending) >= self.max_users:
+            _, lines = self.pending.popitem(last=False)
+            self.dropped += len(lines)
+        self.pending[user_id] = [text]
+        if self.ready is not None:
+            self.ready.set()
+
+    def start(self, bot):
+        """
+        Starts the workers. Calling it again, e.g. on reconnect, does nothing.
+        """
+        if self.tasks:
+            return
+        self.bot = bot
+        self.ready = asyncio.Event()
+        if self.pending:
+            self.ready.set()
+        self.tasks = [asyncio.create_task(self.work()) for _ in range(self.workers)]
+
+    async def close(self):
+        """
+        Stops the workers. Notices still waiting are not sent.
+        """
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    async def work(self):
+        while True:
+            if not self.pending:
+                self.ready.clear()
+                await self.ready.wait()
+                continue
+            user_id, lines = self.pending.popitem(last=False)
+            try:
+                await self.deliver(user_id, lines)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                print(f"Failed to send a DM to {user_id}: {e}")
+
+    async def throttle(self):
+        """
+        Waits for the next free send slot under the per-second budget.
+        """
+        now = time.monotonic()
+        slot = max(now, self.next_send)
+        self.next_send = slot + 1 / self.rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def deliver(self, user_id, lines):
+        # The gateway cache answers without a REST call for any user sharing a guild with the bot
+        user = self.bot.get_user(user_id)
+        if user is None:
+            self.fetched += 1
+            user = await self.bot.fetch_user(user_id)
+        for message in split_message(lines):
+            await self.throttle()
+            await user.send(message)
+            self.sent += 1
+
+    def stats(self):
+        """
+        Returns the queue counters as a dict.
+        """
+        return {
+            "users_waiting": len(self.pending),
+            "notices_waiting": sum(len(lines) for lines in self.pending.values()),
+            "queued": self.queued,
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "sent": self.sent,
+            "failed": self.failed,
+            "fetched": self.fetched,
+        }
+
+# The shared DM queue used by every cog
+notifications = NotificationQueue()
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import random
+import aiohttp
+from singleflight import SingleFlight
+from response_cache import ResponseCache
+
+POKEAPI_URL = "https://pokeapi.co/api/v2"
+
+class PokeApiError(Exception):
+    """
+    Raised when PokeAPI cannot be reached or keeps failing after every retry.
+    """
+
+class PokeApiClient:
+    """
+    A shared HTTP client for PokeAPI.
+
+    Every request goes through one aiohttp session, so connections are kept
+    alive and reused instead of opened per call, and the connector caps how
+    many requests run against the host at once. Requests time out instead
+    of hanging a command, and timeouts, connection errors, 429s and 5xx
+    responses are retried with exponential backoff and full jitter so a
+    burst of failures does not hammer the API in lockstep. Concurrent
+    requests for the same URL share one fetch, and responses, including
+    404s, are kept in a cache bounded by their size so repeated lookups of
+    the same resource are answered from memory.
+
+    base_url can point at a local stand-in server (see pokeapi_server.py)
+    that serves canned PokeAPI JSON. When an offline snapshot (see dex.py)
+    is attached, paths it holds are answered from it without a request.
+    """
+    def __init__(self, base_url=POKEAPI_URL, limit_per_host=10, timeout=10, retries=3, backoff=0.5, cache=None):
+        """
+        Initializes the client. The session itself is created on first use, inside the running event loop.
+
+        Parameters:
+            base_url (str): The API root, without a trailing slash.
+            limit_per_host (int): Maximum concurrent connections to the API host.
+            timeout (float): Seconds before a request is abandoned.
+            retries (int): Extra attempts after a failed request.
+            backoff (float): Base delay in seconds; attempt n waits up to backoff * 2**n.
+            cache (ResponseCache, optional): The response cache. Defaults to a ResponseCache with its default size limit.
+        """
+        self.base_url = base_url
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.session = None
+        self.requests = SingleFlight()  # url -> the fetch already in flight
+        self.snapshot = None  # Optional dex.Pokedex consulted before the network
+        self.cache = cache if cache is not None else ResponseCache()
+
+    def url(self, path):
+        """
+        Returns the full URL for an API path such as 'pokemon/pikachu'.
+
+        Absolute PokeAPI URLs, like the species links inside responses, are
+        rebased onto base_url so a stand-in server also serves the links.
+        """
+        if path.startswith('http'):
+            if '/api/v2/' not in path:
+                return path
+            path = path.split('/api/v2/', 1)[1]
+        # PokeAPI names are lower case, so 'Pikachu' and 'pikachu' share a cache entry
+        return f"{self.base_url}/{path.strip('/').lower()}/"
+
+    def get_session(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit_per_host=self.limit_per_host, ttl_dns_cache=300)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self.session
+
+    async def get(self, path):
+        """
+        Fetches a PokeAPI resource.
+
+        Parameters:
+            path (str): An API path such as 'pokemon/pikachu', or an absolute PokeAPI URL.
+
+        Returns:
+            The parsed JSON, or None if the resource does not exist (404).
+
+        Raises:
+            PokeApiError: If the request still fails after every retry.
+        """
+        if self.snapshot is not None:
+            document = self.snapshot.get(path)
+            if document is not None:
+                return document
+        url = self.url(path)
+        found, document = self.cache.get(url)
+        if found:
+            return document
+        return await self.requests.run(url, self.fetch, url)
+
+    async def fetch(self, url):
+        """
+        Requests a URL, retrying failures, and caches the answer. Use get(), which shares concurrent fetches.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                async with self.get_session().get(url) as response:
+                    if response.status == 404:
+                        self.cache.put(url, None)
+                        return None
+                    if response.status == 200:
+                        body = await response.read()
+                        document = json.loads(body)
+                        # The body's length is what the cache's memory bound is charged
+                        self.cache.put(url, document, len(body))
+                        return document
+                    error = f"HTTP {response.status}"
+                    # Other client errors will not succeed on a retry
+                    if response.status < 500 and response.status != 429:
+                        break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = str(e) or type(e).__name__
+            if attempt < self.retries:
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+        raise PokeApiError(f"Error fetching {url}: {error}")
+
+    async def close(self):
+        """
+        Closes the session and its pooled connections.
+        """
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+# The shared PokeAPI client used by every cog
+pokeapi = PokeApiClient()
@@ -0,0 +1,59 @@
+import argparse
+import os
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+class CannedPokeApiHandler(SimpleHTTPRequestHandler):
+    """
+    Serves PokeAPI paths from a directory of JSON files.
+
+    /api/v2/pokemon/pikachu/ is answered from pokemon/pikachu.json or
+    pokemon/pikachu/index.json (the layout of the PokeAPI api-data dumps);
+    anything else is a 404, just like the real API.
+    """
+    root = '.'
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0].strip('/')
+        if path.startswith('api/v2/'):
+            path = path[len('api/v2/'):]
+        for candidate in (path + '.json', os.path.join(path, 'index.json')):
+            file_path = os.path.join(self.root, *candidate.split('/'))
+            # Never serve files outside the data directory
+            if os.path.commonpath([os.path.abspath(file_path), os.path.abspath(self.root)]) != os.path.abspath(self.root):
+                break
+            if os.path.isfile(file_path):
+                with open(file_path, 'rb') as file:
+                    body = file.read()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+        self.send_error(404)
+
+def serve(directory, host='127.0.0.1', port=8089):
+    """
+    Runs the stand-in server until interrupted.
+
+    Parameters:
+        directory (str): The directory of canned responses.
+        host (str): The address to listen on.
+        port (int): The port to listen on.
+    """
+    CannedPokeApiHandler.root = directory
+    server = ThreadingHTTPServer((host, port), CannedPokeApiHandler)
+    print(f"Serving {directory} as PokeAPI at http://{host}:{port}/api/v2")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve canned PokeAPI JSON for testing the bot offline. Point pokeapi.base_url in main.py at it.")
+    parser.add_argument('directory', help="Directory of responses, e.g. pokemon/pikachu.json or pokemon/25/index.json")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on")
+    parser.add_argument('--port', type=int, default=8089, help="Port to listen on")
+    args = parser.parse_args()
+    serve(args.directory, args.host, args.port)
@@ -1,23 +1,20 @@
-import json
-import random
-import requests
 import math
 import discord
 from typing import Union
 import asyncio
 from datetime import datetime
 from discord.ext import commands
-from safari import natlist
+from datastore import store
+from species import species
+from factory import factory
+from locks import locks, user_lock
+from pokeapi import pokeapi, PokeApiError
+from learnsets import learnsets
 
 def has_started():
     async def predicate(ctx):
         user_id = str(ctx.author.id)
-        try:
-            with open('user_data.json', 'r') as file:
-                user_data = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("Error: User data not found.")
-            return False
+        user_data = store.load('user_data.json')
         
         # Check if the user has started by looking for their ID in the user_data
         if user_id in user_data:
@@ -39,28 +36,7 @@ class Pokemon(commands.Cog):
         - bot (discord.ext.commands.Bot): The bot instance.
         """
         self.bot = bot
-        self.pokemon_data = self.load_pokemon_data()
 
-    def load_pokemon_data(self):
-        """
-        Load Pokémon data from a JSON file.
-
-        Returns:
-        - dict: The loaded Pokémon data.
-        """
-        with open('pokedata.json', 'r') as file:
-            return json.load(file)
-    
-    def get_pokemon_image_url(self, pokemon_name):
-        """Get the image URL for a Pokémon from PokeAPI."""
-        pokemon_url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}"
-        response = requests.get(pokemon_url)
-        if response.status_code == 200:
-            pokemon_data = response.json()
-            return pokemon_data['sprites']['other']['official-artwork']['front_default']
-        else:
-            return None
-    
     @has_started()
     @commands.command()
     @commands.cooldown(1, 60, commands.BucketType.user)
@@ -71,222 +47,46 @@ class Pokemon(commands.Cog):
         user_id = str(ctx.author.id)
 
         # Load Pokémon names from pokemonnames.json
-        with open('pokemonnames.json', 'r') as file:
-            pokemon_names = json.load(file)
+        pokemon_names = store.load('pokemonnames.json', default=list)
+
+        # Hold the user's lock so concurrent redeems cannot spend the same balance
+        async with locks.acquire(user_lock(user_id)):
+            # Check if the value is a Pokémon name
+            if value.lower() in [name.lower() for name in pokemon_names]:
+                # Redeem Pokémon
+                user_data = store.load('user_data.json')
+                if user_id not in user_data or user_data[user_id]['redeems'] < amount:
+                    await ctx.send("You don't have enough redeems left.")
+                    return
 
-        # Check if the value is a Pokémon name
-        if value.lower() in [name.lower() for name in pokemon_names]:
-            # Redeem Pokémon
-            try:
-                with open('user_data.json', 'r+') as file:  # Open in read/write mode
-                    user_data = json.load(file)
-                    if user_id not in user_data or user_data[user_id]['redeems'] < amount:
-                        await ctx.send("You don't have enough redeems left.")
-                        return
+                await ctx.send(f"Redeeming {amount} {value}{'s' if amount > 1 else ''}...")
 
+                # Generate the whole batch with one species lookup, then spend the redeems and add
+                # the Pokémon together so both are written in one commit
+                pokemons = await factory.create(user_id, value, amount, hidden_ability_probability=0.5, name=value.capitalize())
+                with store.transaction() as transaction:
+                    transaction.load('user_data.json', user_id)
+                    transaction.load('collections.json', user_id)
                     user_data[user_id]['redeems'] -= amount
-                    await ctx.send(f"Redeeming {amount} {value}{'s' if amount > 1 else ''}...")
-
-                    # Redeem the specified amount of Pokémon
-                    for _ in range(amount):
-                        self.save_pokemon_to_collection(user_id, value)
-
-                    # Update user data file
-                    file.seek(0)
-                    json.dump(user_data, file, indent=4)
-                    file.truncate()
+                    factory.add(user_id, pokemons)
 
                 await ctx.send(f"{amount} {value}{'s' if amount > 1 else ''} have been added to your collection!")
-            except FileNotFoundError:
-                await ctx.send("Error: User data not found.")
-        elif value.lower() == "tokens":
-            # Add tokens to the user's account
-            try:
-                with open('user_data.json', 'r+') as file:  # Open in read/write mode
-                    user_data = json.load(file)
-                    if user_id not in user_data or user_data[user_id]['redeems'] < amount:
-                        await ctx.send("You don't have enough redeems left.")
-                        return
-
-                    tokens_to_add = amount * 25000
-                    user_data[user_id]['redeems'] -= amount
-                    user_data[user_id]['tokens'] += tokens_to_add
+            elif value.lower() == "tokens":
+                # Add tokens to the user's account
+                user_data = store.load('user_data.json')
+                if user_id not in user_data or user_data[user_id]['redeems'] < amount:
+                    await ctx.send("You don't have enough redeems left.")
+                    return
 
-                    # Update user data file
-                    file.seek(0)
-                    json.dump(user_data, file, indent=4)
-                    file.truncate()
+                tokens_to_add = amount * 25000
+                user_data[user_id]['redeems'] -= amount
+                user_data[user_id]['tokens'] += tokens_to_add
+                store.mark_dirty('user_data.json', user_id)
 
                 await ctx.send(f"{tokens_to_add} tokens have been added to your account!")
-            except FileNotFoundError:
-                await ctx.send("Error: User data not found.")
-        else:
-            await ctx.send(f"Invalid value: {value}")
-
-    def select_ability(self, pokemon_name, hidden_ability_probability):
-        """Select an ability for the Pokémon."""
-        
-        # Fetch the Pokémon resource based on the name from PokeAPI
-        pokemon_url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}"
-        response = requests.get(pokemon_url)
-        if response.status_code == 200:
-            pokemon_data = response.json()
-            abilities = [ability['ability']['name'] for ability in pokemon_data['abilities']]
-        else:
-            print(f"Error fetching Pokémon data for {pokemon_name}")
-            abilities = []
-        
-        hidden_abilities = [ability for ability in abilities if self.is_hidden_ability(ability)]
-
-        if hidden_abilities:
-            # If hidden abilities are available, randomly select one based on probability
-            if random.random() < hidden_ability_probability:
-                return random.choice(hidden_abilities)
-        
-        # If no hidden abilities or probability not met, choose a regular ability
-        return random.choice(abilities)
-
-    def is_hidden_ability(self, ability_name):
-        """Check if the ability is a hidden ability."""
-        ability_url = f"https://pokeapi.co/api/v2/ability/{ability_name}"
-        response = requests.get(ability_url)
-        if response.status_code == 200:
-            ability_data = response.json()
-            return ability_data.get("is_hidden", False)
-        else:
-            print(f"Error fetching ability data for {ability_name}")
-            return False
-    
-    def save_pokemon_to_collection(self, user_id, pokemon_name):
-        """Save a found Pokémon to the user's collection."""
-        # Load the existing collections from the file
-        try:
-            with open('collections.json', 'r') as file:
-                collections = json.load(file)
-        except FileNotFoundError:
-            collections = {}
-
-        # Get the user's collection or create an empty list if it doesn't exist
-        user_collection = collections.get(str(user_id), [])
-
-        # Generate a unique ID for the new Pokémon
-        pokemon_id = len(user_collection) + 1  # IDs start from 1 and increment by 1
-
-        # Get random moves for the Pokémon
-        level = random.randint(1, 30)
-        move1 = move2 = move3 = move4 = "tackle"
-
-        try:
-            # Get the Pokémon data from PokeAPI
-            pokemon_url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}"
-            response = requests.get(pokemon_url)
-            if response.status_code == 200:
-                pokemon_data = response.json()
-                pokemon_species_url = pokemon_data['species']['url']
-                species_response = requests.get(pokemon_species_url)
-                if species_response.status_code == 200:
-                    species_data = species_response.json()
-                    abilities = [ability['ability']['name'] for ability in pokemon_data['abilities']]
-                    base_experience = pokemon_data['base_experience']
-                    gender_rate = species_data['gender_rate']
-                    hidden_ability_probability = 0.5  # Example probability for hidden ability
-                else:
-                    print(f"Error fetching species information for {pokemon_name}")
-                    abilities = []
-                    base_experience = 0
-                    gender_rate = -1
-                    hidden_ability_probability = 0.5
-            else:
-                print(f"Error fetching Pokémon data for {pokemon_name}")
-                abilities = []
-                base_experience = 0
-                gender_rate = -1
-                hidden_ability_probability = 0.33
-        except Exception as e:
-            print(f"Error fetching Pokémon information for {pokemon_name}: {e}")
-            abilities = []
-            base_experience = 0
-            gender_rate = -1
-            hidden_ability_probability = 0.33
-
-        # Determine the gender based on gender rate
-        if gender_rate == -1:
-            gender = None  # Genderless
-        elif gender_rate == 0:
-            gender = 'Female'
-        elif gender_rate == 8:
-            gender = 'Male'
-        else:
-            if random.random() < gender_rate / 8:
-                gender = 'Male'
             else:
-                gender = 'Female'
-
-
-        # Randomly select an ability considering hidden abilities
-        if abilities:
-            ability = self.select_ability(pokemon_name, hidden_ability_probability)  
-
-        # Get image URL for the Pokémon
-        image_url = self.get_pokemon_image_url(pokemon_name)
-
-        # Create a Pokémon object
-        pokemon_object = {
-            "id": pokemon_id,
-            "ownerid": user_id,
-            "OT": user_id,
-            "name": pokemon_name.capitalize(),
-            "gender": gender,
-            "ability": ability,
-            "nickname": "",
-            "friendship": 0,
-            "favorite": False,
-            "level": level,
-            "exp": base_experience,
-            "expcap": level ** 3,
-            "nature": random.choice(natlist),
-            "hpiv": random.randint(1, 31),
-            "atkiv": random.randint(1, 31),
-            "defiv": random.randint(1, 31),
-            "spatkiv": random.randint(1, 31),
-            "spdiv": random.randint(1, 31),
-            "speiv": random.randint(1, 31),
-            "hpev": 0,
-            "atkev": 0,
-            "defev": 0,
-            "spatkev": 0,
-            "spdefev": 0,
-            "speedev": 0,
-            "move 1": move1,
-            "move 2": move2,
-            "move 3": move3,
-            "move 4": move4,
-            "image_url": image_url,
-            "selected": False,
-            "helditem": "",
-            "is_shiny": False
-        }
-
-        # Append the Pokémon object to the user's collection
-        user_collection.append(pokemon_object)
-
-        # Update the collections dictionary with the modified user collection
-        collections[str(user_id)] = user_collection
+                await ctx.send(f"Invalid value: {value}")
 
-        # Save the updated collections back to the file
-        with open('collections.json', 'w') as file:
-            json.dump(collections, file, indent=4)
-
-    def get_pokemon_image_url(self, pokemon_name):
-        """Get the image URL for a Pokémon from PokeAPI."""
-        pokemon_url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}"
-        response = requests.get(pokemon_url)
-        if response.status_code == 200:
-            pokemon_data = response.json()
-            return pokemon_data['sprites']['other']['official-artwork']['front_default']
-        else:
-            return None
-    
     @commands.command(aliases=["dex"])
     async def pokedex(self, ctx, pokemon_name: str):
         """
@@ -296,29 +96,26 @@ class Pokemon(commands.Cog):
         - ctx (discord.ext.commands.Context): The context of the command.
         - pokemon_name (str): The name of the Pokémon.
         """
-        # Fetch Pokémon data from the PokeAPI
-        url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}"
-        response = requests.get(url)
+        # Look the species up in the local cache, fetching it from PokeAPI on first use
+        pokemon_data = await species.get(pokemon_name)
 
-        if response.status_code != 200:
+        if pokemon_data is None:
             await ctx.send("Pokémon not found in the Pokédex.")
             return
 
-        pokemon_data = response.json()
-
-        types = ', '.join([entry['type']['name'] for entry in pokemon_data['types']])
-        abilities = ', '.join([entry['ability']['name'] for entry in pokemon_data['abilities']])
+        types = ', '.join(pokemon_data['types'])
+        abilities = ', '.join([entry['name'] for entry in pokemon_data['abilities']])
         stats = {
-            'HP': pokemon_data['stats'][0]['base_stat'],
-            'Attack': pokemon_data['stats'][1]['base_stat'],
-            'Defense': pokemon_data['stats'][2]['base_stat'],
-            'Special Attack': pokemon_data['stats'][3]['base_stat'],
-            'Special Defense': pokemon_data['stats'][4]['base_stat'],
-            'Speed': pokemon_data['stats'][5]['base_stat']
+            'HP': pokemon_data['stats']['hp'],
+            'Attack': pokemon_data['stats']['attack'],
+            'Defense': pokemon_data['stats']['defense'],
+            'Special Attack': pokemon_data['stats']['special_attack'],
+            'Special Defense': pokemon_data['stats']['special_defense'],
+            'Speed': pokemon_data['stats']['speed']
         }
 
         # Get the URL for the Pokémon's image
-        image_url = pokemon_data['sprites']['other']['official-artwork']['front_default']
+        image_url = pokemon_data['image_url']
 
         # Create the embed
         embed = discord.Embed(title=pokemon_name.capitalize(), color=discord.Color.green())
@@ -331,12 +128,7 @@ class Pokemon(commands.Cog):
     @has_started()
     @commands.command(name='moves')
     async def moves(self, ctx):
-        try:
-            with open('collections.json', 'r') as file:
-                collections = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("No Pokémon data found.")
-            return
+        collections = store.load('collections.json')
 
         user_id = str(ctx.author.id)
         user_pokemon = collections.get(user_id, [])
@@ -365,15 +157,13 @@ class Pokemon(commands.Cog):
         Parameters:
             ctx (commands.Context): The context in which the command was invoked.
         """
-        with open('teams.json', 'r') as file:
-            teams_data = json.load(file)
+        teams_data = store.load('teams.json')
 
         user_id = str(ctx.author.id)
         user_team = teams_data.get(user_id, {})
 
         # Load Pokémon data from collections.json
-        with open('collections.json', 'r') as file:
-            pokemon_data = json.load(file)
+        pokemon_data = store.load('collections.json')
 
         embed = discord.Embed(title="Your Current Team!", color=0xeee647)
 
@@ -403,8 +193,7 @@ class Pokemon(commands.Cog):
             return
 
         # Load user's team data from teams.json
-        with open('teams.json', 'r') as file:
-            teams_data = json.load(file)
+        teams_data = store.load('teams.json')
 
         user_id = str(ctx.author.id)
         user_team = teams_data.get(user_id, {})
@@ -419,12 +208,10 @@ class Pokemon(commands.Cog):
 
         # Update the teams.json file with the modified team data
         teams_data[user_id] = user_team
-        with open('teams.json', 'w') as file:
-            json.dump(teams_data, file, indent=4)
+        store.mark_dirty('teams.json', user_id)
 
         # Load Pokémon data from collections.json
-        with open('collections.json', 'r') as file:
-            pokemon_data = json.load(file)
+        pokemon_data = store.load('collections.json')
 
         # Find the name of the removed Pokémon
         removed_pokemon_info = next((p for p in pokemon_data.get(user_id, []) if p['id'] == removed_pokemon_id), None)
@@ -451,8 +238,7 @@ class Pokemon(commands.Cog):
             return
 
         # Load user's team data from teams.json
-        with open('teams.json', 'r') as file:
-            teams_data = json.load(file)
+        teams_data = store.load('teams.json')
 
         user_id = str(ctx.author.id)
         user_team = teams_data.get(user_id, {})
@@ -468,8 +254,7 @@ class Pokemon(commands.Cog):
             return
 
         # Load Pokémon data from collections.json
-        with open('collections.json', 'r') as file:
-            pokemon_data = json.load(file)
+        pokemon_data = store.load('collections.json')
 
         # Check if the given pokemon_id is valid
         pokemon_info = next((p for p in pokemon_data.get(user_id, []) if p['id'] == pokemon_id), None)
@@ -482,8 +267,7 @@ class Pokemon(commands.Cog):
 
         # Update the teams.json file with the modified team data
         teams_data[user_id] = user_team
-        with open('teams.json', 'w') as file:
-            json.dump(teams_data, file, indent=4)
+        store.mark_dirty('teams.json', user_id)
 
         pokemon_name = pokemon_info['name']
         await ctx.send(f"Successfully added {pokemon_name} to slot {slot} of your team.")
@@ -500,12 +284,7 @@ class Pokemon(commands.Cog):
         """
         user_id = str(ctx.author.id)
 
-        try:
-            with open('collections.json', 'r') as file:
-                collections = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("You haven't caught any Pokémon yet!")
-            return
+        collections = store.load('collections.json')
 
         user_pokemon = collections.get(user_id, [])
         removed_pokemon = [pokemon for pokemon in user_pokemon if pokemon.get('id') in pokemon_ids]
@@ -527,12 +306,13 @@ class Pokemon(commands.Cog):
             return
 
         if msg.content.lower() == 'yes':
-            user_pokemon = [pokemon for pokemon in user_pokemon if pokemon not in removed_pokemon]
-            user_pokemon = await self.update_pokemon_ids(user_id, user_pokemon)
-            collections[user_id] = user_pokemon
-
-            with open('collections.json', 'w') as file:
-                json.dump(collections, file, indent=4)
+            # Re-read the collection under the lock, since it may have changed while waiting for the answer
+            async with locks.acquire(user_lock(user_id)):
+                user_pokemon = [pokemon for pokemon in collections.get(user_id, []) if pokemon.get('id') not in pokemon_ids]
+                for index, pokemon in enumerate(user_pokemon, start=1):
+                    pokemon['id'] = index
+                collections[user_id] = user_pokemon
+                store.mark_dirty('collections.json', user_id)
 
             await ctx.send(f"All Pokémon with the specified IDs have been released from your collection.")
         else:
@@ -541,9 +321,10 @@ class Pokemon(commands.Cog):
     async def movedex(self, ctx, *, move_name: str):
         try:
             # Fetch move data from the PokeAPI
-            move_response = requests.get(f"https://pokeapi.co/api/v2/move/{move_name.lower()}/")
-            move_response.raise_for_status()  # Check for any HTTP errors
-            move_data = move_response.json()
+            move_data = await pokeapi.get(f"move/{move_name.lower()}")
+            if move_data is None:
+                await ctx.send("Move not found.")
+                return
 
             # Extract move details
             move_type = move_data['type']['name'].capitalize()
@@ -558,19 +339,21 @@ class Pokemon(commands.Cog):
 
             await ctx.send(embed=embed)
 
-        except requests.RequestException as e:
+        except PokeApiError as e:
             await ctx.send(f"Error fetching move data: {e}")
         except KeyError:
             await ctx.send("Move not found.")
     @has_started()
     @commands.command(name='moveset')
-    async def moveset(self, ctx):
-        try:
-            with open('collections.json', 'r') as file:
-                collections = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("No Pokémon data found.")
-            return
+    async def moveset(self, ctx, move_filter: str = None):
+        """
+        Lists the moves the selected Pokémon can learn.
+
+        Parameters:
+            ctx (commands.Context): The context in which the command was invoked.
+            move_filter (str, optional): A learn method ('level-up', 'machine', 'tutor', 'egg'), a move type ('fire') or a move name.
+        """
+        collections = store.load('collections.json')
 
         user_id = str(ctx.author.id)
         user_pokemon = collections.get(user_id, [])
@@ -591,19 +374,27 @@ class Pokemon(commands.Cog):
         pokemon_name = selected_pokemon.get('name', '')
 
         try:
-            r = requests.get(f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}/")
-            r.raise_for_status()  # Check for any HTTP errors
-            pokemon_data = r.json()
+            # The learnset is built once per species and already sorted for paging
+            learnset = await learnsets.get(pokemon_name)
+            if learnset is None:
+                await ctx.send(f"No Pokémon data found for {pokemon_name}.")
+                return
 
-            moves = [move['move']['name'] for move in pokemon_data['moves']]
+            moves = await learnset.filter(move_filter)
+            if not moves:
+                await ctx.send(f"{pokemon_name} has no moves matching '{move_filter}'.")
+                return
             max_pages = (len(moves) + 24) // 25  # Calculate the total number of pages
 
             def create_embed(page_num):
                 start_idx = (page_num - 1) * 25
                 end_idx = min(start_idx + 25, len(moves))
-                embed = discord.Embed(title=f"{pokemon_name}'s Moveset (Page {page_num}/{max_pages})", color=discord.Color.blue())
+                title = f"{pokemon_name}'s Moveset (Page {page_num}/{max_pages})"
+                if move_filter:
+                    title = f"{pokemon_name}'s {move_filter.capitalize()} Moves (Page {page_num}/{max_pages})"
+                embed = discord.Embed(title=title, color=discord.Color.blue())
                 for move in moves[start_idx:end_idx]:
-                    embed.add_field(name=move, value="Type: Check Movedex", inline=False)  # Type information not available from PokeAPI
+                    embed.add_field(name=move['name'], value=learnset.describe(move), inline=False)
                 return embed
 
             current_page = 1
@@ -632,7 +423,7 @@ class Pokemon(commands.Cog):
 
             await message.clear_reactions()
 
-        except requests.RequestException as e:
+        except PokeApiError as e:
             await ctx.send(f"Error fetching Pokémon data: {e}")
     @has_started()
     @commands.command(name='mypokemon', aliases=['mypokes'])
@@ -646,12 +437,7 @@ class Pokemon(commands.Cog):
                 Accepted arguments: 'name', 'nick', 'male', 'female', 'iv a', 'iv d', 'level'
         """
         user_id = str(ctx.author.id)
-        try:
-            with open('collections.json', 'r') as file:
-                collections = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("You haven't caught any Pokémon yet!")
-            return
+        collections = store.load('collections.json')
 
         user_pokemon = collections.get(user_id, [])
 
@@ -659,7 +445,8 @@ class Pokemon(commands.Cog):
             await ctx.send("You haven't caught any Pokémon yet!")
             return
 
-        filtered_pokemon = user_pokemon
+        # Work on a copy so sorting does not reorder the stored collection
+        filtered_pokemon = list(user_pokemon)
 
         if args:
             sort_iv_asc = False
@@ -741,12 +528,7 @@ class Pokemon(commands.Cog):
         """Teach a Pokémon a new move."""
         user_id = str(ctx.author.id)
         # Load user's Pokémon collection from collections.json
-        try:
-            with open('collections.json', 'r') as file:
-                collections = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("Error: Collections data not found.")
-            return
+        collections = store.load('collections.json')
 
         # Check if the user has any Pokémon
         if user_id not in collections or not collections[user_id]:
@@ -769,14 +551,15 @@ class Pokemon(commands.Cog):
             await ctx.send("You haven't selected a Pokémon.")
             return
 
-        # Fetch the Pokémon's moves from the PokeAPI
+        # Check the move against the species' learnset, built once and reused
         pokemon_name = selected_pokemon['name'].lower()
-        url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name}/"
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
-            moves = [move['move']['name'] for move in data['moves']]
-            if move_name.lower() not in moves:
+        try:
+            learnset = await learnsets.get(pokemon_name)
+        except PokeApiError as e:
+            print(e)
+            learnset = None
+        if learnset is not None:
+            if not learnset.can_learn(move_name):
                 await ctx.send(f"The move '{move_name}' is not available for {pokemon_name.capitalize()}.")
                 return
         else:
@@ -787,9 +570,7 @@ class Pokemon(commands.Cog):
         selected_pokemon[f"move {slot_number}"] = move_name.lower()
 
         # Save the updated collection back to collections.json
-        collections[user_id] = collections.get(user_id, [])
-        with open('collections.json', 'w') as file:
-            json.dump(collections, file, indent=4)
+        store.mark_dirty('collections.json', user_id)
 
         await ctx.send(f"{pokemon_name.capitalize()} has learned {move_name.capitalize()} in slot {slot_number}!")
 
@@ -797,13 +578,13 @@ class Pokemon(commands.Cog):
     @commands.command(aliases=['abildex'])
     async def abilitydex(self, ctx, ability_name):
         """Fetch information about a Pokémon ability."""
-        # Construct the URL for the ability API endpoint
-        url = f"https://pokeapi.co/api/v2/ability/{ability_name.lower()}/"
-
         # Fetch data from the PokeAPI
-        response = requests.get(url)
-        if response.status_code == 200:
-            data = response.json()
+        try:
+            data = await pokeapi.get(f"ability/{ability_name.lower()}")
+        except PokeApiError as e:
+            print(e)
+            data = None
+        if data is not None:
             # Extract the English effect entry
             effect_entry = None
             for entry in data['effect_entries']:
@@ -821,18 +602,22 @@ class Pokemon(commands.Cog):
     
     async def display_pokemon_info(self, ctx, pokemon, user_pokemon):
         pokemon_name = pokemon.get('name', 'Unknown')
-        pokemon_data = requests.get(f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}/").json()
-        types = ', '.join(entry['type']['name'].capitalize() for entry in pokemon_data['types'])
+        # Types and base stats come from the local species cache (seeded from pokedata.json)
+        pokemon_data = await species.get(pokemon_name, 'types', 'stats')
+        if pokemon_data is None:
+            await ctx.send(f"Failed to fetch data for {pokemon_name}.")
+            return
+        types = ', '.join(name.capitalize() for name in pokemon_data['types'])
         ability_name = pokemon.get('ability', 'Unknown')
 
         # Calculate stats based on IVs and EVs
         stats = pokemon_data['stats']
-        hp_base = stats[0]['base_stat']
-        atk_base = stats[1]['base_stat']
-        def_base = stats[2]['base_stat']
-        spa_base = stats[3]['base_stat']
-        spd_base = stats[4]['base_stat']
-        spe_base = stats[5]['base_stat']
+        hp_base = stats['hp']
+        atk_base = stats['attack']
+        def_base = stats['defense']
+        spa_base = stats['special_attack']
+        spd_base = stats['special_defense']
+        spe_base = stats['speed']
 
         hp_iv = pokemon.get('hpiv', 0)
         atk_iv = pokemon.get('atkiv', 0)
@@ -954,12 +739,7 @@ class Pokemon(commands.Cog):
         """
         user_id = str(ctx.author.id)  # Get the Discord ID of the command invoker
 
-        try:
-            with open('collections.json', 'r') as file:
-                collections = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("Pokemon data not found.")
-            return
+        collections = store.load('collections.json')
 
         user_pokemon = collections.get(user_id, [])  # Get the user's Pokémon collection
 
@@ -1,19 +1,24 @@
+import discord
 from discord.ext import commands, tasks
-import requests
+import asyncio
 import random
 import json
-
-natlist = ['Lonely', 'Brave', 'Adamant', 'Naughty', 'Bold', 'Relaxed', 'Impish', 'Lax', 'Timid', 'Hasty', 'Jolly', 'Naive', 'Modest', 'Mild', 'Quiet', 'Rash', 'Calm', 'Gentle', 'Sassy', 'Careful', 'Bashful', 'Quirky', 'Serious', 'Docile', 'Hardy']
+import time
+from collections import deque
+from datastore import store
+from factory import factory
+from species import species
+from notifications import notifications
+
+STATUS_EDIT_INTERVAL = 5  # Minimum seconds between edits of a raid's status message
+HP_BAR_LENGTH = 20
+TOP_CONTRIBUTORS = 5
+RECENT_HITS = 5
 
 def has_started():
     async def predicate(ctx):
         user_id = str(ctx.author.id)
-        try:
-            with open('user_data.json', 'r') as file:
-                user_data = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("Error: User data not found.")
-            return False
+        user_data = store.load('user_data.json')
         
         # Check if the user has started by looking for their ID in the user_data
         if user_id in user_data:
@@ -72,52 +77,23 @@ class Raids(commands.Cog):
 
         Loops through ongoing raids and processes attacks from participants.
         """
-        print("Auto attack task started")
-        print("Ongoing raids:", self.ongoing_raids.items())
-        
-        # Load data from collections.json
-        try:
-            with open('collections.json', 'r') as file:
-                collections_data = json.load(file)
-        except FileNotFoundError:
-            print("Error: collections.json not found.")
-            return
-        
-        for channel_id, raid_info in self.ongoing_raids.items():
-            print(f"Processing raid in channel {channel_id}")
-            if raid_info['participants']:
-                print("Participants found")
-                for participant_id in raid_info['participants']:
-                    print(f"Processing participant {participant_id}")
-                    
-                    # Get the participant's collection data
-                    participant_collection = collections_data.get(str(participant_id), [])
-                    
-                    # Filter out the selected Pokémon
-                    selected_pokemon = next((pokemon for pokemon in participant_collection if pokemon.get('selected', False)), None)
-                    
-                    if selected_pokemon:
-                        print("Pokemon found for participant")
-                        attack_stat = selected_pokemon.get('ATK', 0)
-                        damage = random.randint(attack_stat // 2, attack_stat)  # Calculate damage based on attack stat
-                        raid_boss_hp = raid_info['hp']
-                        raid_boss_hp -= damage
-                        raid_info['hp'] = max(0, raid_boss_hp)  # Ensure HP doesn't go below 0
-
-                        if raid_boss_hp <= 0:
-                            print("Raid boss defeated!")
-                            channel = await self.bot.fetch_channel(channel_id)
-                            message = await channel.fetch_message(raid_info['message_id'])
-                            await self.end_raid(message.channel.id, winner=self.bot.get_user(participant_id).name)
-                        else:
-                            print("Raid boss survived the attack")
-                            channel = await self.bot.fetch_channel(channel_id)
-                            message = await channel.fetch_message(raid_info['message_id'])
-                            await message.channel.send(f"{self.bot.get_user(participant_id).name} attacked the raid boss with {selected_pokemon['name']}! Raid boss HP: {raid_boss_hp}")
-                            print("Attack message sent")
-                    else:
-                        print("No Pokémon found for participant")
-                        # Handle the case where the participant hasn't selected a Pokémon
+        # Copy the raids, since a defeated boss ends its raid while we iterate
+        for channel_id, raid_info in list(self.ongoing_raids.items()):
+            # Every participant attacks with the stats snapshotted when they joined, so a tick
+            # needs no data store reads or lookups. The tick's damage is folded into the raid
+            # status, which is edited in place, so traffic does not grow with the raid's size
+            winner = None
+            for participant_id in raid_info['participants']:
+                snapshot = raid_info['snapshots'][participant_id]
+                self.record_hit(raid_info, participant_id, self.roll_damage(snapshot))
+                if raid_info['hp'] <= 0:
+                    winner = snapshot['user_name']
+                    break
+
+            if winner:
+                await self.end_raid(channel_id, winner=winner)
+            elif raid_info['participants']:
+                self.request_status_update(channel_id)
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -153,17 +129,26 @@ class Raids(commands.Cog):
         """
         if channel_id in self.ongoing_raids:
             raid_data = self.ongoing_raids.pop(channel_id)
+            # Drop any pending debounced edit and show the final state right away
+            if raid_data['status_task'] is not None:
+                raid_data['status_task'].cancel()
+            await self.edit_status(raid_data)
             if raid_data['participants']:
+                # Look the boss up once for every participant, then reward them all in one commit
+                entry = await species.get(raid_data['boss'])
                 for participant_id in raid_data['participants']:
                     participant = self.bot.get_user(participant_id)
                     if participant:
-                        self.save_pokemon_to_collection(participant.id, raid_data['boss'])
-                        await participant.send(f"{participant.display_name} caught the raid boss!")
+                        factory.add(participant.id, factory.build(participant.id, raid_data['boss'], entry))
+                        # DMs go out in the background so the raid ends without waiting on them
+                        notifications.notify(participant.id, f"{participant.display_name} caught the raid boss!")
+                store.request_flush()
 
+            # The channel was cached when the raid started
             if winner:
-                await self.bot.get_channel(channel_id).send(f"The raid has ended! {winner} caught the raid boss!")
+                await raid_data['channel'].send(f"The raid has ended! {winner} caught the raid boss!")
             else:
-                await self.bot.get_channel(channel_id).send("The raid has ended! No one caught the raid boss.")
+                await raid_data['channel'].send("The raid has ended! No one caught the raid boss.")
 
     @commands.command()
     @has_started()
@@ -181,13 +166,8 @@ class Raids(commands.Cog):
             await ctx.send("You cannot select a Pokémon while a raid is ongoing.")
             return
 
-        # Load collections data from JSON file
-        try:
-            with open('collections.json', 'r') as file:
-                collections_data = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("Collections data file not found.")
-            return
+        # Load collections data from the data store
+        collections_data = store.load('collections.json')
 
         # Check if user ID exists in collections data
         if user_id not in collections_data:
@@ -210,14 +190,8 @@ class Raids(commands.Cog):
         selected_pokemon = user_pokemon[pokemon_id - 1]
         selected_pokemon['selected'] = True
 
-        # Save the updated collections data back to the JSON file
-        try:
-            with open('collections.json', 'w') as file:
-                json.dump(collections_data, file, indent=4)
-        except Exception as e:
-            print(e)
-            await ctx.send("Failed to update selected pokemon.")
-            return
+        # Mark the user's collection for writing back to disk
+        store.mark_dirty('collections.json', user_id)
 
         await ctx.send(f"Successfully selected {selected_pokemon['name']}.")
 
@@ -241,23 +215,28 @@ class Raids(commands.Cog):
         raid_boss = random.choice(self.raid_bosses)
         raid_level = random.randint(1, 5)
         raid_hp = 100 #raid_level * 100
-        raid_message = await ctx.send(f"A level {raid_level} {raid_boss} appeared with {raid_hp} HP! Join the raid with ';join_raid'.")
-        
-        self.ongoing_raids[ctx.channel.id] = {
+        raid = {
             'boss': raid_boss,
             'level': raid_level,
             'hp': raid_hp,
+            'max_hp': raid_hp,
             'participants': [],
-            'message_id': raid_message.id
+            'snapshots': {},  # participant ID -> battle stats taken when they joined
+            'damage': {},  # participant ID -> total damage dealt
+            'recent': deque(maxlen=RECENT_HITS),  # The latest hits, newest last
+            'channel': ctx.channel,  # Cached for the raid's lifetime instead of fetched every tick
+            'status_task': None,  # The debounced status edit waiting to run, if any
+            'last_edit': 0.0,
         }
+        # The announcement doubles as the raid's status message, which is edited as the raid goes on
+        raid_message = await ctx.send(f"A level {raid_level} {raid_boss} appeared with {raid_hp} HP! Join the raid with ';join_raid'.", embed=self.render_status(raid))
+        raid['message'] = raid_message
+        raid['message_id'] = raid_message.id
+        self.ongoing_raids[ctx.channel.id] = raid
 
     def get_selected_pokemon(self, user_id):
-        # Load collections data from JSON file
-        try:
-            with open('collections.json', 'r') as file:
-                collections_data = json.load(file)
-        except FileNotFoundError:
-            return None
+        # Load collections data from the data store
+        collections_data = store.load('collections.json')
 
         user_pokemon = collections_data.get(user_id, [])
         for pokemon in user_pokemon:
@@ -265,7 +244,105 @@ class Raids(commands.Cog):
                 return pokemon
 
         return None
-    
+
+    def snapshot_participant(self, user, pokemon):
+        """
+        Takes the battle stats a participant raids with.
+
+        Parameters:
+            user (discord.User): The participant.
+            pokemon (dict): Their selected Pokémon.
+
+        Returns:
+            dict: The snapshot.
+        """
+        return {
+            "user_name": user.name,
+            "pokemon_name": pokemon['name'],
+            "attack": pokemon.get('atkiv', 0),
+        }
+
+    def roll_damage(self, snapshot):
+        """
+        Rolls a participant's damage from their snapshotted attack stat.
+        """
+        attack_stat = snapshot['attack']
+        return random.randint(attack_stat // 2, attack_stat)  # Calculate damage based on attack stat
+
+    def record_hit(self, raid, participant_id, damage):
+        """
+        Applies a participant's hit to the boss and tallies it for the status message.
+
+        Parameters:
+            raid (dict): The raid being attacked.
+            participant_id (int): The attacker's Discord ID.
+            damage (int): The damage rolled.
+        """
+        snapshot = raid['snapshots'][participant_id]
+        raid['hp'] = max(0, raid['hp'] - damage)  # Ensure HP doesn't go below 0
+        raid['damage'][participant_id] = raid['damage'].get(participant_id, 0) + damage
+        raid['recent'].append(f"{snapshot['user_name']}'s {snapshot['pokemon_name']} hit for {damage}")
+
+    def render_status(self, raid):
+        """
+        Builds the raid status embed: the boss's HP bar, the top contributors and the latest hits.
+
+        Parameters:
+            raid (dict): The raid to show.
+
+        Returns:
+            discord.Embed: The status embed.
+        """
+        filled = round(HP_BAR_LENGTH * raid['hp'] / raid['max_hp']) if raid['max_hp'] else 0
+        hp_bar = "█" * filled + "░" * (HP_BAR_LENGTH - filled)
+        embed = discord.Embed(title=f"Level {raid['level']} {raid['boss']} Raid", color=discord.Color.red())
+        embed.add_field(name="Boss HP", value=f"`{hp_bar}` {raid['hp']}/{raid['max_hp']}", inline=False)
+
+        top = sorted(raid['damage'].items(), key=lambda item: item[1], reverse=True)[:TOP_CONTRIBUTORS]
+        if top:
+            lines = [f"{rank}. {raid['snapshots'][participant_id]['user_name']}: {damage}" for rank, (participant_id, damage) in enumerate(top, 1)]
+            embed.add_field(name="Top Contributors", value="\n".join(lines), inline=False)
+        if raid['recent']:
+            embed.add_field(name="Recent Hits", value="\n".join(raid['recent']), inline=False)
+
+        embed.set_footer(text=f"{len(raid['participants'])} participant(s)")
+        return embed
+
+    def request_status_update(self, channel_id):
+        """
+        Schedules an edit of a raid's status message.
+
+        Edits are debounced: at most one runs every STATUS_EDIT_INTERVAL seconds,
+        and requests made while one is pending are folded into it, since the
+        edit always renders the raid's latest state.
+
+        Parameters:
+            channel_id (int): The ID of the channel where the raid is happening.
+        """
+        raid = self.ongoing_raids.get(channel_id)
+        if raid is None or raid['status_task'] is not None:
+            return
+        delay = max(0, raid['last_edit'] + STATUS_EDIT_INTERVAL - time.monotonic())
+        raid['status_task'] = asyncio.create_task(self.debounced_status_update(channel_id, delay))
+
+    async def debounced_status_update(self, channel_id, delay):
+        await asyncio.sleep(delay)
+        raid = self.ongoing_raids.get(channel_id)
+        if raid is None:
+            return
+        raid['status_task'] = None
+        await self.edit_status(raid)
+
+    async def edit_status(self, raid):
+        """
+        Edits a raid's status message to show its current state.
+        """
+        raid['last_edit'] = time.monotonic()
+        try:
+            await raid['message'].edit(embed=self.render_status(raid))
+        except discord.HTTPException as e:
+            print(f"Error updating raid status: {e}")
+
     @commands.command()
     @has_started()
     async def join_raid(self, ctx):
@@ -283,8 +360,12 @@ class Raids(commands.Cog):
         user_id = str(ctx.author.id)
         user_pokemon = self.get_selected_pokemon(user_id)
         if user_pokemon:
-            self.ongoing_raids[ctx.channel.id]['participants'].append(ctx.author.id)
+            raid = self.ongoing_raids[ctx.channel.id]
+            # Snapshot the participant's stats now; Pokémon cannot be reselected while the raid runs
+            raid['snapshots'][ctx.author.id] = self.snapshot_participant(ctx.author, user_pokemon)
+            raid['participants'].append(ctx.author.id)
             await ctx.send(f"{ctx.author.name} joined the raid!")
+            self.request_status_update(ctx.channel.id)
         else:
             await ctx.send("You haven't selected a Pokémon.")
 
@@ -302,203 +383,17 @@ class Raids(commands.Cog):
             await ctx.send("You're not in the raid!")
             return
 
-        # Load collections data from JSON file
-        try:
-            with open('collections.json', 'r') as file:
-                collections_data = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("Collections data file not found.")
-            return
-
-        user_id = str(ctx.author.id)
-        user_pokemon = collections_data.get(user_id, [])
-        
-        # Check if the user has a selected Pokémon
-        selected_pokemon = None
-        for pokemon in user_pokemon:
-            if pokemon.get('selected', False):
-                selected_pokemon = pokemon
-                break
-        
-        if not selected_pokemon:
-            await ctx.send("You haven't selected a Pokémon.")
-            return
-
-        # Calculate damage based on the selected Pokémon's attack stat
-        attack_stat = selected_pokemon.get('atkiv', 0)
-        damage = random.randint(attack_stat // 2, attack_stat)  # Calculate damage based on attack stat
-        raid_boss_hp = self.ongoing_raids[ctx.channel.id]['hp']
-        raid_boss_hp -= damage
-        self.ongoing_raids[ctx.channel.id]['hp'] = max(0, raid_boss_hp)  # Ensure HP doesn't go below 0
-
-        if raid_boss_hp <= 0:
-            await self.end_raid(ctx, winner=ctx.author.name)
-        else:
-            await ctx.send(f"{ctx.author.name} attacked the raid boss with {selected_pokemon['name']}! Raid boss HP: {raid_boss_hp}")
-
-    def save_pokemon_to_collection(self, user_id, pokemon_name):
-        """Save a found Pokémon to the user's collection."""
-        # Load the existing collections from the file
-        try:
-            with open('collections.json', 'r') as file:
-                collections = json.load(file)
-        except FileNotFoundError:
-            collections = {}
-
-        # Get the user's collection or create an empty list if it doesn't exist
-        user_collection = collections.get(str(user_id), [])
-
-        # Generate a unique ID for the new Pokémon
-        pokemon_id = len(user_collection) + 1  # IDs start from 1 and increment by 1
-
-        # Get random moves for the Pokémon
-        level = random.randint(1, 100)
-        move1 = move2 = move3 = move4 = "tackle"
+        # Attack with the stats snapshotted when the user joined
+        raid = self.ongoing_raids[ctx.channel.id]
+        snapshot = raid['snapshots'][ctx.author.id]
+        damage = self.roll_damage(snapshot)
+        self.record_hit(raid, ctx.author.id, damage)
 
-        try:
-            # Get the Pokémon data from PokeAPI
-            pokemon_url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}"
-            response = requests.get(pokemon_url)
-            if response.status_code == 200:
-                pokemon_data = response.json()
-                pokemon_species_url = pokemon_data['species']['url']
-                species_response = requests.get(pokemon_species_url)
-                if species_response.status_code == 200:
-                    species_data = species_response.json()
-                    abilities = [ability['ability']['name'] for ability in pokemon_data['abilities']]
-                    base_experience = pokemon_data['base_experience']
-                    gender_rate = species_data['gender_rate']
-                    hidden_ability_probability = 0.33  # Example probability for hidden ability
-                else:
-                    print(f"Error fetching species information for {pokemon_name}")
-                    abilities = []
-                    base_experience = 0
-                    gender_rate = -1
-                    hidden_ability_probability = 0.33
-            else:
-                print(f"Error fetching Pokémon data for {pokemon_name}")
-                abilities = []
-                base_experience = 0
-                gender_rate = -1
-                hidden_ability_probability = 0.33
-        except Exception as e:
-            print(f"Error fetching Pokémon information for {pokemon_name}: {e}")
-            abilities = []
-            base_experience = 0
-            gender_rate = -1
-            hidden_ability_probability = 0.33
-
-        # Determine the gender based on gender rate
-        if gender_rate == -1:
-            gender = None  # Genderless
-        elif gender_rate == 0:
-            gender = 'Female'
-        elif gender_rate == 8:
-            gender = 'Male'
+        if raid['hp'] <= 0:
+            await self.end_raid(ctx.channel.id, winner=ctx.author.name)
         else:
-            if random.random() < gender_rate / 8:
-                gender = 'Male'
-            else:
-                gender = 'Female'
-
-
-        # Randomly select an ability considering hidden abilities
-        if abilities:
-            ability = self.select_ability(pokemon_name, hidden_ability_probability)  
-
-        # Get image URL for the Pokémon
-        image_url = self.get_pokemon_image_url(pokemon_name)
-
-        # Create a Pokémon object
-        pokemon_object = {
-            "id": pokemon_id,
-            "ownerid": user_id,
-            "OT": user_id,
-            "name": pokemon_name,
-            "gender": gender,
-            "ability": ability,
-            "nickname": "",
-            "friendship": 0,
-            "favorite": False,
-            "level": random.randint(1, 30),
-            "exp": base_experience,
-            "expcap": level ** 3,
-            "nature": random.choice(natlist),
-            "hpiv": random.randint(1, 31),
-            "atkiv": random.randint(1, 31),
-            "defiv": random.randint(1, 31),
-            "spatkiv": random.randint(1, 31),
-            "spdiv": random.randint(1, 31),
-            "speiv": random.randint(1, 31),
-            "hpev": 0,
-            "atkev": 0,
-            "defev": 0,
-            "spatkev": 0,
-            "spdefev": 0,
-            "speedev": 0,
-            "move 1": move1,
-            "move 2": move2,
-            "move 3": move3,
-            "move 4": move4,
-            "image_url": image_url,
-            "selected": False,
-            "helditem": "",
-            "is_shiny": False
-        }
-
-        # Append the Pokémon object to the user's collection
-        user_collection.append(pokemon_object)
-
-        # Update the collections dictionary with the modified user collection
-        collections[str(user_id)] = user_collection
-
-        # Save the updated collections back to the file
-        with open('collections.json', 'w') as file:
-            json.dump(collections, file, indent=4)
-
-    def get_pokemon_image_url(self, pokemon_name):
-        """Get the image URL for a Pokémon from PokeAPI."""
-        pokemon_url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}"
-        response = requests.get(pokemon_url)
-        if response.status_code == 200:
-            pokemon_data = response.json()
-            return pokemon_data['sprites']['other']['official-artwork']['front_default']
-        else:
-            return None
-
-    def select_ability(self, pokemon_name, hidden_ability_probability):
-        """Select an ability for the Pokémon."""
-        
-        # Fetch the Pokémon resource based on the name from PokeAPI
-        pokemon_url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}"
-        response = requests.get(pokemon_url)
-        if response.status_code == 200:
-            pokemon_data = response.json()
-            abilities = [ability['ability']['name'] for ability in pokemon_data['abilities']]
-        else:
-            print(f"Error fetching Pokémon data for {pokemon_name}")
-            abilities = []
-        
-        hidden_abilities = [ability for ability in abilities if self.is_hidden_ability(ability)]
-
-        if hidden_abilities:
-            # If hidden abilities are available, randomly select one based on probability
-            if random.random() < hidden_ability_probability:
-                return random.choice(hidden_abilities)
-        
-        # If no hidden abilities or probability not met, choose a regular ability
-        return random.choice(abilities)
-
-    def is_hidden_ability(self, ability_name):
-        """Check if the ability is a hidden ability."""
-        ability_url = f"https://pokeapi.co/api/v2/ability/{ability_name}"
-        response = requests.get(ability_url)
-        if response.status_code == 200:
-            ability_data = response.json()
-            return ability_data.get("is_hidden", False)
-        else:
-            print(f"Error fetching ability data for {ability_name}")
-            return False
+            await ctx.send(f"{ctx.author.name} attacked the raid boss with {snapshot['pokemon_name']} for {damage} damage! Raid boss HP: {raid['hp']}")
+            self.request_status_update(ctx.channel.id)
 
 async def setup(bot):
     await bot.add_cog(Raids(bot))
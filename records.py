@@ -0,0 +1,216 @@
+import marshal
+import sys
+from array import array
+from collections.abc import MutableMapping
+
+# Dict keys stored in named slots, in the order PokemonFactory writes them
+SLOT_KEYS = {
+    "id": "id",
+    "ownerid": "ownerid",
+    "OT": "OT",
+    "name": "name",
+    "gender": "gender",
+    "ability": "ability",
+    "nickname": "nickname",
+    "friendship": "friendship",
+    "favorite": "favorite",
+    "level": "level",
+    "exp": "exp",
+    "expcap": "expcap",
+    "nature": "nature",
+    "move 1": "move1",
+    "move 2": "move2",
+    "move 3": "move3",
+    "move 4": "move4",
+    "image_url": "image_url",
+    "selected": "selected",
+    "helditem": "helditem",
+    "is_shiny": "is_shiny",
+}
+
+# IVs and EVs are kept as small ints in one array instead of twelve dict entries
+STAT_KEYS = ["hpiv", "atkiv", "defiv", "spatkiv", "spdiv", "speiv", "hpev", "atkev", "defev", "spatkev", "spdefev", "speedev"]
+STAT_INDEX = {key: index for index, key in enumerate(STAT_KEYS)}
+
+SLOTS = tuple(SLOT_KEYS.values())
+
+# Every known key in dict order, so to_dict() reproduces the original layout
+KEYS = list(SLOT_KEYS)[:13] + STAT_KEYS + list(SLOT_KEYS)[13:]
+
+# String values repeated across many Pokémon are shared instead of stored once per Pokémon
+INTERNED_KEYS = {"name", "gender", "ability", "nature", "move 1", "move 2", "move 3", "move 4", "image_url", "helditem"}
+
+ABSENT = -32768  # marks a stat that is missing or held in extra
+
+class PokemonRecord(MutableMapping):
+    """
+    A compact stand-in for the 35-key dict describing one caught Pokémon.
+
+    Known fields live in __slots__ and the twelve IVs and EVs in a single
+    array of 16-bit ints, so a record costs a fraction of the equivalent
+    dict. It behaves like the dict it replaces (pokemon['level'],
+    pokemon.get('nickname'), pokemon['selected'] = True), so cogs do not
+    need to know which one they hold. Keys the record does not know about,
+    and stat values that are not small ints, are kept in an overflow dict,
+    so converting to and from the dict format is lossless.
+    """
+    __slots__ = SLOTS + ("stats", "extra")
+
+    def __init__(self):
+        self.stats = array('h', [ABSENT] * len(STAT_KEYS))
+        self.extra = None  # dict of unknown keys, created on first use
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Creates a record from the dict format.
+
+        Parameters:
+            data (dict): A Pokémon as stored in collections.json.
+
+        Returns:
+            PokemonRecord: The equivalent record.
+        """
+        record = cls()
+        for key, value in data.items():
+            record[key] = value
+        return record
+
+    def to_dict(self):
+        """
+        Returns the Pokémon in the dict format, with the keys in their original order.
+        """
+        return {key: self[key] for key in self}
+
+    def copy(self):
+        """
+        Returns a deep copy, made slot by slot instead of through the dict format.
+        """
+        record = PokemonRecord.__new__(PokemonRecord)
+        for slot in SLOTS:
+            try:
+                setattr(record, slot, getattr(self, slot))
+            except AttributeError:
+                pass
+        record.stats = self.stats[:]
+        # Overflow values are plain JSON-like data
+        record.extra = None if self.extra is None else marshal.loads(marshal.dumps(self.extra))
+        return record
+
+    def __reduce__(self):
+        # Lets pickle and copy.deepcopy rebuild the record from its slots
+        values = {}
+        for slot in SLOTS:
+            try:
+                values[slot] = getattr(self, slot)
+            except AttributeError:
+                pass
+        return restore_record, (values, self.stats.tobytes(), self.extra)
+
+    def __getitem__(self, key):
+        if key in SLOT_KEYS:
+            try:
+                return getattr(self, SLOT_KEYS[key])
+            except AttributeError:
+                raise KeyError(key) from None
+        if key in STAT_INDEX:
+            value = self.stats[STAT_INDEX[key]]
+            if value != ABSENT:
+                return value
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key in SLOT_KEYS:
+            if key in INTERNED_KEYS and type(value) is str:
+                value = sys.intern(value)
+            setattr(self, SLOT_KEYS[key], value)
+            return
+        if key in STAT_INDEX:
+            # bool is an int subclass; keep it in extra so it round-trips as a bool
+            if type(value) is int and 0 <= value <= 32767:
+                self.stats[STAT_INDEX[key]] = value
+                if self.extra is not None:
+                    self.extra.pop(key, None)
+                return
+            self.stats[STAT_INDEX[key]] = ABSENT
+        if self.extra is None:
+            self.extra = {}
+        self.extra[key] = value
+
+    def __delitem__(self, key):
+        if key in SLOT_KEYS:
+            try:
+                delattr(self, SLOT_KEYS[key])
+            except AttributeError:
+                raise KeyError(key) from None
+            return
+        if key in STAT_INDEX and self.stats[STAT_INDEX[key]] != ABSENT:
+            self.stats[STAT_INDEX[key]] = ABSENT
+            return
+        if self.extra is None or key not in self.extra:
+            raise KeyError(key)
+        del self.extra[key]
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        for key in KEYS:
+            if key in self:
+                yield key
+        if self.extra is not None:
+            for key in self.extra:
+                if key not in STAT_INDEX:
+                    yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"PokemonRecord({self.to_dict()!r})"
+
+def restore_record(values, stats, extra):
+    """
+    Rebuilds a record from the state returned by PokemonRecord.__reduce__().
+    """
+    record = PokemonRecord.__new__(PokemonRecord)
+    for slot, value in values.items():
+        setattr(record, slot, value)
+    record.stats = array('h')
+    record.stats.frombytes(stats)
+    record.extra = extra
+    return record
+
+def decode_collections(collections):
+    """
+    Converts every Pokémon in a collections document to a PokemonRecord, in place.
+
+    Parameters:
+        collections (dict): User ID -> list of Pokémon dicts.
+
+    Returns:
+        dict: The same document.
+    """
+    for user_collection in collections.values():
+        for index, pokemon in enumerate(user_collection):
+            if isinstance(pokemon, dict):
+                user_collection[index] = PokemonRecord.from_dict(pokemon)
+    return collections
+
+def copy_records(value):
+    """
+    Returns a deep copy of JSON-like data holding records, copying each record with PokemonRecord.copy().
+    """
+    if type(value) is PokemonRecord:
+        return value.copy()
+    if isinstance(value, list):
+        return [copy_records(item) for item in value]
+    if isinstance(value, dict):
+        return {key: copy_records(item) for key, item in value.items()}
+    return value
@@ -0,0 +1,107 @@
+import time
+from collections import OrderedDict
+
+class ResponseCache:
+    """
+    A bounded cache of API responses with separate lifetimes for hits and misses.
+
+    Found documents live for ttl seconds and "not found" answers (stored as
+    None) for negative_ttl seconds, so a misspelled name is not looked up
+    again on every call but a resource added later still shows up.
+
+    The cache is bounded by the size of the responses rather than their
+    number, since a /pokemon document can be hundreds of times larger than
+    a /move one. Each entry is charged the length of its JSON body (the
+    parsed objects take several times that in memory), and the least
+    recently used entries are evicted until the total fits max_bytes.
+    """
+    def __init__(self, max_bytes=16 * 1024 * 1024, ttl=6 * 3600, negative_ttl=600):
+        """
+        Initializes the cache.
+
+        Parameters:
+            max_bytes (int): The total JSON size of the responses to keep.
+            ttl (float): Seconds a found document is served from the cache.
+            negative_ttl (float): Seconds a "not found" answer is served from the cache.
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.entries = OrderedDict()  # key -> (expiry time, document or None, size), least recently used first
+        self.bytes = 0  # total size of the entries
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Looks up a response.
+
+        Returns:
+            tuple: (True, document) on a hit, where document is None for a cached
+            "not found", or (False, None) if the key is missing or expired.
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                self.discard(key)
+            self.misses += 1
+            return False, None
+        self.entries.move_to_end(key)
+        if entry[1] is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return True, entry[1]
+
+    def put(self, key, document, size=0):
+        """
+        Stores a response. Pass None to remember that the resource does not exist.
+
+        Parameters:
+            key (str): The cache key, usually the URL.
+            document: The parsed response, or None for "not found".
+            size (int): The length of the response body in bytes. Every entry is
+                also charged the length of its key, so "not found" answers count too.
+        """
+        self.discard(key)
+        size += len(key)
+        # A response larger than the whole cache would only evict everything else
+        if size > self.max_bytes:
+            return
+        ttl = self.negative_ttl if document is None else self.ttl
+        self.entries[key] = (time.monotonic() + ttl, document, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            evicted = self.entries.popitem(last=False)[1]
+            self.bytes -= evicted[2]
+            self.evictions += 1
+
+    def discard(self, key):
+        """
+        Removes an entry if it is cached.
+        """
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        """
+        Returns the cache counters as a dict.
+        """
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+        }
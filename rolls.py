@@ -0,0 +1,108 @@
+import random
+
+# Optional vectorized rolling; the bot runs on the standard library alone
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+IV_KEYS = ['hpiv', 'atkiv', 'defiv', 'spatkiv', 'spdiv', 'speiv']
+
+class StatRolls:
+    """
+    The random parts of a batch of new Pokémon, one list entry per Pokémon.
+
+    Attributes:
+        levels (list): Levels.
+        ivs (list): Six IVs per Pokémon, in IV_KEYS order.
+        natures (list): Indexes into the nature list.
+        genders (list): 'Male', 'Female' or None.
+        shiny (list): Shiny flags.
+    """
+    def __init__(self, levels, ivs, natures, genders, shiny):
+        self.levels = levels
+        self.ivs = ivs
+        self.natures = natures
+        self.genders = genders
+        self.shiny = shiny
+
+    def __len__(self):
+        return len(self.levels)
+
+class StatRoller:
+    """
+    Rolls levels, IVs, natures, genders and shiny flags for many Pokémon at once.
+
+    With NumPy installed a batch is a handful of vectorized draws instead of
+    nine Python random calls per Pokémon; without it the same rolls are made
+    with the random module. Pass a seed to make a run reproducible, e.g. to
+    benchmark or replay a large simulated grant. Seeded runs are only
+    reproducible with the same backend, since NumPy and random draw
+    different sequences.
+    """
+    def __init__(self, seed=None, use_numpy=True):
+        """
+        Initializes the roller.
+
+        Parameters:
+            seed (int, optional): Seed for the generator. Unseeded rolls use fresh entropy.
+            use_numpy (bool): Use NumPy when it is installed.
+        """
+        self.seed(seed, use_numpy)
+
+    def seed(self, seed=None, use_numpy=True):
+        """
+        Restarts the generator from a seed.
+        """
+        if use_numpy and numpy is not None:
+            self.generator = numpy.random.default_rng(seed)
+            self.vectorized = True
+        else:
+            self.generator = random.Random(seed)
+            self.vectorized = False
+
+    def roll(self, count, level_range=(1, 30), gender_rate=-1, nature_count=25, shiny_rate=0.0):
+        """
+        Rolls a batch.
+
+        Parameters:
+            count (int): The number of Pokémon.
+            level_range (tuple): The lowest and highest level, inclusive.
+            gender_rate (int): The species' gender rate in eighths; -1 for genderless.
+            nature_count (int): The number of natures to pick from.
+            shiny_rate (float): The chance of each Pokémon being shiny.
+
+        Returns:
+            StatRolls: The rolls, as plain Python lists ready to store.
+        """
+        low, high = level_range
+        if self.vectorized:
+            generator = self.generator
+            levels = generator.integers(low, high + 1, count).tolist()
+            ivs = generator.integers(1, 32, (count, len(IV_KEYS))).tolist()
+            natures = generator.integers(0, nature_count, count).tolist()
+            males = (generator.random(count) < gender_rate / 8).tolist()
+            shiny = (generator.random(count) < shiny_rate).tolist()
+        else:
+            generator = self.generator
+            levels = [generator.randint(low, high) for _ in range(count)]
+            ivs = [[generator.randint(1, 31) for _ in IV_KEYS] for _ in range(count)]
+            natures = [generator.randrange(nature_count) for _ in range(count)]
+            males = [generator.random() < gender_rate / 8 for _ in range(count)]
+            shiny = [generator.random() < shiny_rate for _ in range(count)]
+
+        if gender_rate == -1:
+            genders = [None] * count  # Genderless
+        elif gender_rate == 0:
+            genders = ['Female'] * count
+        elif gender_rate == 8:
+            genders = ['Male'] * count
+        else:
+            genders = ['Male' if male else 'Female' for male in males]
+        return StatRolls(levels, ivs, natures, genders, shiny)
+
+    def random(self):
+        """
+        Returns one uniform number in [0, 1) from the same generator.
+        """
+        return float(self.generator.random())
@@ -1,20 +1,24 @@
-import requests
 import random
-from discord.ext import commands, tasks
-import json
+import time
+from collections import Counter
+import discord
+from discord.ext import commands
 import asyncio
+from datastore import store
+from factory import factory
+from encounters import EncounterTables
+from scheduler import TimerHeap
+from species import species
+from notifications import notifications
 
-natlist = ['Lonely', 'Brave', 'Adamant', 'Naughty', 'Bold', 'Relaxed', 'Impish', 'Lax', 'Timid', 'Hasty', 'Jolly', 'Naive', 'Modest', 'Mild', 'Quiet', 'Rash', 'Calm', 'Gentle', 'Sassy', 'Careful', 'Bashful', 'Quirky', 'Serious', 'Docile', 'Hardy']
+FIRST_ENCOUNTER_DELAY = 10  # Seconds from the start of an expedition to its first encounter
+EXPEDITION_DURATION = 0.5 * 60 * 60  # Seconds an expedition lasts; 24*60*60
+PASSIVE_ENCOUNTER_INTERVAL = 30  # Seconds between passive encounters while on an expedition
 
 def has_started():
     async def predicate(ctx):
         user_id = str(ctx.author.id)
-        try:
-            with open('user_data.json', 'r') as file:
-                user_data = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("Error: User data not found.")
-            return False
+        user_data = store.load('user_data.json')
         
         # Check if the user has started by looking for their ID in the user_data
         if user_id in user_data:
@@ -30,110 +34,94 @@ class Safari(commands.Cog):
     def __init__(self, bot):
         """Initialize the Safari cog."""
         self.bot = bot
-        self.expedition_running = {}  # Dictionary to track running expeditions for each user
-        self.encounter_rates = self.load_encounter_rates()  # Load encounter rates from JSON file
+        self.encounters = EncounterTables('encounter_rates.json')  # Encounter tables, recompiled when the file changes
         self.expedition_levels = self.load_expedition_levels()  # Load expedition levels from JSON file
         self.expedition_locations = {}  # Stores expedition locations for each user
+        # One timer task drives every expedition; the expeditions themselves live in expeditions.json
+        self.expedition_timers = TimerHeap(self.on_expedition_timer)
+        self.resume_expeditions()
+        self.expedition_timers.start()
+
+    def resume_expeditions(self):
+        """Reschedule the expeditions saved in expeditions.json, e.g. after a restart or cog reload."""
+        for key, expedition in store.load('expeditions.json').items():
+            user_id = int(key)
+            self.expedition_locations[user_id] = expedition['location']
+            # Overdue events fire straight away
+            if expedition['found']:
+                # Expeditions saved before encounters were caught up lazily count from their first encounter
+                expedition.setdefault('settled', expedition['start'] + FIRST_ENCOUNTER_DELAY)
+                self.expedition_timers.schedule(user_id, expedition['end'], 'end')
+            else:
+                self.expedition_timers.schedule(user_id, expedition['start'] + FIRST_ENCOUNTER_DELAY, 'found')
 
-        # Start the passive encounter task
-        self.passive_encounter_task.start()
-
-    def select_ability(self, pokemon_name, hidden_ability_probability):
-        """Select an ability for the Pokémon."""
-        
-        # Fetch the Pokémon resource based on the name from PokeAPI
-        pokemon_url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}"
-        response = requests.get(pokemon_url)
-        if response.status_code == 200:
-            pokemon_data = response.json()
-            abilities = [ability['ability']['name'] for ability in pokemon_data['abilities']]
-        else:
-            print(f"Error fetching Pokémon data for {pokemon_name}")
-            abilities = []
-        
-        hidden_abilities = [ability for ability in abilities if self.is_hidden_ability(ability)]
-
-        if hidden_abilities:
-            # If hidden abilities are available, randomly select one based on probability
-            if random.random() < hidden_ability_probability:
-                return random.choice(hidden_abilities)
-        
-        # If no hidden abilities or probability not met, choose a regular ability
-        return random.choice(abilities)
-
-    def is_hidden_ability(self, ability_name):
-        """Check if the ability is a hidden ability."""
-        ability_url = f"https://pokeapi.co/api/v2/ability/{ability_name}"
-        response = requests.get(ability_url)
-        if response.status_code == 200:
-            ability_data = response.json()
-            return ability_data.get("is_hidden", False)
-        else:
-            print(f"Error fetching ability data for {ability_name}")
-            return False
-    
     async def update_pokemon_ids(self, user_id, user_pokemon):
         """Update the IDs of Pokémon in a user's collection."""
         for index, pokemon in enumerate(user_pokemon, start=1):
             pokemon['id'] = index
         return user_pokemon
     
-    def load_encounter_rates(self):
-        """Load encounter rates from the encounter_rates.json file."""
-        try:
-            with open('encounter_rates.json', 'r') as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return {}
-
     def cog_unload(self):
         """Cleanup tasks when the cog is unloaded."""
-        # Stop the passive encounter task when the cog is unloaded
-        self.passive_encounter_task.cancel()
-
-    @tasks.loop(minutes=0.5)  # Trigger every 0.5 minutes
-    async def passive_encounter_task(self):
-        """Task to trigger passive encounters for users on expeditions."""
-        for user_id in self.expedition_running.keys():
-            # Trigger passive encounter for each user on an expedition
-            await self.trigger_passive_encounter(user_id)
-
-    async def trigger_passive_encounter(self, user_id):
-        """Trigger a passive encounter for a user on an expedition."""
-        # Get expedition location and level for the user
-        expedition_location = self.expedition_locations.get(user_id, "forest")
-        expedition_level = self.expedition_levels.get(user_id, 1)
-
-        # Get encounter rates for the specified location and level
-        location_encounter_rates = self.encounter_rates.get(expedition_location, {}).get(str(expedition_level), {})
-        
-        # Determine encounter probabilities for each Pokémon species
-        total_encounter_rate = sum(location_encounter_rates.values())
-        encounter_probabilities = {pokemon: rate / total_encounter_rate for pokemon, rate in location_encounter_rates.items()}
-        
-        # Randomly select a Pokémon species based on encounter probabilities
-        pokemon_found = random.choices(list(encounter_probabilities.keys()), weights=list(encounter_probabilities.values()))[0]
-
-        # Save the found Pokémon to the user's collection
-        self.save_pokemon_to_collection(user_id, pokemon_found)
-
-        # Inform the user about the passive encounter
-        user = await self.bot.fetch_user(user_id)
-        if user:
-            await user.send(f"A wild {pokemon_found} appeared during your expedition in the {expedition_location}!")
+        # Stop the expedition timers when the cog is unloaded; the expeditions stay saved
+        self.expedition_timers.stop()
+
+    async def catch_up(self, user_id, until=None):
+        """
+        Award the passive encounters a user has earned on their expedition since the last catch-up.
+
+        Passive encounters are not rolled on a timer. Instead, whenever the user
+        runs a command (and when the expedition ends), the elapsed time is turned
+        into the number of encounter ticks that have passed, and that many
+        encounters are rolled and saved in one batch. Each tick is an
+        independent roll from the same table, exactly as a ticking loop would
+        make it, so the results are the same while idle expeditions cost nothing.
+
+        Parameters:
+            user_id (int): The user.
+            until (float, optional): Count ticks up to this timestamp instead of now.
+
+        Returns:
+            list: The species encountered.
+        """
+        expedition = store.load('expeditions.json').get(str(user_id))
+        if expedition is None or not expedition['found']:
+            return []
+        now = min(until or time.time(), expedition['end'])
+        ticks = int((now - expedition['settled']) // PASSIVE_ENCOUNTER_INTERVAL)
+        if ticks <= 0:
+            return []
+
+        # Claim the ticks before awaiting anything, so a concurrent catch-up cannot count them again
+        expedition['settled'] += ticks * PASSIVE_ENCOUNTER_INTERVAL
+        store.mark_dirty('expeditions.json', user_id)
+
+        # Roll every encounter in one batch
+        level = self.expedition_levels.get(str(user_id), 1)
+        found = [pokemon for pokemon in self.encounters.draw_many([(expedition['location'], level)] * ticks) if pokemon is not None]
+        if not found:
+            return []
+
+        # Look each species up once, then save the whole batch in one commit
+        counts = Counter(found)
+        names = sorted(counts)
+        entries = dict(zip(names, await asyncio.gather(*(species.get(name) for name in names))))
+        for name in names:
+            factory.add(user_id, factory.build(user_id, name, entries[name], counts[name]))
+        store.request_flush()
+
+        # Inform the user about the passive encounters in one message
+        summary = ", ".join(f"{counts[name]}x {name}" for name in names)
+        notifications.notify(user_id, f"During your expedition in the {expedition['location']} you encountered: {summary}!")
+        return found
 
     def load_expedition_levels(self):
         """Load expedition levels from the expedition_levels.json file."""
-        try:
-            with open('expedition_levels.json', 'r') as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return {}
+        return store.load('expedition_levels.json')
 
-    def save_expedition_levels(self):
-        """Save expedition levels to the expedition_levels.json file."""
-        with open('expedition_levels.json', 'w') as file:
-            json.dump(self.expedition_levels, file, indent=4)
+    def save_expedition_levels(self, user_id):
+        """Mark a user's expedition level for saving to the expedition_levels.json file."""
+        store.mark_dirty('expedition_levels.json', user_id)
 
     @commands.command()
     @has_started()
@@ -146,7 +134,7 @@ class Safari(commands.Cog):
             await ctx.send("You need to start your adventure first before going on a safari!")
             return
 
-        if user_id in self.expedition_running:
+        if str(user_id) in store.load('expeditions.json'):
             await ctx.send("You're already on an expedition. Please wait for it to finish.")
             return
 
@@ -158,198 +146,91 @@ class Safari(commands.Cog):
         # Set initial expedition level and location for the user if not already set
         if str(user_id) in self.expedition_levels:
             self.expedition_locations[user_id] = location.lower()
-            self.save_expedition_levels()  # Save updated expedition levels to JSON file
+            self.save_expedition_levels(user_id)  # Save updated expedition levels to JSON file
         else:
             # If user doesn't already have an entry, save the location and level    
-            self.expedition_levels[user_id] = 1
+            self.expedition_levels[str(user_id)] = 1
             self.expedition_locations[user_id] = location.lower()
-            self.save_expedition_levels()  # Save updated expedition location to JSON file
+            self.save_expedition_levels(user_id)  # Save updated expedition location to JSON file
+
+        # Save the expedition so it survives restarts; the expedition timers take it from here
+        start = time.time()
+        store.load('expeditions.json')[str(user_id)] = {
+            "location": location.lower(),
+            "channel_id": ctx.channel.id,
+            "start": start,
+            "end": start + EXPEDITION_DURATION,
+            "found": False
+        }
+        store.mark_dirty('expeditions.json', user_id)
+        self.expedition_timers.schedule(user_id, start + FIRST_ENCOUNTER_DELAY, 'found')
 
         await ctx.send(f"Starting an expedition in the {location.lower()}...")
 
-        # Simulate expedition duration (e.g., 10 seconds for demonstration)
-        await asyncio.sleep(10)
-
-        # Generate a random Pokémon based on expedition level and location
-        pokemon_found = await self.generate_pokemon(user_id)
-
-        await ctx.send(f"You found a wild {pokemon_found}!")
-
-        # Add the user to the list of running expeditions
-        self.expedition_running[user_id] = True
+    async def on_expedition_timer(self, user_id, event):
+        """Handle an expedition's first encounter ('found') or its end ('end')."""
+        expeditions = store.load('expeditions.json')
+        expedition = expeditions.get(str(user_id))
+        if expedition is None:
+            return
+        channel = self.bot.get_channel(expedition['channel_id'])
 
-        # End expedition after 24 hours
-        await asyncio.sleep(0.5 * 60 * 60)  # 24*60*60
+        if event == 'found':
+            # Record the encounter and schedule the end before anything that can fail, so a failed
+            # lookup or message never strands the expedition; passive encounters count from here
+            expedition['found'] = True
+            expedition['settled'] = time.time()
+            store.mark_dirty('expeditions.json', user_id)
+            self.expedition_timers.schedule(user_id, expedition['end'], 'end')
 
-        await ctx.send("Expedition completed!")
+            # Generate a random Pokémon based on expedition level and location
+            pokemon_found = await self.generate_pokemon(user_id)
 
-        # Remove user from running expeditions
-        del self.expedition_running[user_id]
+            if pokemon_found is None:
+                message = f"<@{user_id}> No Pokémon were found in the {expedition['location']} at your expedition level."
+            else:
+                message = f"<@{user_id}> You found a wild {pokemon_found}!"
+            await self.announce(channel, message)
+        elif event == 'end':
+            # Award the encounters still owed before the expedition is removed
+            await self.catch_up(user_id, expedition['end'])
+            del expeditions[str(user_id)]
+            store.mark_dirty('expeditions.json', user_id)
+            await self.announce(channel, f"<@{user_id}> Expedition completed!")
+
+    async def announce(self, channel, message):
+        """Send an expedition update to its channel, if the channel still exists and allows it."""
+        if channel is None:
+            return
+        try:
+            await channel.send(message)
+        except discord.HTTPException as e:
+            print(f"Error sending expedition update to channel {channel.id}: {e}")
 
     def has_user_data(self, user_id):
         """Check if the user has an entry in user_data.json."""
-        try:
-            with open('user_data.json', 'r') as file:
-                user_data = json.load(file)
-                return str(user_id) in user_data
-        except FileNotFoundError:
-            return False
+        return str(user_id) in store.load('user_data.json')
 
     async def generate_pokemon(self, user_id, passive=False):
         """Generate a random Pokémon based on expedition level and location."""
         if passive:
             # Passive encounter: Generate Pokémon without expedition context
-            expedition_location = random.choice(list(self.encounter_rates.keys()))
-            expedition_level = random.choice(list(self.encounter_rates[expedition_location].keys()))
+            expedition_location = random.choice(self.encounters.locations())
+            expedition_level = random.choice(self.encounters.levels(expedition_location))
         else:
             # Active encounter: Use the user's expedition location and level
             expedition_location = self.expedition_locations.get(user_id, "forest")
-            expedition_level = self.expedition_levels.get(user_id, 1)
+            expedition_level = self.expedition_levels.get(str(user_id), 1)
 
-        # Get encounter rates for the specified location and level
-        location_encounter_rates = self.encounter_rates.get(expedition_location, {}).get(str(expedition_level), {})
-        
-        # Determine encounter probabilities for each Pokémon species
-        total_encounter_rate = sum(location_encounter_rates.values())
-        encounter_probabilities = {pokemon: rate / total_encounter_rate for pokemon, rate in location_encounter_rates.items()}
-        
-        # Randomly select a Pokémon species based on encounter probabilities
-        pokemon_found = random.choices(list(encounter_probabilities.keys()), weights=list(encounter_probabilities.values()))[0]
+        # Roll the species from the precompiled table for the location and level
+        pokemon_found = self.encounters.draw(expedition_location, expedition_level)
+        if pokemon_found is None:
+            return None
 
         # Save the found Pokémon to the user's collection
-        self.save_pokemon_to_collection(user_id, pokemon_found)
+        await factory.generate(user_id, pokemon_found)
 
         return pokemon_found
 
-    def get_pokemon_image_url(self, pokemon_name):
-        """Get the image URL for a Pokémon from PokeAPI."""
-        pokemon_url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}"
-        response = requests.get(pokemon_url)
-        if response.status_code == 200:
-            pokemon_data = response.json()
-            return pokemon_data['sprites']['other']['official-artwork']['front_default']
-        else:
-            return None
-    
-    def save_pokemon_to_collection(self, user_id, pokemon_name):
-        """Save a found Pokémon to the user's collection."""
-        # Load the existing collections from the file
-        try:
-            with open('collections.json', 'r') as file:
-                collections = json.load(file)
-        except FileNotFoundError:
-            collections = {}
-
-        # Get the user's collection or create an empty list if it doesn't exist
-        user_collection = collections.get(str(user_id), [])
-
-        # Generate a unique ID for the new Pokémon
-        pokemon_id = len(user_collection) + 1  # IDs start from 1 and increment by 1
-
-        # Get random moves for the Pokémon
-        level = random.randint(1, 30)
-        move1 = move2 = move3 = move4 = "tackle"
-
-        try:
-            # Get the Pokémon data from PokeAPI
-            pokemon_url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}"
-            response = requests.get(pokemon_url)
-            if response.status_code == 200:
-                pokemon_data = response.json()
-                pokemon_species_url = pokemon_data['species']['url']
-                species_response = requests.get(pokemon_species_url)
-                if species_response.status_code == 200:
-                    species_data = species_response.json()
-                    abilities = [ability['ability']['name'] for ability in pokemon_data['abilities']]
-                    base_experience = pokemon_data['base_experience']
-                    gender_rate = species_data['gender_rate']
-                    hidden_ability_probability = 0.33  # Example probability for hidden ability
-                else:
-                    print(f"Error fetching species information for {pokemon_name}")
-                    abilities = []
-                    base_experience = 0
-                    gender_rate = -1
-                    hidden_ability_probability = 0.33
-            else:
-                print(f"Error fetching Pokémon data for {pokemon_name}")
-                abilities = []
-                base_experience = 0
-                gender_rate = -1
-                hidden_ability_probability = 0.33
-        except Exception as e:
-            print(f"Error fetching Pokémon information for {pokemon_name}: {e}")
-            abilities = []
-            base_experience = 0
-            gender_rate = -1
-            hidden_ability_probability = 0.33
-
-        # Determine the gender based on gender rate
-        if gender_rate == -1:
-            gender = None  # Genderless
-        elif gender_rate == 0:
-            gender = 'Female'
-        elif gender_rate == 8:
-            gender = 'Male'
-        else:
-            if random.random() < gender_rate / 8:
-                gender = 'Male'
-            else:
-                gender = 'Female'
-
-
-        # Randomly select an ability considering hidden abilities
-        if abilities:
-            ability = self.select_ability(pokemon_name, hidden_ability_probability)  
-
-        # Get image URL for the Pokémon
-        image_url = self.get_pokemon_image_url(pokemon_name)
-
-        # Create a Pokémon object
-        pokemon_object = {
-            "id": pokemon_id,
-            "ownerid": user_id,
-            "OT": user_id,
-            "name": pokemon_name,
-            "gender": gender,
-            "ability": ability,
-            "nickname": "",
-            "friendship": 0,
-            "favorite": False,
-            "level": level,
-            "exp": base_experience,
-            "expcap": level ** 3,
-            "nature": random.choice(natlist),
-            "hpiv": random.randint(1, 31),
-            "atkiv": random.randint(1, 31),
-            "defiv": random.randint(1, 31),
-            "spatkiv": random.randint(1, 31),
-            "spdiv": random.randint(1, 31),
-            "speiv": random.randint(1, 31),
-            "hpev": 0,
-            "atkev": 0,
-            "defev": 0,
-            "spatkev": 0,
-            "spdefev": 0,
-            "speedev": 0,
-            "move 1": move1,
-            "move 2": move2,
-            "move 3": move3,
-            "move 4": move4,
-            "image_url": image_url,
-            "selected": False,
-            "helditem": "",
-            "is_shiny": False
-        }
-
-        # Append the Pokémon object to the user's collection
-        user_collection.append(pokemon_object)
-
-        # Update the collections dictionary with the modified user collection
-        collections[str(user_id)] = user_collection
-
-        # Save the updated collections back to the file
-        with open('collections.json', 'w') as file:
-            json.dump(collections, file, indent=4)
-
 async def setup(bot):
     await bot.add_cog(Safari(bot))
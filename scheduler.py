@@ -0,0 +1,103 @@
+import asyncio
+import heapq
+import itertools
+import time
+
+class TimerHeap:
+    """
+    Runs timed events from a single task, ordered by a heap of due times.
+
+    Each key has at most one pending event; scheduling a key again replaces
+    its event, and cancel() drops it. Superseded heap entries are skipped
+    when they reach the top instead of being searched for. Due times are
+    wall-clock timestamps, so events loaded from disk after a restart fire
+    at the right moment, or straight away if they are overdue.
+    """
+    def __init__(self, handler):
+        """
+        Initializes an empty heap.
+
+        Parameters:
+            handler: A coroutine function called as handler(key, event) when an event is due.
+        """
+        self.handler = handler
+        self.heap = []  # (due, sequence, key), earliest first
+        self.timers = {}  # key -> (due, sequence, event) of its current event
+        self.sequence = itertools.count()
+        self.wakeup = None
+        self.task = None
+        self.running = set()  # Handler tasks still running
+
+    def schedule(self, key, due, event=None):
+        """
+        Schedules an event, replacing any pending event for the key.
+
+        Parameters:
+            key: Identifies the timer, e.g. a user ID.
+            due (float): When to fire, as a time.time() timestamp.
+            event: Passed to the handler.
+        """
+        sequence = next(self.sequence)
+        self.timers[key] = (due, sequence, event)
+        heapq.heappush(self.heap, (due, sequence, key))
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    def cancel(self, key):
+        """
+        Drops the pending event for a key, if any.
+        """
+        self.timers.pop(key, None)
+
+    def pending(self, key):
+        """
+        Returns (due, event) for a key's pending event, or None.
+        """
+        timer = self.timers.get(key)
+        return (timer[0], timer[2]) if timer is not None else None
+
+    def start(self):
+        """
+        Starts the timer task. Call from inside the running event loop.
+        """
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self):
+        while True:
+            # Skip entries whose event was replaced or cancelled
+            while self.heap and self.timers.get(self.heap[0][2], (None, None))[1] != self.heap[0][1]:
+                heapq.heappop(self.heap)
+
+            self.wakeup.clear()
+            if not self.heap:
+                await self.wakeup.wait()
+                continue
+            delay = self.heap[0][0] - time.time()
+            if delay > 0:
+                # Wake early if an earlier event is scheduled meanwhile
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, key = heapq.heappop(self.heap)
+            _, _, event = self.timers.pop(key)
+            task = asyncio.create_task(self.fire(key, event))
+            self.running.add(task)
+            task.add_done_callback(self.running.discard)
+
+    async def fire(self, key, event):
+        try:
+            await self.handler(key, event)
+        except Exception as e:
+            print(f"Error handling timer {key}: {e}")
+
+    def __len__(self):
+        return len(self.timers)
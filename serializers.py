@@ -0,0 +1,138 @@
+import json
+
+# Optional faster and binary formats; the bot runs on the standard library alone
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+def plain(value):
+    """
+    Converts objects the serializers do not support, such as Pokémon records, to plain data.
+    """
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+class JsonSerializer:
+    """
+    Serializes documents as JSON using the standard library.
+
+    Parameters:
+        indent (int, optional): Indentation for human-readable output. Compact separators are used when None.
+    """
+    def __init__(self, indent=None):
+        self.indent = indent
+        self.name = 'json-indent' if indent else 'json'
+
+    def dumps(self, value):
+        if self.indent:
+            return json.dumps(value, indent=self.indent, default=plain).encode()
+        return json.dumps(value, separators=(',', ':'), default=plain).encode()
+
+    def join(self, entries):
+        """
+        Returns the same bytes as dumps() of a dict, built from entries encoded separately.
+
+        Parameters:
+            entries (list): (key, dumps(value)) pairs.
+        """
+        if not entries:
+            return b'{}'
+        if self.indent:
+            # Nested values are indented one level deeper than when they were encoded on their own
+            newline = b'\n' + b' ' * self.indent
+            return b'{' + b','.join(newline + json.dumps(str(key)).encode() + b': ' + value.replace(b'\n', newline) for key, value in entries) + b'\n}'
+        return b'{' + b','.join(json.dumps(str(key)).encode() + b':' + value for key, value in entries) + b'}'
+
+    def loads(self, data):
+        return json.loads(data)
+
+class OrjsonSerializer:
+    """
+    Serializes documents as compact JSON using orjson, which is several times faster than json.
+    """
+    name = 'orjson'
+
+    def dumps(self, value):
+        return orjson.dumps(value, default=plain, option=orjson.OPT_NON_STR_KEYS)
+
+    def join(self, entries):
+        return b'{' + b','.join(orjson.dumps(str(key)) + b':' + value for key, value in entries) + b'}'
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+class MsgpackSerializer:
+    """
+    Serializes documents as MessagePack, a compact binary format.
+    """
+    name = 'msgpack'
+
+    def dumps(self, value):
+        return msgpack.packb(value, default=plain, use_bin_type=True)
+
+    def join(self, entries):
+        # A map header followed by each key and value
+        if len(entries) < 16:
+            header = bytes([0x80 | len(entries)])
+        elif len(entries) < 2 ** 16:
+            header = b'\xde' + len(entries).to_bytes(2, 'big')
+        else:
+            header = b'\xdf' + len(entries).to_bytes(4, 'big')
+        return header + b''.join(msgpack.packb(str(key), use_bin_type=True) + value for key, value in entries)
+
+    def loads(self, data):
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+SERIALIZERS = {
+    'json': JsonSerializer(),
+    'json-indent': JsonSerializer(indent=4),
+}
+if orjson is not None:
+    SERIALIZERS['orjson'] = OrjsonSerializer()
+if msgpack is not None:
+    SERIALIZERS['msgpack'] = MsgpackSerializer()
+
+def get_serializer(name=None):
+    """
+    Returns a serializer by name.
+
+    Parameters:
+        name (str, optional): 'json', 'json-indent', 'orjson' or 'msgpack'. Defaults to the
+            fastest compact JSON available.
+
+    Returns:
+        The serializer. Falls back to compact JSON if the requested library is not installed.
+    """
+    if name is None:
+        name = 'orjson' if 'orjson' in SERIALIZERS else 'json'
+    if name not in SERIALIZERS:
+        print(f"Serializer '{name}' is not available, falling back to compact JSON.")
+        return SERIALIZERS['json']
+    return SERIALIZERS[name]
+
+def loads(data):
+    """
+    Parses a document written by any of the serializers.
+
+    JSON documents always start with '{' or '[', which no MessagePack map or
+    array does, so files can switch format without a migration step: the old
+    format is still read and the next flush writes the new one.
+
+    Parameters:
+        data (bytes): The file contents.
+
+    Returns:
+        The parsed document.
+    """
+    if data.lstrip()[:1] in (b'{', b'['):
+        return SERIALIZERS.get('orjson', SERIALIZERS['json']).loads(data)
+    if msgpack is None:
+        raise ValueError("Data is not JSON and msgpack is not installed to read it.")
+    return SERIALIZERS['msgpack'].loads(data)
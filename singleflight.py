@@ -0,0 +1,46 @@
+import asyncio
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight call.
+
+    The first caller for a key starts the work; anyone asking for the same
+    key while it is still running waits for that call instead of starting
+    their own, and every waiter gets the same result (or the same
+    exception). Once the call finishes the key is forgotten, so later calls
+    start fresh. A waiter being cancelled does not cancel the shared call.
+    """
+    def __init__(self):
+        self.calls = {}  # key -> asyncio.Task running the shared call
+
+    async def run(self, key, function, *args):
+        """
+        Runs function(*args), or joins the call already running for key.
+
+        Parameters:
+            key: Identifies calls that can share a result, e.g. a URL.
+            function: A coroutine function.
+            *args: Arguments for function.
+
+        Returns:
+            The result of the shared call.
+        """
+        task = self.calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(function(*args))
+            self.calls[key] = task
+            task.add_done_callback(lambda done: self.finished(key, done))
+        return await asyncio.shield(task)
+
+    def finished(self, key, task):
+        if self.calls.get(key) is task:
+            del self.calls[key]
+        # Mark the exception as retrieved in case every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self):
+        """
+        Returns the number of calls currently running.
+        """
+        return len(self.calls)
@@ -0,0 +1,157 @@
+import random
+from datastore import store
+from pokeapi import pokeapi
+from singleflight import SingleFlight
+
+# PokeAPI stat names -> the keys used in pokedata.json and the cache
+STAT_NAMES = {
+    'hp': 'hp',
+    'attack': 'attack',
+    'defense': 'defense',
+    'special-attack': 'special_attack',
+    'special-defense': 'special_defense',
+    'speed': 'speed',
+}
+
+FIELDS = ('types', 'stats', 'abilities', 'gender_rate', 'base_experience', 'image_url')
+
+class SpeciesCache:
+    """
+    Species data (types, base stats, abilities, gender rate, base experience
+    and artwork) served from memory.
+
+    The cache is seeded from pokedata.json and kept in species_cache.json
+    through the data store. A species missing from it, or missing a field a
+    caller needs, is fetched from PokeAPI once and stored, so catching a
+    species the bot has seen before makes no HTTP requests at all. When
+    many lookups miss on the same species at once, such as every raid
+    participant receiving the boss, the species is fetched only once.
+
+    Each entry looks like:
+        {"types": ["grass", "poison"],
+         "stats": {"hp": 45, "attack": 49, ...},
+         "abilities": [{"name": "overgrow", "is_hidden": false}, ...],
+         "gender_rate": 1, "base_experience": 64, "image_url": "https://..."}
+    """
+    def __init__(self, cache_file='species_cache.json', seed_file='pokedata.json'):
+        """
+        Initializes the cache.
+
+        Parameters:
+            cache_file (str): The data store file holding fetched species.
+            seed_file (str): Local species data used before anything is fetched.
+        """
+        self.cache_file = cache_file
+        self.seed_file = seed_file
+        self.seeded = False
+        self.lookups = SingleFlight()  # species -> the fetch already in flight
+
+    def entries(self):
+        """
+        Returns the cached species keyed by lower-case name, seeding them on first use.
+        """
+        entries = store.load(self.cache_file)
+        if not self.seeded:
+            self.seeded = True
+            for name, data in store.load(self.seed_file).items():
+                if name.lower() not in entries:
+                    entries[name.lower()] = self.from_seed(data)
+        return entries
+
+    def from_seed(self, data):
+        """
+        Converts a pokedata.json entry. Seeds carry no hidden-ability flags, gender
+        rate, base experience or artwork, so those are fetched when first needed.
+        """
+        return {
+            "types": [name.lower() for name in data.get('types', [])],
+            "stats": dict(data.get('stats', {})),
+        }
+
+    async def get(self, name, *fields):
+        """
+        Returns the data for a species.
+
+        Parameters:
+            name (str): The species name.
+            *fields: The fields the caller needs. Defaults to all of them.
+
+        Returns:
+            dict: The species entry, or None if PokeAPI does not know the species.
+        """
+        key = name.lower()
+        entries = self.entries()
+        entry = entries.get(key)
+        if entry is not None and all(field in entry for field in fields or FIELDS):
+            return entry
+
+        return await self.lookups.run(key, self.refresh, key)
+
+    async def refresh(self, key):
+        """
+        Fetches a species and stores it in the cache.
+        """
+        fetched = await self.fetch(key)
+        if fetched is None:
+            return None
+        self.entries()[key] = fetched
+        store.mark_dirty(self.cache_file, key)
+        return fetched
+
+    async def fetch(self, name):
+        """
+        Builds a full entry from the /pokemon and /pokemon-species endpoints.
+
+        Returns:
+            dict: The entry, or None if either request fails.
+        """
+        try:
+            pokemon_data = await pokeapi.get(f"pokemon/{name}")
+            if pokemon_data is None:
+                print(f"Error fetching Pokémon data for {name}")
+                return None
+
+            species_data = await pokeapi.get(pokemon_data['species']['url'])
+            if species_data is None:
+                print(f"Error fetching species information for {name}")
+                return None
+        except Exception as e:
+            print(f"Error fetching Pokémon information for {name}: {e}")
+            return None
+
+        return {
+            "types": [entry['type']['name'] for entry in pokemon_data['types']],
+            "stats": {STAT_NAMES[entry['stat']['name']]: entry['base_stat'] for entry in pokemon_data['stats'] if entry['stat']['name'] in STAT_NAMES},
+            # The is_hidden flag is per Pokémon, so it comes from /pokemon rather than /ability
+            "abilities": [{"name": entry['ability']['name'], "is_hidden": entry['is_hidden']} for entry in pokemon_data['abilities']],
+            "gender_rate": species_data['gender_rate'],
+            "base_experience": pokemon_data['base_experience'] or 0,
+            "image_url": pokemon_data['sprites']['other']['official-artwork']['front_default'],
+        }
+
+def choose_ability(abilities, hidden_ability_probability, rng=random):
+    """
+    Picks an ability, giving hidden abilities the given chance.
+
+    Parameters:
+        abilities (list): The species' abilities as {"name", "is_hidden"} dicts.
+        hidden_ability_probability (float): The chance of picking a hidden ability when the species has one.
+        rng: Anything with a random() method returning a number in [0, 1). Defaults to the random module.
+
+    Returns:
+        str: The ability name, or None if the species has no abilities.
+    """
+    if not abilities:
+        return None
+    hidden_abilities = [ability['name'] for ability in abilities if ability['is_hidden']]
+    regular_abilities = [ability['name'] for ability in abilities if not ability['is_hidden']]
+
+    # If hidden abilities are available, randomly select one based on probability
+    if hidden_abilities and (not regular_abilities or rng.random() < hidden_ability_probability):
+        choices = hidden_abilities
+    else:
+        choices = regular_abilities
+    return choices[int(rng.random() * len(choices))]
+
+# The shared species cache used by every cog
+species = SpeciesCache()
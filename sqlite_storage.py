@@ -0,0 +1,315 @@
+import json
+import sqlite3
+from contextlib import contextmanager
+from serializers import plain
+from storage import copy_keys
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (user_id TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS teams (user_id TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS inventory (user_id TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS expedition_levels (user_id TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS expeditions (user_id TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS user_scores (user_id TEXT PRIMARY KEY, data TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS collection_owners (owner TEXT PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS collections (
+    owner TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    selected INTEGER NOT NULL DEFAULT 0,
+    name TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (owner, id)
+);
+CREATE INDEX IF NOT EXISTS idx_collections_owner_selected ON collections (owner, selected);
+CREATE TABLE IF NOT EXISTS market (
+    position INTEGER PRIMARY KEY,
+    id INTEGER,
+    species TEXT,
+    price INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_market_species_price ON market (species, price);
+"""
+
+class SqliteDatabase:
+    """
+    A shared SQLite connection in WAL mode holding all of the bot's player data.
+
+    Transactions are explicit (see transaction()), so the writes of every
+    backend in one data store flush commit together or not at all.
+    """
+    def __init__(self, path='blossom.db'):
+        """
+        Opens the database and creates any missing tables.
+
+        Parameters:
+            path (str): The SQLite database file.
+        """
+        self.path = path
+        # Writes run on the data store's worker thread, reads at startup on the main thread.
+        # isolation_level=None leaves BEGIN and COMMIT to transaction()
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.depth = 0  # number of transaction() blocks currently open
+
+    @contextmanager
+    def transaction(self):
+        """
+        Runs a with block in a transaction, rolling it back if the block raises.
+
+        Nested blocks join the outermost one, so backends that each open a
+        transaction commit together when a caller holds one around them all.
+
+        Yields:
+            sqlite3.Connection: The connection to execute statements on.
+        """
+        self.depth += 1
+        try:
+            if self.depth == 1:
+                self.connection.execute("BEGIN")
+            try:
+                yield self.connection
+            except BaseException:
+                if self.depth == 1:
+                    self.connection.execute("ROLLBACK")
+                raise
+            if self.depth == 1:
+                self.connection.execute("COMMIT")
+        finally:
+            self.depth -= 1
+
+    def close(self):
+        self.connection.close()
+
+def encode(value):
+    """
+    Serializes a value for storage in a TEXT column.
+    """
+    return json.dumps(value, separators=(',', ':'), default=plain)
+
+class SqliteKeyValue:
+    """
+    Stores a dict keyed by user ID as one row per user.
+    """
+    def __init__(self, db, table):
+        """
+        Initializes the backend.
+
+        Parameters:
+            db (SqliteDatabase): The database to use.
+            table (str): The table holding (user_id, data) rows.
+        """
+        self.db = db
+        self.table = table
+
+    def read(self):
+        rows = self.db.connection.execute(f"SELECT user_id, data FROM {self.table}")
+        return {user_id: json.loads(data) for user_id, data in rows}
+
+    def snapshot(self, document, keys):
+        return copy_keys(document, keys)
+
+    def transaction(self):
+        return self.db.transaction()
+
+    def write(self, document, keys):
+        """
+        Upserts or deletes the rows for the changed keys in one transaction.
+
+        Parameters:
+            document (dict): The in-memory document.
+            keys (set): The user IDs that were added, changed or removed.
+        """
+        with self.db.transaction() as connection:
+            for key in keys:
+                if key in document:
+                    connection.execute(f"INSERT OR REPLACE INTO {self.table} (user_id, data) VALUES (?, ?)", (key, encode(document[key])))
+                else:
+                    connection.execute(f"DELETE FROM {self.table} WHERE user_id = ?", (key,))
+
+    def clear(self):
+        with self.db.transaction() as connection:
+            connection.execute(f"DELETE FROM {self.table}")
+
+class SqliteCollections:
+    """
+    Stores every trainer's collection as one row per Pokémon.
+
+    The backend remembers a hash of each row it last wrote, so flushing a
+    user's collection only updates the rows that actually changed; selecting
+    a Pokémon or learning a move touches one or two rows.
+    """
+    def __init__(self, db):
+        """
+        Initializes the backend.
+
+        Parameters:
+            db (SqliteDatabase): The database to use.
+        """
+        self.db = db
+        self.row_hashes = {}  # owner -> list of hashes of the rows on disk, in ID order
+
+    def read(self):
+        collections = {owner: [] for (owner,) in self.db.connection.execute("SELECT owner FROM collection_owners")}
+        self.row_hashes = {owner: [] for owner in collections}
+        for owner, data in self.db.connection.execute("SELECT owner, data FROM collections ORDER BY owner, id"):
+            collections.setdefault(owner, []).append(json.loads(data))
+            self.row_hashes.setdefault(owner, []).append(hash(data))
+        return collections
+
+    def snapshot(self, document, keys):
+        return copy_keys(document, keys)
+
+    def transaction(self):
+        return self.db.transaction()
+
+    def write(self, document, keys):
+        """
+        Writes the changed rows of each dirty user's collection in one transaction.
+
+        Parameters:
+            document (dict): The in-memory collections keyed by user ID.
+            keys (set): The user IDs whose collections changed.
+        """
+        with self.db.transaction() as connection:
+            for owner in keys:
+                if owner not in document:
+                    connection.execute("DELETE FROM collections WHERE owner = ?", (owner,))
+                    connection.execute("DELETE FROM collection_owners WHERE owner = ?", (owner,))
+                    self.row_hashes.pop(owner, None)
+                    continue
+
+                connection.execute("INSERT OR IGNORE INTO collection_owners (owner) VALUES (?)", (owner,))
+                old_hashes = self.row_hashes.get(owner)
+                if old_hashes is None:
+                    # The rows on disk are unknown (a new owner, or a rolled back write); rewrite them all
+                    connection.execute("DELETE FROM collections WHERE owner = ?", (owner,))
+                    old_hashes = []
+                new_hashes = []
+                # Rows are keyed by position so renumbering after a release stays consistent
+                for position, pokemon in enumerate(document[owner], start=1):
+                    data = encode(pokemon)
+                    new_hashes.append(hash(data))
+                    if position <= len(old_hashes) and old_hashes[position - 1] == new_hashes[-1]:
+                        continue
+                    connection.execute(
+                        "INSERT OR REPLACE INTO collections (owner, id, selected, name, data) VALUES (?, ?, ?, ?, ?)",
+                        (owner, position, int(bool(pokemon.get('selected', False))), pokemon.get('name'), data)
+                    )
+                if len(old_hashes) > len(new_hashes):
+                    connection.execute("DELETE FROM collections WHERE owner = ? AND id > ?", (owner, len(new_hashes)))
+                self.row_hashes[owner] = new_hashes
+
+    def forget(self, keys):
+        """
+        Drops the row hashes of owners whose last write was rolled back, so their rows are all rewritten.
+        """
+        for owner in keys:
+            self.row_hashes.pop(owner, None)
+
+    def clear(self):
+        with self.db.transaction() as connection:
+            connection.execute("DELETE FROM collections")
+            connection.execute("DELETE FROM collection_owners")
+        self.row_hashes = {}
+
+class SqliteMarket:
+    """
+    Stores the market listings ({"pokemon": [...]}) as one row per listing.
+    """
+    def __init__(self, db):
+        """
+        Initializes the backend.
+
+        Parameters:
+            db (SqliteDatabase): The database to use.
+        """
+        self.db = db
+        self.row_hashes = []  # hashes of the rows on disk in position order, or None if unknown
+
+    def read(self):
+        listings = []
+        self.row_hashes = []
+        for (data,) in self.db.connection.execute("SELECT data FROM market ORDER BY position"):
+            listings.append(json.loads(data))
+            self.row_hashes.append(hash(data))
+        return {"pokemon": listings}
+
+    def snapshot(self, document, keys):
+        return copy_keys(document, keys)
+
+    def transaction(self):
+        return self.db.transaction()
+
+    def write(self, document, keys):
+        """
+        Writes the listings that changed since the last flush in one transaction.
+
+        Parameters:
+            document (dict): The in-memory market data.
+            keys (set): The changed top-level keys; the market only has "pokemon".
+        """
+        listings = document.get("pokemon", [])
+        new_hashes = []
+        with self.db.transaction() as connection:
+            if self.row_hashes is None:
+                # A rolled back write left the rows on disk unknown; rewrite them all
+                connection.execute("DELETE FROM market")
+                self.row_hashes = []
+            for position, pokemon in enumerate(listings):
+                data = encode(pokemon)
+                new_hashes.append(hash(data))
+                if position < len(self.row_hashes) and self.row_hashes[position] == new_hashes[-1]:
+                    continue
+                connection.execute(
+                    "INSERT OR REPLACE INTO market (position, id, species, price, data) VALUES (?, ?, ?, ?, ?)",
+                    (position, pokemon.get('id'), pokemon.get('name', '').lower(), pokemon.get('price'), data)
+                )
+            if len(self.row_hashes) > len(new_hashes):
+                connection.execute("DELETE FROM market WHERE position >= ?", (len(new_hashes),))
+        self.row_hashes = new_hashes
+
+    def forget(self, keys):
+        """
+        Drops the row hashes after a rolled back write, so every listing is rewritten.
+        """
+        self.row_hashes = None
+
+    def clear(self):
+        with self.db.transaction() as connection:
+            connection.execute("DELETE FROM market")
+        self.row_hashes = []
+
+def sqlite_backends(db):
+    """
+    Returns the SQLite backend for each data file.
+
+    Parameters:
+        db (SqliteDatabase): The database to use.
+
+    Returns:
+        dict: A mapping of data file name to backend.
+    """
+    return {
+        'user_data.json': SqliteKeyValue(db, 'users'),
+        'collections.json': SqliteCollections(db),
+        'teams.json': SqliteKeyValue(db, 'teams'),
+        'inventory.json': SqliteKeyValue(db, 'inventory'),
+        'market.json': SqliteMarket(db),
+        'expedition_levels.json': SqliteKeyValue(db, 'expedition_levels'),
+        'expeditions.json': SqliteKeyValue(db, 'expeditions'),
+        'user_scores.json': SqliteKeyValue(db, 'user_scores'),
+    }
+
+def register_sqlite(store, db):
+    """
+    Points the data store at SQLite for every player data file.
+
+    Parameters:
+        store (DataStore): The data store to configure.
+        db (SqliteDatabase): The database to use.
+    """
+    for filename, backend in sqlite_backends(db).items():
+        store.register(filename, backend)
@@ -0,0 +1,478 @@
+import json
+import marshal
+import os
+import zlib
+import serializers
+from records import copy_records
+from writer import writer
+
+def copy_json(value):
+    """
+    Returns a deep copy of JSON-like data (dicts, lists, strings, numbers, booleans, None).
+
+    marshal round-trips these types in C, which is much faster than
+    copy.deepcopy, so the event loop can hand a stable copy to the worker
+    thread cheaply. Records (see records.py) are copied as records.
+    """
+    try:
+        return marshal.loads(marshal.dumps(value))
+    except ValueError:
+        # marshal rejects record objects; copy them slot by slot instead
+        return copy_records(value)
+
+def copy_keys(document, keys):
+    """
+    Returns a copy of only the given top-level keys of a document.
+
+    Keys missing from the copy were deleted, which is how backends that
+    write per key tell removals apart from updates.
+    """
+    return {key: copy_json(document[key]) for key in keys if key in document}
+
+class EncodedEntries:
+    """
+    Keeps every top-level entry of a dict document in its serialized form.
+
+    A flush re-encodes only the entries that changed, on the event loop, and
+    hands the encoded bytes of the rest to the worker thread to join, so the
+    loop's share of a flush follows the size of the change, not the document.
+    """
+    def __init__(self, serializer, document=None):
+        """
+        Initializes the entries.
+
+        Parameters:
+            serializer: The serializer the entries are encoded with.
+            document (dict, optional): A document to encode every entry of.
+        """
+        self.serializer = serializer
+        self.entries = {}  # key -> encoded value
+        if document is not None:
+            self.update(document, document.keys())
+
+    def update(self, document, keys):
+        """
+        Re-encodes changed keys and drops removed ones.
+        """
+        for key in keys:
+            if key in document:
+                self.entries[key] = self.serializer.dumps(document[key])
+            else:
+                self.entries.pop(key, None)
+
+def export_json(document, path):
+    """
+    Writes a document as indented, human-readable JSON regardless of its storage format.
+
+    Parameters:
+        document: The document to export.
+        path (str): The file to write.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    writer.write(path, serializers.get_serializer('json-indent').dumps(document))
+    writer.commit()
+
+class JsonFile:
+    """
+    Stores a document as a single file that is rewritten on every flush.
+    """
+    def __init__(self, filename, serializer=None):
+        """
+        Initializes the backend.
+
+        Parameters:
+            filename (str): The file holding the document.
+            serializer (str, optional): The on-disk format, see serializers.get_serializer().
+        """
+        self.filename = filename
+        self.serializer = serializers.get_serializer(serializer)
+        self.encoded = None  # EncodedEntries of a dict document, from read() or the first flush
+
+    def read(self):
+        """
+        Reads the document from disk.
+
+        Raises:
+            FileNotFoundError: If the file does not exist yet.
+        """
+        with open(self.filename, 'rb') as file:
+            document = serializers.loads(file.read())
+        if isinstance(document, dict):
+            self.encoded = EncodedEntries(self.serializer, document)
+        return document
+
+    def snapshot(self, document, keys):
+        """
+        Encodes the changed entries and returns every entry's encoding for write() to join.
+
+        Documents that are not dicts are encoded whole.
+        """
+        if not isinstance(document, dict):
+            return self.serializer.dumps(document)
+        if self.encoded is None:
+            self.encoded = EncodedEntries(self.serializer, document)
+        else:
+            self.encoded.update(document, keys)
+        return list(self.encoded.entries.items())
+
+    def write(self, document, keys):
+        """
+        Stages the whole document for writing back to disk.
+
+        Parameters:
+            document: The result of snapshot(): the encoded document, or the encoded entries of a dict.
+            keys (set): The top-level keys that changed. Unused, since the file is rewritten.
+        """
+        if isinstance(document, list):
+            document = self.serializer.join(document)
+        writer.write(self.filename, document)
+
+class ShardedJson:
+    """
+    Stores a dict keyed by user ID as a directory of hash-bucket shard files.
+
+    Every top-level key is assigned to one of a fixed number of buckets, and
+    each non-empty bucket is kept in its own JSON file. A small manifest
+    records the bucket count and which shards exist, so a write only touches
+    the shards holding the keys that changed.
+    """
+    def __init__(self, directory, buckets=256, legacy_file=None, serializer=None):
+        """
+        Initializes the backend.
+
+        Parameters:
+            directory (str): The directory holding the shard files and manifest.
+            buckets (int): The number of hash buckets used when creating a new layout.
+            legacy_file (str, optional): A monolithic JSON file to migrate from when no shards exist yet.
+            serializer (str, optional): The format of the shard files. The manifest is always indented JSON.
+        """
+        self.directory = directory
+        self.buckets = buckets
+        self.legacy_file = legacy_file
+        self.serializer = serializers.get_serializer(serializer)
+        self.members = {}  # bucket -> set of keys stored in that shard, kept on the event loop
+        self.shards = set()  # buckets listed in the manifest on disk, kept by write()
+        self.encoded = None  # EncodedEntries of every user, from read() or the first flush
+
+    def manifest_path(self):
+        return os.path.join(self.directory, 'manifest.json')
+
+    def shard_path(self, bucket):
+        return os.path.join(self.directory, f'shard_{bucket:04d}.json')
+
+    def bucket(self, key):
+        """
+        Returns the bucket for a key. crc32 is used because it is stable across processes.
+        """
+        return zlib.crc32(str(key).encode()) % self.buckets
+
+    def read(self):
+        """
+        Reads every shard listed in the manifest and merges them into one document.
+
+        Raises:
+            FileNotFoundError: If neither the shard layout nor the legacy file exists.
+        """
+        try:
+            with open(self.manifest_path(), 'r') as file:
+                manifest = json.load(file)
+        except FileNotFoundError:
+            return self.migrate()
+
+        self.buckets = manifest['buckets']
+        self.members = {}
+        self.shards = set()
+        document = {}
+        for bucket in manifest['shards']:
+            bucket = int(bucket)
+            with open(self.shard_path(bucket), 'rb') as file:
+                shard = serializers.loads(file.read())
+            self.members[bucket] = set(shard)
+            self.shards.add(bucket)
+            document.update(shard)
+        self.encoded = EncodedEntries(self.serializer, document)
+        return document
+
+    def migrate(self):
+        """
+        Splits the legacy monolithic file into shards on first use.
+        """
+        if self.legacy_file is None:
+            raise FileNotFoundError(self.manifest_path())
+        with open(self.legacy_file, 'rb') as file:
+            document = serializers.loads(file.read())
+        os.makedirs(self.directory, exist_ok=True)
+        self.members = {}
+        self.shards = set()
+        self.encoded = EncodedEntries(self.serializer, document)
+        self.update_members(document, set(document))
+        self.write(dict(self.encoded.entries), set(document))
+        writer.commit()
+        print(f"Migrated {self.legacy_file} into {len(self.shards)} shards in {self.directory}/")
+        return document
+
+    def update_members(self, document, keys):
+        """
+        Moves changed keys into or out of their buckets.
+
+        Returns:
+            set: The buckets the keys belong to.
+        """
+        touched = set()
+        for key in keys:
+            bucket = self.bucket(key)
+            members = self.members.setdefault(bucket, set())
+            if key in document:
+                members.add(key)
+            else:
+                members.discard(key)
+            if not members:
+                del self.members[bucket]
+            touched.add(bucket)
+        return touched
+
+    def snapshot(self, document, keys):
+        """
+        Encodes the changed entries and returns the encoding of every entry
+        stored in the shards they touch.
+
+        Membership is updated here, on the event loop, so write() only has to
+        group the encoded entries by bucket and join them.
+        """
+        if self.encoded is None:
+            self.encoded = EncodedEntries(self.serializer, document)
+        else:
+            self.encoded.update(document, keys)
+        wanted = set(keys)
+        for bucket in self.update_members(document, keys):
+            wanted.update(self.members.get(bucket, ()))
+        return {key: self.encoded.entries[key] for key in wanted if key in self.encoded.entries}
+
+    def write(self, document, keys):
+        """
+        Stages rewrites of only the shards that hold changed keys.
+
+        Parameters:
+            document (dict): The encoding of every entry of the touched shards, as returned by snapshot().
+            keys (set): The top-level keys that were added, changed or removed.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        shards_before = set(self.shards)
+        contents = {self.bucket(key): [] for key in keys}
+        for key, value in document.items():
+            contents.setdefault(self.bucket(key), []).append((key, value))
+
+        for bucket, shard in contents.items():
+            path = self.shard_path(bucket)
+            if shard:
+                writer.write(path, self.serializer.join(shard))
+                self.shards.add(bucket)
+            else:
+                # Drop shards that no longer hold any users
+                writer.remove(path)
+                self.shards.discard(bucket)
+
+        # The manifest only changes when a shard is created or removed
+        if self.shards != shards_before or not os.path.exists(self.manifest_path()):
+            writer.write(self.manifest_path(), json.dumps({"buckets": self.buckets, "shards": sorted(self.shards)}, indent=4))
+
+class JournaledJson:
+    """
+    Stores a dict as a snapshot file plus an append-only journal of changes.
+
+    A flush appends compact records describing what changed instead of
+    rewriting the file, and loading replays the journal on top of the last
+    snapshot. Once the journal grows past a size threshold, compact() folds
+    it into a new snapshot and starts an empty journal.
+
+    The backend remembers a hash of every list item and dict field it last
+    journaled, so a record only holds the part of a key that changed: a
+    caught Pokémon or a new listing is one appended item, a sale removes
+    one item, and editing a Pokémon or a user's tokens rewrites just that
+    item or field. Records look like:
+        {"k": key, "v": value}                  the whole value of a key
+        {"k": key}                              the key was removed
+        {"k": key, "s": start, "e": end, "v": [items]}
+                                                value[start:end] = items, for lists
+        {"k": key, "f": field, "v": value}      value[field] = value, for dicts
+        {"k": key, "f": field}                  the field was removed
+    """
+    def __init__(self, filename, compact_bytes=8 * 1024 * 1024, serializer=None):
+        """
+        Initializes the backend.
+
+        Parameters:
+            filename (str): The snapshot file. The journal is kept next to it with a .journal suffix.
+            compact_bytes (int): Journal size that triggers compaction.
+            serializer (str, optional): The format of the snapshot. Journal records are always JSON lines.
+        """
+        self.filename = filename
+        self.journal_filename = filename + '.journal'
+        self.compact_bytes = compact_bytes
+        self.serializer = serializers.get_serializer(serializer)
+        # Records must stay one per line, so binary formats are only used for the snapshot
+        self.records = serializers.get_serializer()
+        self.hashes = {}  # key -> hashes of the list items or dict fields on disk, kept by write()
+
+    def read(self):
+        """
+        Loads the snapshot and replays the journal on top of it.
+
+        Raises:
+            FileNotFoundError: If neither the snapshot nor the journal exists.
+        """
+        document, replayed = self.replay_journal()
+        if replayed:
+            print(f"Replayed {replayed} journal records for {self.filename}")
+        self.hashes = {key: self.value_hashes(value) for key, value in document.items()}
+        return document
+
+    def replay_journal(self):
+        """
+        Returns the document the snapshot and journal on disk hold, and the number of records replayed.
+        """
+        try:
+            with open(self.filename, 'rb') as file:
+                document = serializers.loads(file.read())
+        except FileNotFoundError:
+            if not os.path.exists(self.journal_filename):
+                raise
+            document = {}
+
+        replayed = 0
+        try:
+            with open(self.journal_filename, 'rb+') as file:
+                offset = 0
+                for line in file:
+                    try:
+                        record = self.records.loads(line)
+                    except ValueError:
+                        # A torn final record from a crash mid-append; drop it so new records start on a clean line
+                        print(f"Discarding incomplete record at the end of {self.journal_filename}")
+                        file.truncate(offset)
+                        break
+                    self.replay(document, record)
+                    offset += len(line)
+                    replayed += 1
+        except FileNotFoundError:
+            pass
+        return document, replayed
+
+    def replay(self, document, record):
+        """
+        Applies one journal record to a document.
+        """
+        key = record['k']
+        if 's' in record:
+            document[key][record['s']:record['e']] = record['v']
+        elif 'f' in record:
+            if 'v' in record:
+                document[key][record['f']] = record['v']
+            else:
+                document[key].pop(record['f'], None)
+        elif 'v' in record:
+            document[key] = record['v']
+        else:
+            document.pop(key, None)
+
+    def value_hashes(self, value):
+        """
+        Returns the hashes write() compares a key's next value against, or None for scalar values.
+        """
+        if isinstance(value, list):
+            return [hash(self.records.dumps(item)) for item in value]
+        if isinstance(value, dict):
+            return {field: hash(self.records.dumps(item)) for field, item in value.items()}
+        return None
+
+    def snapshot(self, document, keys):
+        return copy_keys(document, keys)
+
+    def write(self, document, keys):
+        """
+        Stages a record for each changed key to be appended to the journal.
+
+        Parameters:
+            document (dict): The in-memory document.
+            keys (set): The top-level keys that were added, changed or removed.
+        """
+        lines = []
+        for key in keys:
+            if key in document:
+                lines.extend(self.records.dumps(record) for record in self.changes(key, document[key]))
+            else:
+                lines.append(self.records.dumps({"k": key}))
+                self.hashes.pop(key, None)
+        if lines:
+            writer.append(self.journal_filename, b'\n'.join(lines) + b'\n')
+
+    def changes(self, key, value):
+        """
+        Returns the records that turn what the journal holds for a key into its new value.
+        """
+        old = self.hashes.get(key)
+        new = self.value_hashes(value)
+        self.hashes[key] = new
+
+        if isinstance(old, dict) and isinstance(new, dict):
+            records = [{"k": key, "f": field, "v": value[field]} for field in new if old.get(field) != new[field]]
+            records += [{"k": key, "f": field} for field in old if field not in new]
+            return records
+
+        if not (isinstance(old, list) and isinstance(new, list)):
+            return [{"k": key, "v": value}]
+
+        # Skip the items that are unchanged at both ends
+        start = 0
+        while start < len(old) and start < len(new) and old[start] == new[start]:
+            start += 1
+        old_end, new_end = len(old), len(new)
+        while old_end > start and new_end > start and old[old_end - 1] == new[new_end - 1]:
+            old_end -= 1
+            new_end -= 1
+        if old_end - start != new_end - start:
+            # Items were added or removed in between
+            return [{"k": key, "s": start, "e": old_end, "v": value[start:new_end]}]
+        # The same number of items, e.g. after selecting a Pokémon; replace only the ones that changed
+        return [{"k": key, "s": index, "e": index + 1, "v": [value[index]]} for index in range(start, old_end) if old[index] != new[index]]
+
+    def forget(self, keys):
+        """
+        Drops what write() remembers about keys whose records may not have reached
+        the disk, so the next write journals their whole value again.
+        """
+        for key in keys:
+            self.hashes.pop(key, None)
+
+    def needs_compaction(self):
+        """
+        Returns True once the journal has grown past the compaction threshold.
+        """
+        try:
+            return os.path.getsize(self.journal_filename) >= self.compact_bytes
+        except FileNotFoundError:
+            return False
+
+    def compact(self):
+        """
+        Writes a new snapshot of the document and empties the journal.
+
+        The document is rebuilt from the files themselves, so compaction runs
+        entirely on the worker thread and never copies the in-memory document.
+        It holds exactly what has been journaled, which is also what the
+        hashes kept by write() describe, so later records apply on top of it.
+
+        The new snapshot and the empty journal must change together: list
+        splice records are not idempotent, so replaying the old journal over a
+        snapshot that already includes it would duplicate or misplace items.
+        Both files are therefore staged in one writer commit, whose intent log
+        (see writer.py) makes a crash leave either the old snapshot and journal
+        or the new snapshot and empty journal, never the new snapshot with the
+        old journal. Keep them in a single commit.
+        """
+        document = self.replay_journal()[0]
+        writer.write(self.filename, self.serializer.dumps(document))
+        writer.write(self.journal_filename, '')
+        writer.commit()
@@ -0,0 +1,24 @@
+import os
+import sys
+import pytest
+
+# The bot's modules live in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datastore import store
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """
+    Runs a test in an empty directory with the shared data store emptied, so
+    files the store reads or writes never touch the bot's real data.
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(store, 'documents', {})
+    monkeypatch.setattr(store, 'backends', {})
+    monkeypatch.setattr(store, 'registered', set())
+    monkeypatch.setattr(store, 'decoders', {})
+    monkeypatch.setattr(store, 'dirty', {})
+    monkeypatch.setattr(store, 'scheduled_flush', None)
+    monkeypatch.setattr(store, 'slots', None)
+    return tmp_path
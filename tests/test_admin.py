@@ -0,0 +1,41 @@
+import asyncio
+import json
+import os
+import pytest
+
+pytest.importorskip('discord')
+
+from admin import Admin
+from datastore import store
+from storage import JsonFile
+
+class FakeContext:
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, content=None, **kwargs):
+        self.messages.append(content)
+
+def export(filename):
+    ctx = FakeContext()
+    asyncio.run(Admin.export.callback(Admin(None), ctx, filename))
+    return ctx.messages
+
+def test_export_writes_registered_data_files(data_dir):
+    with open('user_data.json', 'w') as file:
+        json.dump({"1": {"tokens": 5}}, file)
+    store.register('user_data.json', JsonFile('user_data.json'))
+
+    assert export('user_data.json') == [f"Exported user_data.json to {os.path.join('exports', 'user_data.json')}."]
+    with open(os.path.join('exports', 'user_data.json')) as file:
+        assert json.load(file) == {"1": {"tokens": 5}}
+
+def test_export_rejects_files_that_are_not_registered(data_dir):
+    store.register('user_data.json', JsonFile('user_data.json'))
+    with open('secrets.json', 'w') as file:
+        json.dump({"token": "abc"}, file)
+
+    for filename in ['secrets.json', '../user_data.json', 'main.py']:
+        assert export(filename) == [f"No data file named {filename}. Data files: user_data.json"]
+    assert store.documents == {}
+    assert not os.path.exists('exports')
@@ -0,0 +1,47 @@
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip('discord')
+
+from datastore import store
+from inventory import Inventory
+
+class FakeContext:
+    def __init__(self, user_id):
+        self.author = SimpleNamespace(id=user_id, name='Ash')
+        self.messages = []
+
+    async def send(self, content=None, **kwargs):
+        self.messages.append(content)
+
+def test_buy_charges_tokens_and_marks_the_user_dirty(data_dir):
+    with open('shop_items.json', 'w') as file:
+        json.dump({"potions": {"name": "Potion", "price": 50}}, file)
+    with open('user_data.json', 'w') as file:
+        json.dump({"42": {"started": True, "tokens": 120}}, file)
+
+    ctx = FakeContext(42)
+    asyncio.run(Inventory.buy.callback(Inventory(None), ctx, 'potions', 2))
+
+    assert ctx.messages == ["Successfully bought 2 potions(s) for 100 tokens."]
+    assert store.load('user_data.json')['42'] == {"started": True, "tokens": 20, "inventory": {"potions": 2}}
+    assert store.dirty == {'user_data.json': {'42'}}
+
+    store.flush()
+    with open('user_data.json') as file:
+        assert json.load(file)['42']['inventory'] == {"potions": 2}
+
+def test_buy_rejects_a_purchase_the_user_cannot_afford(data_dir):
+    with open('shop_items.json', 'w') as file:
+        json.dump({"potions": {"name": "Potion", "price": 50}}, file)
+    with open('user_data.json', 'w') as file:
+        json.dump({"42": {"started": True, "tokens": 10}}, file)
+
+    ctx = FakeContext(42)
+    asyncio.run(Inventory.buy.callback(Inventory(None), ctx, 'potions', 1))
+
+    assert ctx.messages == ["Error: You don't have enough tokens to buy this quantity of the item."]
+    assert store.load('user_data.json')['42']['tokens'] == 10
+    assert store.dirty == {}
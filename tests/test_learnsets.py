@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+
+pytest.importorskip('aiohttp')
+
+import learnsets
+from learnsets import Learnset, TYPE_LOOKUP_LIMIT
+
+MOVES = {f"move-{n}": {"machine": 0} for n in range(20)}
+MOVES["thunder-shock"] = {"level-up": 1}
+
+class FakeApi:
+    def __init__(self):
+        self.requests = []
+        self.running = 0
+        self.most_running = 0
+
+    async def get(self, path):
+        self.requests.append(path)
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        await asyncio.sleep(0)
+        self.running -= 1
+        name = path.split('/')[1]
+        return {"type": {"name": "electric" if name == "thunder-shock" else "normal"}}
+
+def test_method_and_move_filters_make_no_requests(monkeypatch):
+    api = FakeApi()
+    monkeypatch.setattr(learnsets, 'pokeapi', api)
+    learnset = Learnset('pikachu', MOVES)
+
+    assert [entry['name'] for entry in asyncio.run(learnset.filter('level-up'))] == ["thunder-shock"]
+    assert [entry['name'] for entry in asyncio.run(learnset.filter('Thunder Shock'))] == ["thunder-shock"]
+    assert asyncio.run(learnset.filter('nonsense')) == []
+    assert api.requests == []
+
+def test_type_filter_looks_moves_up_in_capped_batches_once(monkeypatch):
+    api = FakeApi()
+    monkeypatch.setattr(learnsets, 'pokeapi', api)
+    move_types = {}
+    learnset = Learnset('pikachu', MOVES, move_types)
+
+    assert [entry['name'] for entry in asyncio.run(learnset.filter('electric'))] == ["thunder-shock"]
+    assert len(api.requests) == len(MOVES)
+    assert api.most_running <= TYPE_LOOKUP_LIMIT
+
+    # Another species learning the same moves reuses the shared types
+    other = Learnset('raichu', MOVES, move_types)
+    assert len(asyncio.run(other.filter('normal'))) == 20
+    assert len(api.requests) == len(MOVES)
+
+def test_describe_shows_methods_and_looked_up_types(monkeypatch):
+    monkeypatch.setattr(learnsets, 'pokeapi', FakeApi())
+    learnset = Learnset('pikachu', {"thunder-shock": {"machine": 0, "level-up": 1}, "tackle": {}})
+    entries = {entry['name']: entry for entry in learnset.entries}
+
+    assert learnset.describe(entries["thunder-shock"]) == "Level 1, Machine"
+    assert learnset.describe(entries["tackle"]) == "Unknown"
+
+    moves = asyncio.run(learnset.filter('electric'))
+    assert [learnset.describe(entry) for entry in moves] == ["Level 1, Machine, Type: Electric"]
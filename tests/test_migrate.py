@@ -0,0 +1,36 @@
+from migrate import migrate
+from sqlite_storage import SqliteDatabase, sqlite_backends
+from storage import JournaledJson
+from writer import writer
+
+def journal(filename, document, *changes):
+    # Compact to a snapshot of the first state, then journal the changes on top without compacting
+    backend = JournaledJson(filename)
+    backend.write(document, set(document))
+    writer.commit()
+    backend.compact()
+    for change in changes:
+        keys = change(document)
+        backend.write(backend.snapshot(document, keys), keys)
+        writer.commit()
+
+def test_migrate_replays_uncompacted_journal_records(data_dir):
+    def catch(collections):
+        collections["1"].append({"id": 2, "name": "Pikachu"})
+        return {"1"}
+    def spend(users):
+        users["1"]["tokens"] = 25
+        return {"1"}
+    def sell(market):
+        market["pokemon"].pop(0)
+        return {"pokemon"}
+    journal('collections.json', {"1": [{"id": 1, "name": "Eevee"}]}, catch)
+    journal('user_data.json', {"1": {"tokens": 100}}, spend)
+    journal('market.json', {"pokemon": [{"id": 1, "name": "Eevee", "price": 75}]}, sell)
+
+    migrate('blossom.db', 'collection_shards')
+
+    backends = sqlite_backends(SqliteDatabase('blossom.db'))
+    assert backends['collections.json'].read() == {"1": [{"id": 1, "name": "Eevee"}, {"id": 2, "name": "Pikachu"}]}
+    assert backends['user_data.json'].read() == {"1": {"tokens": 25}}
+    assert backends['market.json'].read() == {"pokemon": []}
@@ -0,0 +1,40 @@
+import copy
+import pickle
+from datastore import DataStore
+from records import PokemonRecord
+from storage import copy_json
+
+POKEMON = {"id": 1, "name": "Eevee", "level": 5, "nature": "Bold", "hpiv": 31, "atkiv": 4, "selected": False, "ribbons": ["classic"]}
+
+def test_record_copies_are_deep_and_stay_records():
+    record = PokemonRecord.from_dict(POKEMON)
+    copies = [record.copy(), pickle.loads(pickle.dumps(record)), copy.deepcopy(record), copy_json({"1": [record]})["1"][0]]
+    for copied in copies:
+        assert type(copied) is PokemonRecord
+        assert copied.to_dict() == POKEMON
+        copied['level'] = 6
+        copied['ribbons'].append('effort')
+    assert record.to_dict() == POKEMON
+
+def test_record_copy_keeps_removed_fields_removed():
+    record = PokemonRecord.from_dict(POKEMON)
+    del record['nature']
+    assert 'nature' not in record.copy()
+    assert 'nature' not in pickle.loads(pickle.dumps(record))
+
+def test_transaction_rollback_restores_records():
+    store = DataStore()
+    store.documents['collections.json'] = {"1": [PokemonRecord.from_dict(POKEMON)]}
+    try:
+        with store.transaction() as transaction:
+            collections = transaction.load('collections.json', "1")
+            collections["1"][0]['level'] = 50
+            collections["1"].append(PokemonRecord.from_dict(POKEMON))
+            raise RuntimeError
+    except RuntimeError:
+        pass
+
+    restored = store.documents['collections.json']["1"]
+    assert len(restored) == 1
+    assert type(restored[0]) is PokemonRecord
+    assert restored[0].to_dict() == POKEMON
@@ -0,0 +1,31 @@
+from response_cache import ResponseCache
+
+def test_cache_evicts_least_recently_used_entries_by_size():
+    cache = ResponseCache(max_bytes=1000)
+    cache.put('a', {"name": "a"}, 400)
+    cache.put('b', {"name": "b"}, 400)
+    cache.get('a')
+    cache.put('c', {"name": "c"}, 400)
+
+    assert cache.get('a') == (True, {"name": "a"})
+    assert cache.get('b') == (False, None)
+    assert cache.get('c') == (True, {"name": "c"})
+    assert cache.stats()['bytes'] == 802
+    assert cache.stats()['evictions'] == 1
+
+def test_cache_skips_responses_larger_than_the_limit():
+    cache = ResponseCache(max_bytes=1000)
+    cache.put('small', {}, 100)
+    cache.put('huge', {}, 5000)
+
+    assert cache.get('huge') == (False, None)
+    assert cache.get('small') == (True, {})
+
+def test_replacing_and_expiring_entries_releases_their_size():
+    cache = ResponseCache(max_bytes=1000, negative_ttl=-1)
+    cache.put('a', {}, 500)
+    cache.put('a', {}, 100)
+    assert cache.stats()['bytes'] == 101
+    cache.put('missing', None)
+    assert cache.get('missing') == (False, None)
+    assert cache.stats()['bytes'] == 101
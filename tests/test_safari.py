@@ -0,0 +1,47 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+
+discord = pytest.importorskip('discord')
+
+from datastore import store
+from safari import Safari
+from scheduler import TimerHeap
+
+class ForbiddenChannel:
+    id = 7
+
+    async def send(self, message):
+        raise discord.Forbidden(SimpleNamespace(status=403, reason='Forbidden'), 'Missing Permissions')
+
+def expedition_cog(channel, found):
+    cog = Safari.__new__(Safari)
+    cog.bot = SimpleNamespace(get_channel=lambda channel_id: channel)
+    cog.expedition_locations = {}
+    cog.expedition_timers = TimerHeap(cog.on_expedition_timer)
+    cog.generate_pokemon = found
+    store.load('expeditions.json')["1"] = {"location": "forest", "channel_id": 7, "start": 0, "end": 1800, "found": False}
+    return cog
+
+def test_found_event_schedules_the_end_when_the_message_fails(data_dir):
+    async def found(user_id):
+        return 'Eevee'
+    cog = expedition_cog(ForbiddenChannel(), found)
+
+    asyncio.run(cog.on_expedition_timer(1, 'found'))
+
+    expedition = store.load('expeditions.json')["1"]
+    assert expedition['found'] is True
+    assert cog.expedition_timers.pending(1) == (1800, 'end')
+    assert store.dirty == {'expeditions.json': {'1'}}
+
+def test_found_event_schedules_the_end_when_the_lookup_fails(data_dir):
+    async def found(user_id):
+        raise RuntimeError("PokeAPI is down")
+    cog = expedition_cog(ForbiddenChannel(), found)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cog.on_expedition_timer(1, 'found'))
+
+    assert store.load('expeditions.json')["1"]['found'] is True
+    assert cog.expedition_timers.pending(1) == (1800, 'end')
@@ -0,0 +1,73 @@
+import pytest
+from datastore import DataStore
+from sqlite_storage import SqliteDatabase, register_sqlite
+
+@pytest.fixture
+def sqlite_store(data_dir):
+    db = SqliteDatabase('blossom.db')
+    store = DataStore()
+    register_sqlite(store, db)
+    store.load('user_data.json').update({"1": {"tokens": 500}, "2": {"tokens": 0}})
+    store.load('collections.json').update({"1": [], "2": []})
+    store.load('market.json').update({"pokemon": [{"id": 1, "name": "Eevee", "price": 300, "seller": "2"}]})
+    store.mark_dirty('user_data.json', "1", "2")
+    store.mark_dirty('collections.json', "1", "2")
+    store.mark_dirty('market.json', 'pokemon')
+    store.flush()
+    yield store, db
+    store.executor.shutdown()
+    db.close()
+
+def market_buy(store):
+    # The changes a ;marketbuy makes to three files
+    with store.transaction() as transaction:
+        users = transaction.load('user_data.json', "1", "2")
+        collections = transaction.load('collections.json', "1")
+        market = transaction.load('market.json', 'pokemon')
+        listing = market["pokemon"].pop(0)
+        users["1"]["tokens"] -= listing["price"]
+        users["2"]["tokens"] += listing["price"]
+        collections["1"].append({"id": 1, "name": listing["name"]})
+
+def reread(db):
+    store = DataStore()
+    register_sqlite(store, db)
+    return store.load('user_data.json'), store.load('collections.json'), store.load('market.json')
+
+def test_flush_commits_every_file_in_one_transaction(sqlite_store, monkeypatch):
+    store, db = sqlite_store
+
+    # Fail after the users' rows are written but before the collection's are
+    def crash(document, keys):
+        raise OSError("disk full")
+    monkeypatch.setattr(store.backend('collections.json'), 'write', crash)
+    # With no event loop running, the transaction flushes as it commits
+    with pytest.raises(OSError):
+        market_buy(store)
+
+    users, collections, market = reread(db)
+    assert users == {"1": {"tokens": 500}, "2": {"tokens": 0}}
+    assert collections == {"1": [], "2": []}
+    assert len(market["pokemon"]) == 1
+
+    # The failed keys are retried by the next flush
+    monkeypatch.undo()
+    store.flush()
+    users, collections, market = reread(db)
+    assert users == {"1": {"tokens": 200}, "2": {"tokens": 300}}
+    assert collections == {"1": [{"id": 1, "name": "Eevee"}], "2": []}
+    assert market == {"pokemon": []}
+
+def test_market_rows_are_rewritten_after_a_rolled_back_flush(sqlite_store, monkeypatch):
+    store, db = sqlite_store
+    market = store.load('market.json')
+    market["pokemon"][0]["price"] = 100
+    store.mark_dirty('market.json', 'pokemon')
+    store.mark_dirty('user_data.json', "1")
+    monkeypatch.setattr(store.backend('user_data.json'), 'write', lambda document, keys: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        store.flush()
+
+    monkeypatch.undo()
+    store.flush()
+    assert reread(db)[2]["pokemon"][0]["price"] == 100
@@ -0,0 +1,103 @@
+import json
+import serializers
+from storage import JournaledJson, JsonFile, ShardedJson
+from writer import writer
+
+def flush(backend, document, keys):
+    backend.write(backend.snapshot(document, keys), keys)
+    writer.commit()
+
+def journal_records(path):
+    with open(path) as file:
+        return [json.loads(line) for line in file]
+
+def test_journal_records_only_the_items_and_fields_that_changed(data_dir):
+    backend = JournaledJson('collections.json')
+    user_backend = JournaledJson('user_data.json')
+    collections = {"1": [{"id": n, "name": "Eevee", "level": 5} for n in range(1, 51)]}
+    users = {"1": {"tokens": 100, "inventory": {"potions": 1}}}
+    flush(backend, collections, {"1"})
+    flush(user_backend, users, {"1"})
+    start = len(journal_records('collections.json.journal'))
+
+    collections["1"].append({"id": 51, "name": "Pikachu", "level": 3})  # a catch
+    flush(backend, collections, {"1"})
+    del collections["1"][10]  # a sale
+    flush(backend, collections, {"1"})
+    collections["1"][0]["level"] = 6  # a level up
+    collections["1"][30]["level"] = 9
+    flush(backend, collections, {"1"})
+    users["1"]["tokens"] = 40
+    flush(user_backend, users, {"1"})
+
+    assert journal_records('collections.json.journal')[start:] == [
+        {"k": "1", "s": 50, "e": 50, "v": [{"id": 51, "name": "Pikachu", "level": 3}]},
+        {"k": "1", "s": 10, "e": 11, "v": []},
+        {"k": "1", "s": 0, "e": 1, "v": [collections["1"][0]]},
+        {"k": "1", "s": 30, "e": 31, "v": [collections["1"][30]]},
+    ]
+    assert journal_records('user_data.json.journal')[-1] == {"k": "1", "f": "tokens", "v": 40}
+    assert JournaledJson('collections.json').read() == collections
+
+def test_journal_replays_into_the_flushed_document(data_dir):
+    backend = JournaledJson('market.json')
+    market = {"pokemon": [{"id": n, "price": 10 * n} for n in range(5)], "open": True}
+    flush(backend, market, {"pokemon", "open"})
+    market["pokemon"].pop(2)
+    market["pokemon"].append({"id": 9, "price": 1})
+    market["pokemon"][0]["price"] = 7
+    flush(backend, market, {"pokemon"})
+    del market["open"]
+    flush(backend, market, {"open"})
+
+    assert JournaledJson('market.json').read() == market
+
+def test_journal_rewrites_forgotten_keys_whole(data_dir):
+    backend = JournaledJson('market.json')
+    market = {"pokemon": [{"id": 1}, {"id": 2}]}
+    flush(backend, market, {"pokemon"})
+    backend.forget({"pokemon"})
+    market["pokemon"].append({"id": 3})
+    flush(backend, market, {"pokemon"})
+
+    assert journal_records('market.json.journal')[-1] == {"k": "pokemon", "v": market["pokemon"]}
+    assert JournaledJson('market.json').read() == market
+
+def test_json_file_joins_separately_encoded_entries(data_dir):
+    for name in serializers.SERIALIZERS:
+        backend = JsonFile(f'{name}.data', serializer=name)
+        document = {"1": {"tokens": 5, "inventory": {"potions": 2}}, "2": {"tokens": 7}}
+        flush(backend, document, set(document))
+        document["1"]["tokens"] = 6
+        del document["2"]
+        document["3"] = {"tokens": [1, 2]}
+        flush(backend, document, {"1", "2", "3"})
+
+        with open(f'{name}.data', 'rb') as file:
+            assert file.read() == backend.serializer.dumps(document)
+
+def test_sharded_flush_rewrites_touched_shards(data_dir):
+    backend = ShardedJson('shards', buckets=4)
+    document = {str(user): [{"id": 1, "level": user}] for user in range(20)}
+    flush(backend, document, set(document))
+    document["3"][0]["level"] = 50
+    del document["4"]
+    flush(backend, document, {"3", "4"})
+
+    assert ShardedJson('shards').read() == document
+
+def test_compaction_rebuilds_the_snapshot_from_the_journal(data_dir):
+    backend = JournaledJson('market.json', compact_bytes=1)
+    market = {"pokemon": [{"id": 1}, {"id": 2}]}
+    flush(backend, market, {"pokemon"})
+    market["pokemon"].pop(0)
+    flush(backend, market, {"pokemon"})
+
+    assert backend.needs_compaction()
+    backend.compact()
+    assert not backend.needs_compaction()
+    with open('market.json') as file:
+        assert json.load(file) == market
+    market["pokemon"].append({"id": 3})
+    flush(backend, market, {"pokemon"})
+    assert JournaledJson('market.json').read() == market
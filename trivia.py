@@ -3,16 +3,12 @@ import json
 import asyncio
 import random
 from discord.ext import commands
+from datastore import store
 
 def has_started():
     async def predicate(ctx):
         user_id = str(ctx.author.id)
-        try:
-            with open('user_data.json', 'r') as file:
-                user_data = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("Error: User data not found.")
-            return False
+        user_data = store.load('user_data.json')
         
         # Check if the user has started by looking for their ID in the user_data
         if user_id in user_data:
@@ -36,7 +32,6 @@ class Trivia(commands.Cog):
         self.trivia_data = self.load_trivia_data()
         self.trivia_in_progress = {}
         self.user_scores = self.load_user_scores()
-        self.user_scores = self.load_user_scores()
 
     def load_user_scores(self):
         """
@@ -45,11 +40,7 @@ class Trivia(commands.Cog):
         Returns:
             dict: A dictionary containing user scores.
         """
-        try:
-            with open('user_scores.json', 'r') as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return {}  # Return an empty dictionary if the file doesn't exist
+        return store.load('user_scores.json')
     def load_trivia_data(self):
         """
         Loads trivia questions from a JSON file.
@@ -134,16 +125,14 @@ class Trivia(commands.Cog):
             user_id (int): The ID of the user.
             tokens (int): The number of tokens to add to the user's count.
         """
-        # Load user data from JSON file
-        with open('user_data.json', 'r') as file:
-            user_data = json.load(file)
+        # Load user data from the data store
+        user_data = store.load('user_data.json')
         
         # Update user's token count
         user_data[str(user_id)]['tokens'] = user_data.get(str(user_id), {}).get('tokens', 0) + tokens
         
-        # Save updated user data to JSON file
-        with open('user_data.json', 'w') as file:
-            json.dump(user_data, file, indent=4)
+        # Mark the user's profile for writing back to disk
+        store.mark_dirty('user_data.json', user_id)
 
     def update_user_scores(self, user_id, points):
         """
@@ -153,16 +142,14 @@ class Trivia(commands.Cog):
             user_id (int): The ID of the user.
             points (int): The number of points to add to the user's score.
         """
-        # Load user scores from JSON file
-        with open('user_scores.json', 'r') as file:
-            user_scores = json.load(file)
+        # Load user scores from the data store
+        user_scores = store.load('user_scores.json')
         
         # Update user's score
         user_scores[str(user_id)] = user_scores.get(str(user_id), 0) + points
         
-        # Save updated user scores to JSON file
-        with open('user_scores.json', 'w') as file:
-            json.dump(user_scores, file, indent=4)
+        # Mark the user's score for writing back to disk
+        store.mark_dirty('user_scores.json', user_id)
 
     @commands.command()
     @has_started()
@@ -173,9 +160,8 @@ class Trivia(commands.Cog):
         Parameters:
             ctx (commands.Context): The context in which the command is being invoked.
         """
-        # Load user scores from JSON file
-        with open('user_scores.json', 'r') as file:
-            user_scores = json.load(file)
+        # Load user scores from the data store
+        user_scores = store.load('user_scores.json')
         
         # Sort users by score
         sorted_scores = sorted(user_scores.items(), key=lambda x: x[1], reverse=True)
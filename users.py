@@ -1,17 +1,12 @@
 import discord
 from datetime import datetime
-import json
 from discord.ext import commands
+from datastore import store
 
 def has_started():
     async def predicate(ctx):
         user_id = str(ctx.author.id)
-        try:
-            with open('user_data.json', 'r') as file:
-                user_data = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("Error: User data not found.")
-            return False
+        user_data = store.load('user_data.json')
         
         # Check if the user has started by looking for their ID in the user_data
         if user_id in user_data:
@@ -46,13 +41,8 @@ class Users(commands.Cog):
         """
         user_id = str(ctx.author.id)  # Get the Discord ID of the user who invoked the command
         
-        # Load collections data from JSON file
-        try:
-            with open('collections.json', 'r') as file:
-                collections_data = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("Collections data file not found.")
-            return
+        # Load collections data from the data store
+        collections_data = store.load('collections.json')
 
         # Check if user ID exists in collections data
         if user_id not in collections_data:
@@ -65,13 +55,8 @@ class Users(commands.Cog):
         # Get the total number of Pokémon caught by the user
         total_pokemon_caught = len(user_pokemon)
         
-        # Load user data from JSON file
-        try:
-            with open('user_data.json', 'r') as file:
-                user_data = json.load(file)
-        except FileNotFoundError:
-            await ctx.send("User data file not found.")
-            return
+        # Load user data from the data store
+        user_data = store.load('user_data.json')
 
         # Check if user ID exists in user data
         if user_id not in user_data:
@@ -132,7 +117,7 @@ class Users(commands.Cog):
                 "exlevel": 0
             }
             user_data[user_id] = new_profile
-            self.save_user_data(user_data)
+            self.save_user_data(user_id)
             
             # Add an entry to inventory.json for the new user
             self.add_user_to_inventory(user_id)
@@ -149,16 +134,16 @@ class Users(commands.Cog):
         """
         Adds a new user to the teams data.
 
+        If the user ID is not already present in the teams data, it adds a new entry
+        with default values for each team slot.
+
         Parameters:
             user_id (str): The Discord ID of the user.
         """
-        with open('teams.json', 'r+') as f:
-            teams_data = json.load(f)
-            if user_id not in teams_data:
-                teams_data[user_id] = {"1": None, "2": None, "3": None, "4": None, "5": None, "6": None}
-                f.seek(0)
-                json.dump(teams_data, f, indent=4)
-                f.truncate()
+        teams_data = store.load('teams.json')
+        if user_id not in teams_data:
+            teams_data[user_id] = {"1": None, "2": None, "3": None, "4": None, "5": None, "6": None}
+            store.mark_dirty('teams.json', user_id)
 
     def add_user_to_collections(self, user_id):
         """
@@ -167,152 +152,43 @@ class Users(commands.Cog):
         Parameters:
             user_id (str): The Discord ID of the user.
         """
-        with open('collections.json', 'r+') as f:
-            collections_data = json.load(f)
-            if user_id not in collections_data:
-                collections_data[user_id] = []
-                f.seek(0)
-                json.dump(collections_data, f, indent=4)
-                f.truncate()
+        collections_data = store.load('collections.json')
+        if user_id not in collections_data:
+            collections_data[user_id] = []
+            store.mark_dirty('collections.json', user_id)
 
     def load_user_data(self):
         """
-        Loads user data from the user_data.json file.
+        Loads user data from the data store.
 
         Returns:
-            dict: The user data loaded from the file.
+            dict: The shared user data loaded from user_data.json.
         """
-        with open('user_data.json', 'r') as f:
-            return json.load(f)
+        return store.load('user_data.json')
 
-    def save_user_data(self, user_data):
+    def save_user_data(self, user_id):
         """
-        Saves user data to the user_data.json file.
+        Marks a user's profile for saving to the user_data.json file.
 
         Parameters:
-            user_data (dict): The user data to be saved.
+            user_id (str): The Discord ID of the user whose profile changed.
         """
-        with open('user_data.json', 'w') as f:
-            json.dump(user_data, f, indent=4)
+        store.mark_dirty('user_data.json', user_id)
 
     def add_user_to_inventory(self, user_id):
         """
         Adds a new user to the inventory data.
 
+        If the user ID is not already present in the inventory data, it adds a new
+        entry with an empty dictionary.
+
         Parameters:
             user_id (str): The Discord ID of the user.
         """
-        with open('inventory.json', 'r+') as f:
-            inventory_data = json.load(f)
-            if user_id not in inventory_data:
-                inventory_data[user_id] = []
-                f.seek(0)
-                json.dump(inventory_data, f, indent=4)
-                f.truncate()
-            
-    def add_user_to_teams(self, user_id):
-        """
-    Adds a new user to the teams data.
-
-    If the user ID is not already present in the teams data, it adds a new entry
-    with default values for each team slot.
-
-    Parameters:
-        user_id (str): The Discord ID of the user.
-    """
-        with open('teams.json', 'r+') as f:
-            teams_data = json.load(f)
-            if user_id not in teams_data:
-                teams_data[user_id] = {"1": None, "2": None, "3": None, "4": None, "5": None, "6": None}
-                f.seek(0)
-                json.dump(teams_data, f, indent=4)
-                f.truncate()
-
-    def load_user_data(self):
-        """
-    Loads user data from the user_data.json file.
-
-    Returns:
-        dict: The user data loaded from the file.
-    """
-        with open('user_data.json', 'r') as f:
-            return json.load(f)
-
-    def save_user_data(self, user_data):
-        """
-    Saves user data to the user_data.json file.
-
-    Parameters:
-        user_data (dict): The user data to be saved.
-    """
-        with open('user_data.json', 'w') as f:
-            json.dump(user_data, f, indent=4)
-
-    def add_user_to_inventory(self, user_id):
-        """
-    Adds a new user to the inventory data.
-
-    If the user ID is not already present in the inventory data, it adds a new
-    entry with an empty list.
-
-    Parameters:
-        user_id (str): The Discord ID of the user.
-    """
-        with open('inventory.json', 'r+') as f:
-            inventory_data = json.load(f)
-            if user_id not in inventory_data:
-                inventory_data[user_id] = []
-                f.seek(0)
-                json.dump(inventory_data, f, indent=4)
-                f.truncate()
-
-    def load_user_data(self):
-        """
-    Loads user data from the user_data.json file.
-
-    If the file is not found, it returns an empty dictionary.
-
-    Returns:
-        dict: The user data loaded from the file or an empty dictionary if the
-            file is not found.
-    """
-        try:
-            with open('user_data.json', 'r') as file:
-                return json.load(file)
-        except FileNotFoundError:
-            return {}
-
-    def save_user_data(self, user_data):
-        """
-    Saves user data to the user_data.json file.
-
-    Parameters:
-        user_data (dict): The user data to be saved.
-    """
-        with open('user_data.json', 'w') as file:
-            json.dump(user_data, file, indent=4)
-    
-    def add_user_to_inventory(self, user_id):
-        """
-    Adds a new user to the inventory data.
-
-    If the user ID is not already present in the inventory data, it adds a new
-    entry with an empty dictionary.
-
-    Parameters:
-        user_id (str): The Discord ID of the user.
-    """
-        try:
-            with open('inventory.json', 'r') as file:
-                inventory_data = json.load(file)
-        except FileNotFoundError:
-            inventory_data = {}
-        
+        inventory_data = store.load('inventory.json')
         if user_id not in inventory_data:
             inventory_data[user_id] = {}
-            
-        with open('inventory.json', 'w') as file:
-            json.dump(inventory_data, file, indent=4)
-            
+            store.mark_dirty('inventory.json', user_id)
+
 async def setup(bot):
     await bot.add_cog(Users(bot))
@@ -0,0 +1,188 @@
+import json
+import os
+
+def encode(data):
+    """
+    Returns data as bytes, encoding text as UTF-8.
+    """
+    return data.encode() if isinstance(data, str) else data
+
+def fsync_directory(directory):
+    """
+    Persists renames and deletions in a directory. Directories can only be opened for fsync on POSIX.
+    """
+    if os.name == 'posix':
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+class GroupCommitWriter:
+    """
+    Collects file writes and commits them to disk together.
+
+    Each staged file is written once to a temporary file next to it, fsynced
+    and renamed over the original, so other readers and a crash only ever see
+    the old or the new contents, never a truncated file. Staging the same
+    file twice before a commit keeps only the latest contents, and directory
+    entries are fsynced once per commit instead of once per file.
+
+    A commit that changes more than one file first records every change in a
+    small intent log. If the process dies part way through, recover() finds
+    the log on the next start and finishes the commit, so either all of the
+    files change or none of them do.
+    """
+    def __init__(self, log_path='pending_commit.json'):
+        """
+        Initializes the writer.
+
+        Parameters:
+            log_path (str): The intent log for multi-file commits.
+        """
+        self.log_path = log_path
+        self.writes = {}  # path -> full contents; the last staged contents win
+        self.appends = {}  # path -> list of chunks to append
+        self.removals = set()  # paths to delete
+
+    def write(self, path, data):
+        """
+        Stages a full replacement of a file.
+
+        Parameters:
+            path (str): The file to replace.
+            data (str or bytes): The new contents. Text is encoded as UTF-8.
+        """
+        self.removals.discard(path)
+        self.writes[path] = data
+
+    def append(self, path, data):
+        """
+        Stages data to be appended to a file.
+
+        Parameters:
+            path (str): The file to append to.
+            data (str or bytes): The data to append. Text is encoded as UTF-8.
+        """
+        self.appends.setdefault(path, []).append(data)
+
+    def remove(self, path):
+        """
+        Stages the deletion of a file.
+
+        Parameters:
+            path (str): The file to delete.
+        """
+        self.writes.pop(path, None)
+        self.removals.add(path)
+
+    def pending(self):
+        """
+        Returns True if anything is staged.
+        """
+        return bool(self.writes or self.appends or self.removals)
+
+    def commit(self):
+        """
+        Writes everything staged since the last commit.
+        """
+        writes, self.writes = self.writes, {}
+        appends, self.appends = self.appends, {}
+        removals, self.removals = self.removals, set()
+        if not (writes or appends or removals):
+            return
+
+        # Write and fsync every temporary file before changing any real one
+        renames = []
+        for path, data in writes.items():
+            temp_path = path + '.tmp'
+            with open(temp_path, 'wb') as file:
+                file.write(encode(data))
+                file.flush()
+                os.fsync(file.fileno())
+            renames.append((temp_path, path))
+
+        # Appends remember the file's current size, so repeating one never duplicates data
+        appends = [(path, self.size(path), b''.join(encode(chunk) for chunk in chunks)) for path, chunks in appends.items()]
+        removals = sorted(removals)
+
+        logged = len(renames) + len(appends) + len(removals) > 1
+        if logged:
+            self.write_log(renames, appends, removals)
+        self.apply(renames, appends, removals)
+        if logged:
+            os.remove(self.log_path)
+
+    def size(self, path):
+        try:
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
+
+    def write_log(self, renames, appends, removals):
+        """
+        Durably records a commit before any file is changed.
+        """
+        log = {
+            "renames": renames,
+            # latin-1 maps every byte to one character, so any data survives the JSON round trip
+            "appends": [(path, size, data.decode('latin-1')) for path, size, data in appends],
+            "removals": removals,
+        }
+        temp_path = self.log_path + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(log, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.log_path)
+        fsync_directory(os.path.dirname(self.log_path) or '.')
+
+    def apply(self, renames, appends, removals):
+        """
+        Applies a commit. Safe to repeat, which is how recover() finishes an interrupted one.
+        """
+        directories = set()
+
+        for path, size, data in appends:
+            created = not os.path.exists(path)
+            with open(path, 'ab') as file:
+                # Drop anything an interrupted attempt already appended
+                file.truncate(size)
+                file.write(data)
+                file.flush()
+                os.fsync(file.fileno())
+            if created:
+                directories.add(os.path.dirname(path) or '.')
+
+        for temp_path, path in renames:
+            if os.path.exists(temp_path):
+                os.replace(temp_path, path)
+            directories.add(os.path.dirname(path) or '.')
+
+        for path in removals:
+            if os.path.exists(path):
+                os.remove(path)
+                directories.add(os.path.dirname(path) or '.')
+
+        # Persist the renames themselves
+        for directory in directories:
+            fsync_directory(directory)
+
+    def recover(self):
+        """
+        Finishes a multi-file commit that was interrupted by a crash.
+
+        Call once at startup, before any data is read.
+        """
+        try:
+            with open(self.log_path, 'r') as file:
+                log = json.load(file)
+        except FileNotFoundError:
+            return
+        appends = [(path, size, data.encode('latin-1')) for path, size, data in log['appends']]
+        self.apply(log['renames'], appends, log['removals'])
+        os.remove(self.log_path)
+        print(f"Finished an interrupted commit of {len(log['renames']) + len(appends) + len(log['removals'])} files")
+
+# The shared writer used by every JSON storage backend
+writer = GroupCommitWriter()